@@ -25,6 +25,13 @@ This file is part of NX - Syntax Highlighter.
     along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
 '''
 
+import array
+import bisect
+import heapq
+import itertools
+import re
+import types
+
 '''
     Fonts
     
@@ -42,7 +49,10 @@ class FontStyle(object):
 class NXFont(object):   
     '''
         @summary: Abstract Class for fonts
+        @note: Fonts keep their fields in `__slots__`, as do colors. Subclasses should declare theirs, even if empty.
     '''
+    __slots__ = ("_fontName", "_size", "_style")
+    
     def __init__(self):
         raise NotImplementedError()
     
@@ -79,6 +89,8 @@ class GenericFont(NXFont):
     '''
         @summary: Concrete (Generic) Font Class.
     '''
+    __slots__ = ()
+    
     def __init__(self, name, size, style):
         '''
             @param name: str, Font-family name.
@@ -104,6 +116,14 @@ class GenericFont(NXFont):
     @FontSize.setter
     def FontSize(self, value):
         self._size = value
+        
+    #@return: int, The FontStyle flags
+    @property
+    def Style(self):
+        return self._style;
+    @Style.setter
+    def Style(self, value):
+        self._style = value
 
 '''
     Colors
@@ -117,6 +137,8 @@ class NXColor(object):
     '''
         @summary: Abstract color class.
     '''
+    __slots__ = ("_rgb", "_color")
+    
     def __init__(self):
         raise NotImplementedError()
         
@@ -167,6 +189,8 @@ class GenericColor (NXColor):
     '''
         @summary: Basic color class.
     '''
+    __slots__ = ()
+    
     def __init__(self, c, v=None):
         '''
             @param c: Color's hex string. High priority is both args are supplied.
@@ -181,18 +205,433 @@ class GenericColor (NXColor):
     Writer Classes
     
     Classes included:    
+    + StyleTable       :    Interned, immutable styles of a writer, by #id.
+    + SpanStore        :    Sorted container of the formatted spans, flattened to runs by the writers.
+    + RunCoalescer     :    Merges the runs of a SpanStore that a writer writes alike.
+    + WriterSink       :    Buffers the formatted chunks into a file, socket, generator or function.
     + NXWriter         :    ABC for Writer.
     + GenericWriter    :    Concrete class of NXWriter. Recommended for extending.
     + HtmlWriter       :    Extended class of NXWriter. Writes HTML formatting for the highlighter.
+    + RtfWriter        :    Extended class of NXWriter. Writes RTF formatting for the highlighter.
     
-    @todo: Implement RtfWriter and PdfWriter 
+    @todo: Implement PdfWriter 
 '''
+
+class StyleTable(object):
+    '''
+        @summary: The interned styles of a writer, by #id. Equal styles share an #id, so the spans of every text keep integers & what a writer makes of a style is cached once per #id.
+        @attention: The styles must be immutable & hashable. A style is never removed, so its #id is valid as long as the table.
+    '''
+    def __init__(self):
+        self.__styles = list()      # #Id: style
+        self.__ids = dict()         # style: #Id
+    
+    # Properties
+    # @return: int, The number of styles
+    @property
+    def Count(self): return len(self.__styles)
+    
+    # @return: list(style), The styles, by #id. Do not modify.
+    @property
+    def Styles(self): return self.__styles
+    
+    # Methods
+    def Intern(self, style):
+        '''
+            @param style: object, A style, as understood by the writer.
+            @return: int, The #id of the style, added if new.
+        '''
+        sid = self.__ids.get(style)
+        if sid is None:
+            sid = self.__ids[style] = len(self.__styles)
+            self.__styles.append(style)
+        return sid
+    
+    def __getitem__(self, sid):
+        return self.__styles[sid]
+
+class SpanStore(object):
+    '''
+        @summary: Sorted container of the formatted spans of a text. Spans may overlap & nest.
+        @note: Spans are ordered by their start & spans with the same start by the order they were added. Where spans overlap, the later one in this order takes precedence.
+               They are kept in blocks of bounded size, each a set of parallel arrays of the starts, the ends & the #ids of the styles, so a span costs a few machine words. 
+               Adding a span bisects the blocks & then a block, moving at most a block's items. Spans added in the order of their start, as the highlighter does, are appended to the last block.
+        @note: The queries of the styles at a position (See `StylesAt`) read an index of the runs, built on the first query after the spans change. 
+               Once built, `Runs` reads it too, in O(log n) to the first run.
+        @attention: The styles are interned in a StyleTable, one #id per distinct style, & must be hashable.
+    '''
+    BlockSize = 512
+    TypeCode = "l"      # The type of the arrays. See module `array`
+    
+    def __init__(self, table=None):
+        '''
+            @param table: StyleTable, The table the styles are interned in. Writers share theirs across texts. Default: a table of the store's own.
+        '''
+        self.__table = table if table is not None else StyleTable()
+        self.__starts = list()      # list(array), the starts of the spans of each block, sorted
+        self.__ends = list()        # list(array), their ends
+        self.__ids = list()         # list(array), the #ids of their styles
+        self.__lasts = list()       # The last start of each block
+        self.__count = 0
+        self.__index = None         # tuple(array, array, list), the starts of the runs, the #ids of their styles & tuple(style, ...) by #id. See `Index`
+    
+    # Properties
+    # @return: int, The number of spans
+    @property
+    def Count(self): return self.__count
+    
+    # @return: StyleTable, The table of the styles of the spans
+    @property
+    def Table(self): return self.__table
+    
+    # Methods
+    def Add(self, start, end, style):
+        '''
+            @param start: int, Start of the span.
+            @param end: int, End of the span (exclusive).
+            @param style: object, The format of the span, as understood by the writer. Must be hashable.
+        '''
+        self.AddId(start, end, self.__table.Intern(style))
+    
+    def AddId(self, start, end, sid):
+        '''
+            @param start: int, Start of the span.
+            @param end: int, End of the span (exclusive).
+            @param sid: int, The #id of the style of the span in the table. See StyleTable.Intern.
+        '''
+        self.__index = None
+        self.__count += 1
+        if not self.__starts:
+            self.__starts.append(array.array(self.TypeCode, (start,)))
+            self.__ends.append(array.array(self.TypeCode, (end,)))
+            self.__ids.append(array.array(self.TypeCode, (sid,)))
+            self.__lasts.append(start)
+            return
+        i = bisect.bisect_right(self.__lasts, start)    # After the spans with the same start, which take lower precedence
+        if i == len(self.__starts):
+            i -= 1
+            self.__starts[i].append(start)
+            self.__ends[i].append(end)
+            self.__ids[i].append(sid)
+            self.__lasts[i] = start
+        else:
+            j = bisect.bisect_right(self.__starts[i], start)
+            self.__starts[i].insert(j, start)
+            self.__ends[i].insert(j, end)
+            self.__ids[i].insert(j, sid)
+        if len(self.__starts[i]) > 2 * self.BlockSize:     # Split the block
+            n = self.BlockSize
+            for blocks in (self.__starts, self.__ends, self.__ids):
+                block = blocks[i]
+                blocks[i:i + 1] = [block[:n], block[n:]]
+            self.__lasts[i:i + 1] = [self.__starts[i][-1], self.__starts[i + 1][-1]]
+    
+    def Covering(self, index):
+        '''
+            @param index: int, A position in the text.
+            @return: list(style), The styles of the spans containing the position, the one taking precedence last.
+        '''
+        return list(self.StylesAt(index))
+    
+    def StylesAt(self, index):
+        '''
+            @param index: int, A position in the text.
+            @return: tuple(style, ...), The styles of the spans containing the position, the one taking precedence last. The same as those of the run containing it. See `Runs`.
+            
+            @summary: Bisects the index of the runs, built first if the spans have changed. See `Index`.
+        '''
+        self.Index()
+        starts, ids, combinations = self.__index
+        if index < 0:
+            return ()
+        return combinations[ids[bisect.bisect_right(starts, index) - 1]]
+    
+    def Index(self):
+        '''
+            @summary: Flattens the spans to runs, as `Runs` does, & keeps them for the queries, till the spans change. Does nothing if they have not.
+                      The runs are kept as the arrays of their starts & of the #ids of their styles, each distinct tuple of styles once.
+        '''
+        if self.__index is not None:
+            return
+        starts = array.array(self.TypeCode)
+        ids = array.array(self.TypeCode)
+        combinations = list()
+        table = dict()      # tuple(style, ...): #Id
+        end = max([ max(ends) for ends in self.__ends ]) if self.__ends else 0
+        for start, unused_stop, styles in self.__Scan(0, end):
+            cid = table.get(styles)
+            if cid is None:
+                cid = table[styles] = len(combinations)
+                combinations.append(styles)
+            starts.append(start)
+            ids.append(cid)
+        if () not in table:
+            combinations.append(())
+        starts.append(end)      # Past the last span, no styles
+        ids.append(table.get((), len(combinations) - 1))
+        self.__index = (starts, ids, combinations)
+    
+    def RemoveBefore(self, index):
+        '''
+            @param index: int, A position in the text.
+            
+            @summary: Discards the spans ending at or before the position. The rest keep their precedence.
+        '''
+        for i in range(len(self.__starts)):
+            starts, ends, ids = self.__starts[i], self.__ends[i], self.__ids[i]
+            if starts[0] >= index:    # No later span ends before the position
+                break
+            kept = [ j for j in xrange(len(ends)) if ends[j] > index ]
+            self.__starts[i] = array.array(self.TypeCode, [ starts[j] for j in kept ])
+            self.__ends[i] = array.array(self.TypeCode, [ ends[j] for j in kept ])
+            self.__ids[i] = array.array(self.TypeCode, [ ids[j] for j in kept ])
+        kept = [ i for i in range(len(self.__starts)) if self.__starts[i] ]
+        self.__starts = [ self.__starts[i] for i in kept ]
+        self.__ends = [ self.__ends[i] for i in kept ]
+        self.__ids = [ self.__ids[i] for i in kept ]
+        self.__lasts = [ starts[-1] for starts in self.__starts ]
+        self.__count = sum([ len(starts) for starts in self.__starts ])
+        self.__index = None
+    
+    def Clear(self):
+        '''
+            @summary: Discards all the spans. The table is kept.
+        '''
+        self.__init__(self.__table)
+    
+    # Generators
+    def __iter__(self):
+        '''
+            @return: generator, tuple(start, end, style) for every span, in order.
+        '''
+        styles = self.__table.Styles
+        for starts, ends, ids in zip(self.__starts, self.__ends, self.__ids):
+            for start, end, sid in itertools.izip(starts, ends, ids):
+                yield start, end, styles[sid]
+    
+    def Runs(self, begin, end):
+        '''
+            @param begin: int, Start of the range of the text.
+            @param end: int, End of the range of the text.
+            @return: generator, tuple(start, end, tuple(style, ...)) for consecutive runs of the text covering the range, with the styles of the spans containing each run.
+                     The styles are in order of precedence, the one taking precedence last. A run not in any span has no styles.
+            
+            @summary: Flattens the spans to runs that do not overlap, in a single pass over the spans, or from the index of the runs if it is built. See `Index`.
+        '''
+        if self.__index is not None and begin >= 0:
+            return self.__IndexedRuns(begin, end)
+        return self.__Scan(begin, end)
+    
+    # Helper Methods
+    def __IndexedRuns(self, begin, end):
+        starts, ids, combinations = self.__index
+        pos = begin
+        i = bisect.bisect_right(starts, pos) - 1
+        last = len(starts) - 1
+        while pos < end:
+            stop = min(starts[i + 1], end) if i < last else end
+            yield pos, stop, combinations[ids[i]]
+            pos = stop
+            i += 1
+    
+    def __Scan(self, begin, end):
+        styles = self.__table.Styles
+        active = list()     # tuple(#Order, #Id) of the spans containing the current position, in order
+        ends = list()       # Heap of tuple(end, #Order, span) of the active spans
+        pos = begin
+        order = 0
+        for starts, stops, ids in zip(self.__starts, self.__ends, self.__ids):
+            for start, stop, sid in itertools.izip(starts, stops, ids):
+                if start >= end:
+                    break
+                order += 1
+                if stop <= max(start, begin):   # Empty or before the range
+                    continue
+                while ends and ends[0][0] <= start:
+                    if ends[0][0] > pos:
+                        yield pos, ends[0][0], tuple([ styles[s[1]] for s in active ])
+                        pos = ends[0][0]
+                    active.remove(heapq.heappop(ends)[2])
+                if start > pos:
+                    yield pos, start, tuple([ styles[s[1]] for s in active ])
+                    pos = start
+                span = (order, sid)
+                active.append(span)
+                heapq.heappush(ends, (stop, order, span))
+            else:
+                continue
+            break
+        while ends and ends[0][0] < end:
+            if ends[0][0] > pos:
+                yield pos, ends[0][0], tuple([ styles[s[1]] for s in active ])
+                pos = ends[0][0]
+            active.remove(heapq.heappop(ends)[2])
+        if end > pos:
+            yield pos, end, tuple([ styles[s[1]] for s in active ])
                                       
+class RunCoalescer(object):
+    '''
+        @summary: The stage between the spans & a writer. Resolves the styles of every run of a SpanStore as the writer writes them (Eg: only the attributes that differ from the root format), 
+                  merges the adjacent runs that resolve alike & lets the leading whitespace of a run continue the run before it when the writer finds no visible difference (See `absorbs`). 
+                  The writer then writes one transition per merged run.
+        @note: The last style is kept from one call of `Runs` to the next, so a text formatted in ranges is merged across them. See `Reset`.
+    '''
+    def __init__(self, resolve, absorbs=None):
+        '''
+            @param resolve: function(tuple(style, ...)), Returns the resolved style of the styles of a run. Resolved styles must be hashable. `None` is the root format.
+            @param absorbs: function(resolved, previous), Returns True if whitespace of the resolved style looks the same in the previous style. `None` means never.
+        '''
+        self.__resolve = resolve
+        self.__absorbs = absorbs
+        self.__last = None
+    
+    # Properties
+    @property       # The resolved style of the last run
+    def Last(self): return self.__last
+    
+    # Methods
+    def Reset(self, resolved=None):
+        '''
+            @param resolved: The resolved style in effect. Default: the root format.
+        '''
+        self.__last = resolved
+    
+    def Runs(self, spans, text, begin, end):
+        '''
+            @param spans: SpanStore, The spans of the text.
+            @param text: str, The text.
+            @param begin: int, The first index.
+            @param end: int, The index to stop at.
+            @return: generator, tuple(start, end, resolved) for the merged runs of [begin, end). The first may continue the last run of the previous call.
+        '''
+        pending = None      # list(start, end, resolved), the run being merged
+        last = self.__last
+        absorbs = self.__absorbs
+        for start, stop, styles in spans.Runs(begin, end):
+            resolved = self.__resolve(styles)
+            if resolved != last and absorbs is not None:
+                # The leading whitespace of a run is decided alone, so a run split across calls is merged as the whole run would be
+                chunk = text[start:stop]
+                blank = start + len(chunk) - len(chunk.lstrip())
+                if blank > start and absorbs(resolved, last):
+                    if pending is not None and last == pending[2]:
+                        pending[1] = blank
+                    else:
+                        if pending is not None:
+                            yield tuple(pending)
+                        pending = [start, blank, last]
+                    if blank == stop:
+                        continue
+                    start = blank
+            if pending is not None and resolved == pending[2]:
+                pending[1] = stop
+            else:
+                if pending is not None:
+                    yield tuple(pending)
+                pending = [start, stop, resolved]
+            last = resolved
+        if pending is not None:
+            yield tuple(pending)
+        self.__last = last
+
+class WriterSink(object):
+    '''
+        @summary: Buffers the chunks written into it & passes them on to a destination: a file-like object (`write`), a socket (`sendall`), 
+                  a generator receiving the chunks (`send`, started if it is not) or a function called with every chunk.
+                  At most `bufferSize` characters are held. A larger chunk is passed on at once, after those buffered before it.
+        @note: The destination is not closed by `Close`, except a generator, which is closed once its chunks are sent.
+    '''
+    def __init__(self, target, bufferSize=65536):
+        '''
+            @param target: file|socket|generator|function, The destination of the chunks.
+            @param bufferSize: int, The number of characters held before they are passed on. 0 passes on every chunk as it is written.
+        '''
+        self.__target = target
+        self.__bufferSize = bufferSize
+        self.__buffer = list()
+        self.__size = 0         # Characters in the buffer
+        self.__written = 0      # Characters passed on
+        if isinstance(target, types.GeneratorType):
+            if target.gi_frame is not None and target.gi_frame.f_lasti == -1:   # Not started
+                target.next()
+            self.__emit = target.send
+        elif hasattr(target, "write"):
+            self.__emit = target.write
+        elif hasattr(target, "sendall"):
+            self.__emit = target.sendall
+        elif callable(target):
+            self.__emit = target
+        else:
+            raise TypeError("A sink must be a file, socket, generator or function, not %s" % type(target).__name__)
+    
+    # Properties
+    @property       # file|socket|generator|function
+    def Target(self): return self.__target
+    
+    @property       # int
+    def BufferSize(self): return self.__bufferSize
+    
+    # @return: int, The characters passed on to the destination so far.
+    @property
+    def Written(self): return self.__written
+    
+    # Methods
+    @staticmethod
+    def Wrap(target, bufferSize=65536):
+        '''
+            @return: WriterSink, The target if it is a sink already, else a sink of it.
+        '''
+        return target if isinstance(target, WriterSink) else WriterSink(target, bufferSize)
+    
+    def Write(self, chunk):
+        '''
+            @param chunk: str, The formatted text to write.
+        '''
+        if not chunk:
+            return
+        self.__buffer.append(chunk)
+        self.__size += len(chunk)
+        if self.__size >= self.__bufferSize:
+            self.__Emit()
+    
+    def Flush(self):
+        '''
+            @summary: Passes on the chunks buffered & flushes the destination, if it can be.
+        '''
+        self.__Emit()
+        flush = getattr(self.__target, "flush", None)
+        if flush is not None and not isinstance(self.__target, types.GeneratorType):
+            flush()
+    
+    def Close(self):
+        '''
+            @summary: Passes on the chunks buffered. A generator is closed.
+        '''
+        self.Flush()
+        if isinstance(self.__target, types.GeneratorType):
+            self.__target.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, excType, unused_excValue, unused_traceback):
+        if excType is None:
+            self.Close()
+    
+    # Helper Methods
+    def __Emit(self):
+        if self.__buffer:
+            chunk = self.__buffer[0] if len(self.__buffer) == 1 else "".join(self.__buffer)
+            self.__buffer = list()
+            self.__size = 0
+            self.__emit(chunk)
+            self.__written += len(chunk)
+
 class NXWriter(object):
     '''
         @attention: This is an top-most abstract class. For simple inherting extend GenericWriter.
-        @attention: Format-Map has the following ordering:
-                    Format-Map[ #Index: Format-Map-For-Index[ Color: Value, BackColor: Value, Font: Value, FontSize: Value, Bold: Value, ... ], ... ]
+        @attention: The formats of the selections are kept as spans in a SpanStore, `_spans`. The style of a span is defined by the writer & interned in `_styleTable`.
+                    The initial (root) format applies to the whole text & is added at index -1.
                     
         @summary: Abstract class for writing.        
     '''
@@ -200,6 +639,8 @@ class NXWriter(object):
         '''
             @summary: Internal class used for selections.
         '''     
+        __slots__ = ("Index", "Length")
+        
         def __init__(self, index, length):
             '''
                 @param index: int, Starting index.
@@ -223,7 +664,9 @@ class NXWriter(object):
     def Text(self, value): 
         self._text = value
         # Add initial format
-        self._formatMap = dict()
+        self._spans = SpanStore(self._styleTable)
+        self._formats = dict()                  # The formats of `StyleAt`, resolved against the root format added below
+        self._selection = self.Range(-1, 0)     # Index -1 is required for initial header
         self.AddFormat(self._defaultColor.Color, self._defaultBackColor.Color, self._defaultFont.FontName, self._defaultFont.FontSize, self._defaultFont.IsRegular(), self._defaultFont.IsBold(), self._defaultFont.IsItalic(), self._defaultFont.IsUnderline())    # Add initial root format
         
     # @return: str
@@ -231,9 +674,52 @@ class NXWriter(object):
     def FormattedText(self): return self.GetFormattedText();
     
     def FormattedHtml(self, title="Output | NX Syntax Highlighter", header="", footer=""):
-        return "<html><head><title>%s</title><body bgcolor='#%s'>%s%s%s</body></html>" % (title, self._defaultBackColor.Color, header, self.FormattedText, footer)                         
+        return self.FormattedHtmlHeader(title, header) + self.FormattedText + self.FormattedHtmlFooter(footer)
+    
+    def FormattedHtmlHeader(self, title="Output | NX Syntax Highlighter", header=""):
+        return "<html><head><title>%s</title><body bgcolor='#%s'>%s" % (title, self._defaultBackColor.Color, header)
+    
+    def FormattedHtmlFooter(self, footer=""):
+        return "%s</body></html>" % footer
+    
+    def FormatComment(self, text):
+        '''
+            @return: str, The text as a comment of the output, written in the header of a document.
+        '''
+        return "<!--%s-->" % text
         
     # Methods
+    def IterFormatted(self, title=None, header="", footer="", chunkSize=65536):
+        '''
+            @param title: str, The title of the document. `None` formats the text alone, as `FormattedText` does, else the document, as `FormattedHtml` does.
+            @param header: str, Written after the header of the document.
+            @param footer: str, Written before the footer of the document.
+            @param chunkSize: int, The number of characters of the text to format at a time.
+            @return: generator, The formatted text in chunks. Joined together they are identical to `FormattedText` or `FormattedHtml`.
+        '''
+        if title is not None:
+            yield self.FormattedHtmlHeader(title, header)
+        end = len(self._text) + 1   # The final closing tags (if any) are at index len(text)
+        for begin in xrange(-1, end, chunkSize):
+            yield self.GetFormattedRange(begin, min(begin + chunkSize, end))
+        yield self.GetFormattedEnd()
+        if title is not None:
+            yield self.FormattedHtmlFooter(footer)
+    
+    def WriteFormatted(self, sink, title=None, header="", footer="", chunkSize=65536):
+        '''
+            @param sink: WriterSink|file|socket|generator|function, The destination of the formatted text. See WriterSink.
+            @return: int, The number of characters written.
+            
+            @summary: Writes the formatted text into the sink in chunks, never holding the whole of it. The other arguments are those of `IterFormatted`.
+        '''
+        sink = WriterSink.Wrap(sink)
+        written = sink.Written
+        for chunk in self.IterFormatted(title, header, footer, chunkSize):
+            sink.Write(chunk)
+        sink.Flush()
+        return sink.Written - written
+    
     def Select(self, index, length):        
         if index >= 0 and length >= 0 and (index + length) <= len(self._text):  # Check for valid selection boundary
             self._selection.Index = index
@@ -244,9 +730,23 @@ class NXWriter(object):
             else:            
                 raise IndexError("Selection should be between 0 and %d" % len(self._text))
         
+    def Prepare(self, classes):
+        '''
+            @param classes: list( tuple(name, GenericColor|None, GenericColor|None, GenericFont|None) ), The formats the text may be formatted with, as given to `SelectionClass`.
+            
+            @summary: Called once the text is set, before any format is added. Writers that write tables of the formats ahead of the text (Eg: RtfWriter) fill them here.
+        '''
+        pass
+    
     # Abstract Methods
     def GetFormattedText(self):
         raise NotImplementedError()
+    def GetFormattedRange(self, begin, end):
+        raise NotImplementedError()
+    def GetFormattedEnd(self):
+        raise NotImplementedError()
+    def ClearFormats(self, end):
+        raise NotImplementedError()
     def AddFormat(self, forecolor, backcolor, font, size, regular, bold, italic, underline):
         raise NotImplementedError()
     
@@ -259,7 +759,7 @@ class NXWriter(object):
 class GenericWriter(NXWriter):
     '''
         @note: Extend this class for other writers
-        @attention: Override AddFormat(self, forecolor, backcolor, font, size, regular, bold, italic, underline) & GetFormattedText(self) methods
+        @attention: Override AddFormat(self, forecolor, backcolor, font, size, regular, bold, italic, underline), MakeStyle(...) with the same arguments, MakeFormat(self, styles) & GetFormattedText(self) methods
         
         @summary: Generic writer to perform basic output operations.
     '''
@@ -270,6 +770,7 @@ class GenericWriter(NXWriter):
             @param font: GenericFont, The font.             
         '''              
         self._selection = self.Range(-1,0)   # Cannot use Select(int, int). Index -1 is required for initial header 
+        self._styleTable = StyleTable()     # The styles of the spans, kept across texts. See `InternClass`
         self._defaultColor = color;
         self._defaultBackColor = backcolor
         self._defaultFont = font      
@@ -345,42 +846,214 @@ class GenericWriter(NXWriter):
             
             @summary: Formats the text according to the format specified in the args. 
         '''
+        args = self.FormatArguments(forecolor, backcolor, font)
+        if args is not None:
+            self.AddFormat(*args)
+    
+    def SelectionClass(self, name, forecolor, backcolor, font):
+        '''
+            @param name: str, The name of the class of formats (Eg: the key of a highlight rule).
+            @param forecolor: GenericColor, The selection's foreground color.         
+            @param backcolor: GenericColor, The selection's background color.        
+            @param font: GenericFont, The selection's font.
+            
+            @summary: Formats the text with a named format. Writers that have no named formats format it as `SelectionFormat` does.
+        '''
+        self.SelectionFormat(forecolor, backcolor, font)
+    
+    def InternClass(self, name, forecolor, backcolor, font):
+        '''
+            @return: int, The #id of the style of the named format, for `SelectionStyle`. `None` if it formats nothing. The arguments are those of `SelectionClass`.
+            
+            @summary: Resolves a named format once, so that formatting a selection with it is a lookup of its #id. 
+            @note: The #id stays valid for the writer, but what the format depends on may not (Eg: the tables of RtfWriter are emptied by `Clear`). Intern again for every text.
+        '''
+        args = self.FormatArguments(forecolor, backcolor, font)
+        return self._styleTable.Intern(self.MakeStyle(*args)) if args is not None else None
+    
+    def SelectionStyle(self, sid):
+        '''
+            @param sid: int, The #id of a style, as returned by `InternClass`.
+            
+            @summary: Formats the text with an interned style, as `SelectionClass` does with the format it was interned from.
+        '''
+        if self._selection.Length > 0:  # Empty selections format nothing
+            self._spans.AddId(self._selection.Index, self._selection.Index + self._selection.Length, sid)
+    
+    def StyleAt(self, offset):
+        '''
+            @param offset: int, A position in the text. -1 is the root format.
+            @return: dict, The format of the text at the position: {'Foreground': GenericColor, 'Background': GenericColor, 'Font': GenericFont}. 
+            
+            @summary: Looks up the format in O(log n) of the spans, once they are indexed. See SpanStore.StylesAt.
+            @attention: Positions formatted alike share the format & its objects. Do not modify them.
+        '''
+        return self.GetFormatOf(self._spans.StylesAt(offset))
+    
+    def StylesInRange(self, start, end):
+        '''
+            @param start: int, The first position.
+            @param end: int, The position to stop at.
+            @return: list( tuple(start, end, dict) ), The consecutive runs covering [start, end) with their formats, as given by `StyleAt`.
+            
+            @summary: Looks up the formats in O(log n) of the spans, once they are indexed, & O(1) for every run.
+        '''
+        self._spans.Index()
+        return [ (begin, stop, self.GetFormatOf(styles)) for begin, stop, styles in self._spans.Runs(start, end) ]
+    
+    def GetFormat(self):
+        '''
+            @return: A dictionary having the format of the selected item. See `StyleAt`.
+        '''
+        return self.StyleAt(self._selection.Index)
+    
+    def GetFormatOf(self, styles):
+        '''
+            @param styles: tuple(style, ...), The styles of a run, as given by SpanStore.Runs.
+            @return: dict, The format of the styles merged over the root format, cached by the styles. See `StyleAt`.
+        '''
+        fmt = self._formats.get(styles)
+        if fmt is None:
+            fmt = self._formats[styles] = self.MakeFormat(styles)
+        return fmt
+    
+    @staticmethod
+    def FormatArguments(forecolor, backcolor, font):
+        '''
+            @return: tuple, The arguments of `AddFormat` for the format. `None` if all of them are None.
+        '''
         fc = forecolor.Color if forecolor is not None else None
         bc = backcolor.Color if backcolor is not None else None                                  
         
         # Add only is atleast one attribute is not None
         if font is not None:
-            self.AddFormat(fc, bc, font.FontName, font.FontSize, font.IsRegular(), font.IsBold(), font.IsItalic(), font.IsUnderline())            
+            return (fc, bc, font.FontName, font.FontSize, font.IsRegular(), font.IsBold(), font.IsItalic(), font.IsUnderline())
         elif fc is not None or bc is not None:
-            self.AddFormat(fc, bc, None, 0, False, False, False, False)
+            return (fc, bc, None, 0, False, False, False, False)
+        return None
             
     # Virtual Methods
     def GetFormattedText(self):
         pass
     
+    def GetFormattedRange(self, begin, end):
+        pass
+    
+    def GetFormattedEnd(self):
+        pass
+    
+    def ClearFormats(self, end):
+        pass
+    
     def AddFormat(self, forecolor, backcolor, font, size, regular, bold, italic, underline):
         pass
+    
+    def MakeStyle(self, forecolor, backcolor, font, size, regular, bold, italic, underline):
+        pass
+    
+    def MakeFormat(self, styles):
+        pass
 
 class HtmlWriter(GenericWriter):
     '''
-        @attention: Format-Map has the following ordering:
-                    Format-Map[ 
-                        #Index: [ "end": "indices separated by |", "color:": #Value, "background-color:": #Value, "font-family:": 'Value', "font-size:": Value+'px', "font-weight:": normal|bold, "font-style:": normal|italic, "text-decoration:": none|underline ], 
-                        ... ]
-                    The number of '|' in "end" signifies the number of distinct closing tags
+        @attention: The style of a span is a tuple of the CSS attributes it sets, in the order of `Attributes`:
+                    ( ("color:", #Value), ("background-color:", #Value), ("font-family:", 'Value'), ("font-size:", Value+'px'), ("font-weight:", normal|bold), ("font-style:", normal|italic), ("text-decoration:", none|underline) )
+                    The root format has all of them & is kept apart in `_rootFormat`.
+        @attention: With `CssClasses` set, the formats added through `SelectionClass` are written as CSS classes, `ClassPrefix`-name, instead of inline styles. 
+                    The rules of the classes are given by `GetStylesheet` & must be included once in the page. Formats with no class are still written inline.
         @note: Class used to write actual format by overriding AddFormat() & GetFormattedText() methods                        
         
-        @summary: Provides functionality to write a formatted HTML file.
+        @summary: Provides functionality to write a formatted HTML file. 
+                  Overlapping & nested formats are flattened to runs of text, each written in a single <span> with the attributes of all its formats merged 
+                  that differ from the root format.
     '''
+    Attributes = ("color:", "background-color:", "font-family:", "font-size:", "font-weight:", "font-style:", "text-decoration:")
+    ClassPrefix = "nx"      # Class of the root format & prefix of the other classes
+    WhitespaceNeutral = ("color:", "font-weight:", "font-style:")  # Attributes that do not show on whitespace, in the monospaced fonts code is set in. See `Absorbs`
+    
     def __init__(self, color, backcolor, font):
         '''
             @param color: GenericColor, The selection's foreground color.         
             @param backcolor: GenericColor, The selection's background color.        
             @param font: GenericFont, The selection's font.
         '''
+        self._styles = dict()       # tuple(style, ...): The resolved style of the merged styles. See `ResolveStyle`
+        self._attributes = dict()   # Resolved style: The attributes of its <span>. See `GetAttributes`
+        self._absorbs = dict()      # tuple(resolved, previous): If whitespace of the resolved style may be written in the previous. See `Absorbs`
+        self._coalescer = RunCoalescer(self.ResolveStyle, self.Absorbs)
+        self._classes = dict()      # style: The CSS class of the style. Formats with the same style share the class first added for it
+        self._added = dict()        # tuple(name, forecolor, backcolor, font): True, for the classes already added
+        self._cssClasses = False
+        self._open = None           # The attributes of the <span> left open by `GetFormattedRange`
         super(HtmlWriter, self).__init__(color, backcolor, font)
     
+    # Properties
+    
+    # @return: bool, If the formats added through `SelectionClass` are written as CSS classes.
+    @property
+    def CssClasses(self): return self._cssClasses
+    @CssClasses.setter
+    def CssClasses(self, value):
+        self._cssClasses = value
+        self._styles.clear()
+        self._absorbs.clear()
+    
     # Methods    
+    def SelectionClass(self, name, forecolor, backcolor, font):
+        '''
+            @param name: str, The name of the CSS class, without the `ClassPrefix`.
+            @param forecolor: GenericColor, The selection's foreground color.         
+            @param backcolor: GenericColor, The selection's background color.        
+            @param font: GenericFont, The selection's font.
+            
+            @summary: Formats the text as `SelectionFormat` does & with `CssClasses` set, writes the format as the class.
+        '''
+        if self._cssClasses:
+            self.AddClass(name, forecolor, backcolor, font)
+        self.SelectionFormat(forecolor, backcolor, font)
+    
+    def InternClass(self, name, forecolor, backcolor, font):
+        '''
+            @summary: Interns the style of the named format as GenericWriter.InternClass does & with `CssClasses` set, registers it as the class.
+        '''
+        if self._cssClasses:
+            self.AddClass(name, forecolor, backcolor, font)
+        return super(HtmlWriter, self).InternClass(name, forecolor, backcolor, font)
+    
+    def AddClass(self, name, forecolor, backcolor, font):
+        '''
+            @param name: str, The name of the CSS class, without the `ClassPrefix`.
+            @param forecolor: GenericColor, The class's foreground color.         
+            @param backcolor: GenericColor, The class's background color.        
+            @param font: GenericFont, The class's font.
+            
+            @summary: Registers the class for its format. Formats added later with the same style are written as the class.
+        '''
+        key = (name, forecolor, backcolor, font)
+        if self._added.has_key(key):    # Highlighters add the same rule for every span
+            return
+        self._added[key] = True
+        args = self.FormatArguments(forecolor, backcolor, font)
+        if args is not None:
+            style = self.MakeStyle(*args)
+            if not self._classes.has_key(style):
+                self._classes[style] = "%s-%s" % (self.ClassPrefix, name)
+                self._styles.clear()
+    
+    def GetStylesheet(self, classes):
+        '''
+            @param classes: list( tuple(name, GenericColor|None, GenericColor|None, GenericFont|None) ), The classes, as given to `AddClass`.
+            @return: str, The CSS rules of the root format & of the classes.
+            
+            @note: The output of a writer only depends on the rules of the classes that it uses, not on their order. 
+        '''
+        css = [ ".%s{%s}" % (self.ClassPrefix, "".join([ k + v + ";" for k, v in self._rootFormat ])) ]
+        for name, forecolor, backcolor, font in classes:
+            args = self.FormatArguments(forecolor, backcolor, font)
+            if args is not None:
+                css.append(".%s-%s{%s}" % (self.ClassPrefix, name, "".join([ k + v + ";" for k, v in self.MakeStyle(*args) ])))
+        return "\n".join(css) + "\n"
+    
     def AddFormat(self, forecolor, backcolor, font, size, regular, bold, italic, underline):
         '''
             @param forecolor: str, The selection's foreground color string.         
@@ -392,32 +1065,26 @@ class HtmlWriter(GenericWriter):
             @param italic: bool, If the selection should be italic.
             @param underline: bool, If the selection should be underlined.  
             
-            @summary: Determines how the format is added to the format-map. This is read by the `GetFormattedText` function to produce the actual output.
+            @summary: Determines how the format is added to the spans. These are read by the `GetFormattedText` function to produce the actual output.
         '''
         # Assign the selection for easy manipulation
         index = self._selection.Index        
         length = self._selection.Length
-                
-        # Insert End of tag
-        if length > 0:
-            strIndex = str(index)
-            if self._formatMap.has_key(index + length):             # If mapping already exists
-                if self._formatMap[index + length].has_key("end"):  # If end tag is already specified
-                    s = self._formatMap[index + length]["end"]
-                    if s.find(strIndex+"|") < 0:                    # Add another tag only if the requesting index is different ( For overlapping highlights ) 
-                        self._formatMap[index + length]["end"] += strIndex + "|"    # Add with delimiter
-                else:
-                    self._formatMap[index + length]["end"] = strIndex + "|"
-            else:
-                self._formatMap[index + length] = dict()
-                self._formatMap[index + length]["end"] = strIndex + "|"        
-        
-        # Beginnning of tag
-        if not self._formatMap.has_key(index):
-            self._formatMap[index] = dict()
-            
-        t = self._formatMap[index]  # Get the mapping for the index
         
+        style = self.MakeStyle(forecolor, backcolor, font, size, regular, bold, italic, underline)
+        if index < 0:       # Root format
+            if style != getattr(self, "_rootFormat", None):     # The styles are resolved against it
+                self._styles.clear()
+                self._absorbs.clear()
+            self._rootFormat = style
+        elif length > 0:    # Empty selections format nothing
+            self._spans.Add(index, index + length, style)
+    
+    def MakeStyle(self, forecolor, backcolor, font, size, regular, bold, italic, underline):
+        '''
+            @return: tuple, The style of the format, as kept in the spans. The arguments are those of `AddFormat`.
+        '''
+        t = dict()
         if forecolor is not None:                
             t["color:"] = "#" + forecolor
         if backcolor is not None:                
@@ -441,31 +1108,17 @@ class HtmlWriter(GenericWriter):
         elif regular is True:
             t["text-decoration:"] = "none"      
         
+        return tuple([ (k, t[k]) for k in self.Attributes if t.has_key(k) ])
+        
     def GetFormatStack(self):
         '''
-            @summary: Returns the format stack for the selection till the selected index.
-        '''
-        stack = list()                
-        sortedKeys = sorted(self._formatMap.keys())     # Sort keys prior to searching for the last formatting        
-        for k in sortedKeys:
-            if k > self._selection.Index:
-                break  
-            if self._formatMap[k].has_key("end"):                
-                for unused_j in range(1, len(self._formatMap[k]["end"].split("|"))):
-                    if len(stack) == 0: 
-                        break
-                    else:
-                        stack.pop()
-                if len(self._formatMap[k]) > 1:     # If any formatting is present. (If it's not just a closing tag), then append.
-                    stack.append(k)
-            else:
-                stack.append(k)            
-        return stack
+            @summary: Returns the styles of the formats containing the selected index, the innermost last. The root format is not included.
+        '''
+        return self._spans.Covering(self._selection.Index)
     
-        
     def ParseFormatting(self, formatDict):
         '''
-            @summary: Returns a format type object with wrapper classes from a formatMap entry
+            @summary: Returns a format type object with wrapper classes from a dictionary of CSS attributes
         '''                
         fmt = dict()
         fs = FontStyle.Empty
@@ -479,49 +1132,151 @@ class HtmlWriter(GenericWriter):
         
         return fmt
     
-    def GetFormat(self):
+    def MakeFormat(self, styles):
         '''
-            @return: A dictionary having the format of the selected item.
-            @summary: Returns the format for the selection by recursing till the parent root.
+            @return: A dictionary having the format of the styles, merged over the root format. See GenericWriter.GetFormatOf.
         '''        
-        stack = self.GetFormatStack()
-        fmtDict= {'color:' : None, 'background-color:' : None, 'font-family:' : None, 'font-size:' : None, 'font-weight:' : None, 'font-style:' : None, 'text-decoration:' : None, 'end': ''}
-        max_items = len(fmtDict)
-        count = 1   # To compensate for the extra `end` key. `end` is not required for formatting, but only for the closing tag.
-        #print self._formatMap
-        while len(stack) > 0:   # Pop indices until all the entries have values. The top level node has all the attributes defined.
-            i = stack.pop()            
-            for k,v in self._formatMap[i].items():
-                if fmtDict[k] is None:      # If the list item is empty, then add the value to list and increment the counter
-                    fmtDict[k] = v                    
-                    count += 1
-                if count == max_items:      # If all items have values, then break.
-                    break            
-        del fmtDict['end'] # Remove the extra `end` key.
+        fmtDict = dict(self._rootFormat)    # The root format has all the attributes defined.
+        for style in styles:
+            fmtDict.update(style)
         return self.ParseFormatting(fmtDict)
+    
+    def GetStyle(self, styles):
+        '''
+            @param styles: tuple(style, ...), The styles of a run of text, as given by SpanStore.Runs.
+            @return: str, The attributes of the <span> of the styles merged, the later ones taking precedence. `None` if the run is written in the root format.
+        '''
+        return self.GetAttributes(self.ResolveStyle(styles))
+    
+    def ResolveStyle(self, styles):
+        '''
+            @param styles: tuple(style, ...), The styles of a run of text, as given by SpanStore.Runs.
+            @return: tuple(tuple(name, ...), tuple((attribute, #Value), ...)), The classes & the inline attributes of the styles merged, the later ones taking precedence. 
+                     `None` if the run looks as the root format does, so it needs no <span>.
+            
+            @note: The precedence of CSS classes is that of their rules in the stylesheet, not of the styles. 
+                   An attribute is written by a class only if no other class of the run sets it to another value. Otherwise it is written inline.
+                   An attribute with the value of the root format is left out, unless a class of the run sets it to another value.
+        '''
+        if not styles:
+            return None
+        resolved = self._styles.get(styles, False)
+        if resolved is False:
+            t = dict()
+            classes = list()    # tuple(name, style) of the styles written as classes, in order
+            values = dict()     # Attribute: set(#Value, ...), the values set by the classes
+            for style in styles:
+                t.update(style)
+                name = self._classes.get(style) if self._cssClasses else None
+                if name is not None:
+                    classes.append((name, style))
+                    for k, v in style:
+                        values.setdefault(k, set()).add(v)
+            root = dict(self._rootFormat)
+            inline = tuple([ (k, t[k]) for k in self.Attributes if t.has_key(k) and values.get(k) != set([t[k]]) and (values.has_key(k) or root.get(k) != t[k]) ])
+            names = list()
+            for name, style in classes:     # A class none of whose values is in effect is left out
+                if name not in names and [ k for k, v in style if t[k] == v ]:
+                    names.append(name)
+            resolved = self._styles[styles] = (tuple(names), inline) if names or inline else None
+        return resolved
+    
+    def GetAttributes(self, resolved):
+        '''
+            @param resolved: tuple, A resolved style. See `ResolveStyle`.
+            @return: str, The attributes of the <span> of the resolved style. `None` for the root format.
+        '''
+        if resolved is None:
+            return None
+        attributes = self._attributes.get(resolved)
+        if attributes is None:
+            names, inline = resolved
+            attributes = list()
+            if names:
+                attributes.append('class="%s"' % " ".join(names))
+            if inline:
+                attributes.append('style="%s"' % "".join([ k + v + ";" for k, v in inline ]))
+            attributes = self._attributes[resolved] = " ".join(attributes)
+        return attributes
+    
+    def Absorbs(self, resolved, previous):
+        '''
+            @param resolved: tuple, The resolved style of a run of whitespace. See `ResolveStyle`.
+            @param previous: tuple, The resolved style of the run before it.
+            @return: bool, True if the whitespace looks the same in the previous style, so it can be written in its <span>: 
+                     they have the same classes & differ only in the attributes of `WhitespaceNeutral`.
+        '''
+        key = (resolved, previous)
+        absorbs = self._absorbs.get(key)
+        if absorbs is None:
+            names, inline = resolved or ((), ())
+            previousNames, previousInline = previous or ((), ())
+            a, b = dict(inline), dict(previousInline)
+            absorbs = self._absorbs[key] = names == previousNames and not [ k for k in set(a) | set(b) if a.get(k) != b.get(k) and k not in self.WhitespaceNeutral ]
+        return absorbs
                             
     def GetFormattedText(self):
         '''
             @summary: Formats the text & returns the formatted text
         '''
-        fmt = ""
-        length = len(self.Text)
-        for i in range(-1, length+1):   # -1 & length+1 are due to the format map. Initial format is stored at key: -1 & Final closing tag(if any) is at key: len(text)+1  
-            if self._formatMap.has_key(i):
-                s = ""                
-                for k,v in self._formatMap[i].items():  # Add format of corresponding CSS attribute
-                    if k == "end":                        
-                        for unused_j in range(1, len(v.split("|"))):  # Add closing tag n-times determined by the occurences of the delimiter
-                            fmt = fmt + "</span>"
-                    else:
-                        s = s + k + v + ";"
-                if s != "":     # Add format if the attribute is not empty (Can be empty in case of "end"-only value) 
-                    fmt += '<span style="' + s + '">'
-                                                
-            if i != -1 and i != length:     # Append valid HTML text if iterator is within text's length range
-                fmt += self.TranslateChar(self.Text[i])        
-        fmt += "</span>"    # Final closing tag of the header. Required because it is never added while formatting.
-        return fmt
+        return self.GetFormattedRange(-1, len(self.Text) + 1) + self.GetFormattedEnd()   # -1 & length+1 are the boundaries of the ranges. Initial format is written at index: -1 
+    
+    def GetFormattedRange(self, begin, end):
+        '''
+            @param begin: int, The first index to format. Index -1 holds the initial format.
+            @param end: int, The index to stop at.
+            
+            @summary: Returns the formatted text for the indices [begin, end). 
+                      Concatenating consecutive ranges from -1 to len(text)+1 followed by `GetFormattedEnd()` gives `GetFormattedText()`.
+                      A <span> still open at the end of the range is continued by the next range.
+                      Runs written alike share a <span>, & runs that look as the root format does have none. See RunCoalescer.
+        '''
+        fmt = list()
+        if begin < 0 <= end:
+            if self._cssClasses:
+                fmt.append('<span class="%s">' % self.ClassPrefix)
+            else:
+                fmt.append('<span style="' + "".join([ k + v + ";" for k, v in self._rootFormat ]) + '">')
+            self._open = None
+            self._coalescer.Reset()
+        for start, stop, resolved in self._coalescer.Runs(self._spans, self.Text, max(begin, 0), min(end, len(self.Text))):
+            attributes = self.GetAttributes(resolved)
+            if attributes != self._open:
+                if self._open is not None:
+                    fmt.append("</span>")
+                if attributes is not None:
+                    fmt.append('<span ' + attributes + '>')
+                self._open = attributes
+            fmt.append(self.TranslateText(self.Text[start:stop]))
+        return "".join(fmt)
+    
+    def GetFormattedEnd(self):
+        '''
+            @summary: Returns the closing tags of the last run & of the header. Required because they are never added while formatting.
+        '''
+        fmt = "</span>" if self._open is not None else ""
+        self._open = None
+        return fmt + "</span>"
+    
+    def ClearFormats(self, end):
+        '''
+            @param end: int, The index to clear the formats till. 
+            
+            @summary: Discards the formats ending before `end`, once they have been written out. Used when streaming, to keep the spans few.
+            @attention: The selection queries (GetSelectionColor, etc.) cannot look past the discarded formats.
+        '''
+        self._spans.RemoveBefore(end)
+        
+    def TranslateText(self, text):
+        '''
+            @param text: str, The text to translate.
+            
+            @summary: Translates every char of the text as `TranslateChar` does. Done in bulk, unless `TranslateChar` is overridden.
+        '''
+        if self.TranslateChar.im_func is not HtmlWriter.TranslateChar.im_func:
+            return "".join([self.TranslateChar(c) for c in text])
+        # "<br />" has characters that are translated themselves, so it goes last 
+        return text.replace("\r", "").replace(" ", "&nbsp;").replace("\t", "&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;").replace(">", "&gt;").replace("<", "&lt;").replace("\n", "<br />")
     
     def TranslateChar(self, c):
         '''
@@ -547,4 +1302,322 @@ class HtmlWriter(GenericWriter):
         
     def GetSelectionFont(self):        
         return self.GetFormat()['Font']
-                
\ No newline at end of file
+                
+class RtfWriter(GenericWriter):
+    '''
+        @attention: The style of a span is a tuple of the attributes it sets, `None` for those it leaves to the formats beneath it:
+                    (forecolor, backcolor, font, size, bold, italic, underline)
+                    The root format has all of them & is kept apart in `_rootFormat`. 
+        @attention: The color & font tables are built as the formats are added, from their distinct colors & fonts, & are written at the start of the text (index -1).
+                    Highlighters add the formats of all their rules first (See `Prepare`), so the tables are complete when streaming. 
+                    A color added once the tables are written is written as the nearest color of the table, & a font as the default font.
+        @note: `str` text is read as UTF-8, a byte that is not part of a UTF-8 character as Latin-1. The characters outside of ASCII are written as `\\uN?` escapes.
+               A range of the text is extended to the end of the UTF-8 character it ends in, so a character is not split between the chunks of a stream.
+               CSS classes do not apply, `CssClasses` is always False.
+        
+        @summary: Provides functionality to write a formatted RTF document in a single pass over the runs of the spans.
+                  Only the attributes that change from one run to the next are written, as control words, & the whole text is a single group.
+                  Runs written alike are merged first. See RunCoalescer.
+    '''
+    Escapes = re.compile(r"[\\{}\t\r\n]|[^\x00-\x7f]")
+    # For `str` text: the characters of RTF, a UTF-8 character of more than one byte, else a single byte outside of ASCII
+    ByteEscapes = re.compile(r"[\\{}\t\r\n]|[\xc2-\xdf][\x80-\xbf]|\xe0[\xa0-\xbf][\x80-\xbf]|[\xe1-\xec\xee\xef][\x80-\xbf]{2}|\xed[\x80-\x9f][\x80-\xbf]|"
+                             r"\xf0[\x90-\xbf][\x80-\xbf]{2}|[\xf1-\xf3][\x80-\xbf]{3}|\xf4[\x80-\x8f][\x80-\xbf]{2}|[\x80-\xff]")
+    WhitespaceNeutral = (0, 4, 5)   # The attributes of a style that do not show on whitespace: forecolor, bold & italic. See HtmlWriter.WhitespaceNeutral
+    
+    def __init__(self, color, backcolor, font):
+        '''
+            @param color: GenericColor, The selection's foreground color.         
+            @param backcolor: GenericColor, The selection's background color.        
+            @param font: GenericFont, The selection's font.
+        '''
+        self._colors = dict()       # Color: #Index in the color table. Index 0 is the default color of the reader
+        self._colorTable = list()   # Colors, in the order of the table
+        self._fonts = dict()        # Font name: #Index in the font table
+        self._fontTable = list()    # Font names, in the order of the table
+        self._merged = dict()       # tuple(style, ...): The style of the styles merged over the root format
+        self._controls = dict()     # tuple(style, last): The control words from the last style to the style. See `GetControls`
+        self._coalescer = RunCoalescer(self.GetStyle, self.Absorbs)
+        self._state = None          # The style in effect at the end of the last range
+        self._sealed = False        # If the tables have been written
+        self._document = False      # If the text is written as a document, by `FormattedHtmlHeader`
+        super(RtfWriter, self).__init__(color, backcolor, font)
+    
+    # Properties
+    
+    # @return: bool, Always False. RTF is written without classes.
+    @property
+    def CssClasses(self): return False
+    @CssClasses.setter
+    def CssClasses(self, value): pass
+    
+    # Methods
+    def Clear(self):
+        '''
+            @summary: Empties the text & the tables.
+        '''
+        super(RtfWriter, self).Clear()
+        self._colors.clear()
+        del self._colorTable[:]
+        self._fonts.clear()
+        del self._fontTable[:]
+        self._merged.clear()
+        self._controls.clear()
+        self._state = None
+        self._sealed = False
+        self._document = False
+    
+    def Prepare(self, classes):
+        '''
+            @param classes: list( tuple(name, GenericColor|None, GenericColor|None, GenericFont|None) ), The formats the text may be formatted with.
+            
+            @summary: Adds the colors & fonts of the formats to the tables before any span, so that they are complete once the tables are written.
+        '''
+        for unused_name, forecolor, backcolor, font in classes:
+            args = self.FormatArguments(forecolor, backcolor, font)
+            if args is not None:
+                self.MakeStyle(*args)
+    
+    def GetStylesheet(self, unused_classes):
+        return ""
+    
+    def FormatComment(self, text):
+        return "{\\*\\generator %s;}" % self.TranslateText(text)
+    
+    def FormattedHtmlHeader(self, title="Output | NX Syntax Highlighter", header=""):
+        '''
+            @summary: Returns the start of the document with the tables & the title. The text follows with no further header.
+        '''
+        self._document = True
+        return self.GetProlog() + "{\\info{\\title %s}}%s" % (self.TranslateText(title), header)
+    
+    def FormattedHtmlFooter(self, footer=""):
+        self._document = False
+        return footer + "}"
+    
+    def GetProlog(self):
+        '''
+            @return: str, The start of the document with the font & color tables. The tables are sealed once written.
+        '''
+        self._sealed = True
+        fonts = "".join([ "{\\f%d\\fmodern %s;}" % (i, self.TranslateText(name)) for i, name in enumerate(self._fontTable) ])
+        colors = "".join([ "\\red%d\\green%d\\blue%d;" % (int(c[0:2], 16), int(c[2:4], 16), int(c[4:6], 16)) for c in self._colorTable ])
+        return "{\\rtf1\\ansi\\deff0\\uc1{\\fonttbl%s}{\\colortbl;%s}" % (fonts, colors)
+    
+    def AddFormat(self, forecolor, backcolor, font, size, regular, bold, italic, underline):
+        '''
+            @summary: Adds the format to the spans & its color & font to the tables. The arguments are those of `HtmlWriter.AddFormat`.
+        '''
+        index = self._selection.Index        
+        length = self._selection.Length
+        
+        style = self.MakeStyle(forecolor, backcolor, font, size, regular, bold, italic, underline)
+        if index < 0:       # Root format
+            self._rootFormat = style
+        elif length > 0:    # Empty selections format nothing
+            self._spans.Add(index, index + length, style)
+    
+    def MakeStyle(self, forecolor, backcolor, font, size, regular, bold, italic, underline):
+        '''
+            @return: tuple, The style of the format, as kept in the spans. Its color & font are added to the tables. The arguments are those of `AddFormat`.
+        '''
+        for color in (forecolor, backcolor):
+            if color is not None and not self._colors.has_key(color):
+                self._colors[color] = self.NearestColor(color) if self._sealed else self.__Append(self._colorTable, color) + 1
+        if font is not None and not self._fonts.has_key(font):
+            self._fonts[font] = 0 if self._sealed else self.__Append(self._fontTable, font)
+        return (forecolor, backcolor, font, size if size > 0 else None,
+                True if bold else (False if regular else None), True if italic else (False if regular else None), True if underline else (False if regular else None))
+    
+    def NearestColor(self, color):
+        '''
+            @param color: str, The color, as hex RRGGBB.
+            @return: int, The index of the nearest color of the table.
+        '''
+        rgb = [ int(color[i:i + 2], 16) for i in (0, 2, 4) ]
+        distances = [ (sum([ (a - int(c[i:i + 2], 16)) ** 2 for a, i in zip(rgb, (0, 2, 4)) ]), n + 1) for n, c in enumerate(self._colorTable) ]
+        return min(distances)[1] if distances else 0
+    
+    def GetFormatStack(self):
+        '''
+            @summary: Returns the styles of the formats containing the selected index, the innermost last. The root format is not included.
+        '''
+        return self._spans.Covering(self._selection.Index)
+    
+    def MakeFormat(self, styles):
+        '''
+            @return: A dictionary having the format of the styles, merged over the root format. See GenericWriter.GetFormatOf.
+        '''
+        forecolor, backcolor, font, size, bold, italic, underline = self.GetStyle(styles)
+        fs = (FontStyle.Bold if bold else 0) | (FontStyle.Italic if italic else 0) | (FontStyle.Underline if underline else 0)
+        return { 'Foreground': GenericColor(forecolor), 'Background': GenericColor(backcolor), 'Font': GenericFont(font, size, fs or FontStyle.Regular) }
+    
+    def GetStyle(self, styles):
+        '''
+            @param styles: tuple(style, ...), The styles of a run of text, as given by SpanStore.Runs.
+            @return: tuple, The styles merged over the root format, the later ones taking precedence. Every attribute is set.
+        '''
+        merged = self._merged.get(styles)
+        if merged is None:
+            merged = list(self._rootFormat)
+            for style in styles:
+                for i, value in enumerate(style):
+                    if value is not None:
+                        merged[i] = value
+            merged = self._merged[styles] = tuple(merged)
+        return merged
+    
+    def Absorbs(self, style, previous):
+        '''
+            @param style: tuple, The style of a run of whitespace. See `GetStyle`.
+            @param previous: tuple, The style of the run before it.
+            @return: bool, True if they differ only in the attributes of `WhitespaceNeutral`, so the whitespace is written in the previous style. See RunCoalescer.
+        '''
+        return previous is not None and not [ i for i, (a, b) in enumerate(zip(style, previous)) if a != b and i not in self.WhitespaceNeutral ]
+    
+    def GetControls(self, style, last):
+        '''
+            @param style: tuple, The style to write, as given by `GetStyle`.
+            @param last: tuple, The style in effect. `None` writes every attribute.
+            @return: str, The control words changing `last` to `style`, ending with the space that delimits them. Empty if they are the same.
+        '''
+        key = (style, last)
+        controls = self._controls.get(key)
+        if controls is None:
+            controls = self._controls[key] = self.MakeControls(style, last)
+        return controls
+    
+    def MakeControls(self, style, last):
+        '''
+            @summary: Writes the control words of `GetControls`, which caches them. The arguments are those of `GetControls`.
+        '''
+        if style == last:
+            return ""
+        last = last or (None,) * 7
+        forecolor, backcolor, font, size, bold, italic, underline = style
+        words = list()
+        if forecolor != last[0]:
+            words.append("\\cf%d" % self._colors[forecolor])
+        if backcolor != last[1]:
+            words.append("\\cb%d" % self._colors[backcolor])
+        if font != last[2]:
+            words.append("\\f%d" % self._fonts[font])
+        if size != last[3]:
+            words.append("\\fs%d" % (size * 2))     # Half-points
+        if bold != last[4]:
+            words.append("\\b" if bold else "\\b0")
+        if italic != last[5]:
+            words.append("\\i" if italic else "\\i0")
+        if underline != last[6]:
+            words.append("\\ul" if underline else "\\ulnone")
+        return "".join(words) + " "
+    
+    def GetFormattedText(self):
+        '''
+            @summary: Formats the text & returns the formatted text
+        '''
+        return self.GetFormattedRange(-1, len(self.Text) + 1) + self.GetFormattedEnd()   # -1 & length+1 are the boundaries of the ranges. The tables are written at index: -1
+    
+    def GetFormattedRange(self, begin, end):
+        '''
+            @param begin: int, The first index to format. Index -1 holds the tables & the root format.
+            @param end: int, The index to stop at.
+            
+            @summary: Returns the formatted text for the indices [begin, end). 
+                      Concatenating consecutive ranges from -1 to len(text)+1 followed by `GetFormattedEnd()` gives `GetFormattedText()`.
+        '''
+        fmt = list()
+        if begin < 0 <= end:
+            if not self._document:
+                fmt.append(self.GetProlog())
+            self._state = self.GetStyle(())
+            self._coalescer.Reset(self._state)
+            fmt.append(self.GetControls(self._state, None))
+        state = self._state
+        for start, stop, style in self._coalescer.Runs(self._spans, self.Text, self.__CharacterEnd(max(begin, 0)), self.__CharacterEnd(min(end, len(self.Text)))):
+            fmt.append(self.GetControls(style, state))
+            state = style
+            fmt.append(self.TranslateText(self.Text[start:stop]))
+        self._state = state
+        return "".join(fmt)
+    
+    def GetFormattedEnd(self):
+        '''
+            @summary: Returns the end of the group of the text. A document is ended by its footer instead.
+        '''
+        self._state = None
+        return "" if self._document else "}"
+    
+    def ClearFormats(self, end):
+        '''
+            @param end: int, The index to clear the formats till. 
+            
+            @summary: Discards the formats ending before `end`, once they have been written out. Used when streaming, to keep the spans few.
+        '''
+        self._spans.RemoveBefore(end)
+    
+    def TranslateText(self, text):
+        '''
+            @param text: str|unicode, The text to translate. `str` is read as UTF-8, see the notes of the class.
+            
+            @summary: Escapes the characters of RTF, the line breaks & tabs & the characters outside of ASCII.
+        '''
+        return (self.Escapes if isinstance(text, unicode) else self.ByteEscapes).sub(self.__Escape, text)
+    
+    # Overridden Methods
+    
+    def GetSelectionColor(self):
+        return self.GetFormat()['Foreground']
+        
+    def GetSelectionBackColor(self):
+        return self.GetFormat()['Background']
+        
+    def GetSelectionFont(self):        
+        return self.GetFormat()['Font']
+    
+    # Helper Methods
+    @staticmethod
+    def __Append(table, value):
+        table.append(value)
+        return len(table) - 1
+    
+    def __CharacterEnd(self, pos):
+        '''
+            @return: int, The end of the UTF-8 character of a `str` text the position is within, else the position.
+        '''
+        text = self.Text
+        if isinstance(text, unicode) or pos >= len(text) or not "\x80" <= text[pos] <= "\xbf":
+            return pos
+        for p in range(pos - 1, max(pos - 4, -1), -1):
+            if text[p] >= "\xc0":
+                m = self.ByteEscapes.match(text, p)
+                return m.end() if m.end() > pos else pos
+            elif text[p] < "\x80":
+                break
+        return pos
+    
+    @staticmethod
+    def __Escape(match):
+        c = match.group()
+        if c in "\\{}":
+            return "\\" + c
+        elif c == "\n":
+            return "\\par\n"
+        elif c == "\t":
+            return "\\tab "
+        elif c == "\r":
+            return ""
+        if not isinstance(c, unicode):
+            c = c.decode("utf-8") if len(c) > 1 else unichr(ord(c))    # A byte outside of a UTF-8 character, as Latin-1
+        escaped = list()
+        for u in c:     # Two code units of a surrogate pair, on narrow builds
+            code = ord(u)
+            if code > 0xFFFF:   # A surrogate pair, on wide builds
+                code -= 0x10000
+                escaped.append("\\u%d?\\u%d?" % (0xD800 + (code >> 10) - 65536, 0xDC00 + (code & 0x3FF) - 65536))
+            else:
+                escaped.append("\\u%d?" % (code if code < 32768 else code - 65536))     # Signed 16-bit
+        return "".join(escaped)
+
+# @note: The writers, by the names given to the highlighters. See SyntaxHighlighter.SetWriter
+Writers = {"html": HtmlWriter, "rtf": RtfWriter}
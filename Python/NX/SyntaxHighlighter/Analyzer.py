@@ -0,0 +1,207 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module measures how the cost of matching the highlight rules grows on adversarial inputs, to find the rules that can backtrack badly.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import math
+import multiprocessing
+import random
+import re
+import sre_parse
+import time
+from sre_constants import LITERAL, SUBPATTERN, BRANCH, MAX_REPEAT, MIN_REPEAT, AT, ASSERT, ASSERT_NOT
+
+'''
+    Analyzer
+
+    Classes included:
+    + RuleAnalyzer    :    Fuzzes the highlight rules with adversarial inputs of growing size & reports how the cost of matching them scales.
+'''
+
+class RuleAnalyzer(object):
+    '''
+        @summary: Fuzzes every rule with adversarial inputs built from its own delimiters (See `Inputs`), doubling their size, & reports how the cost of matching grows.
+                  The cost is that of finding all the matches of the rule alone in the input, as the highlighter would attempt it at every position.
+        @note: A match cannot be interrupted, so the rules are measured in a process of their own that is stopped once a single measure takes longer than `StepLimit`.
+               Such a rule is reported as exponential.
+    '''
+    MinSize = 64            # Size of the first input
+    MaxSize = 65536         # Inputs are not grown past this size
+    TimeLimit = 0.05        # Inputs are not grown once matching one takes longer than this, in seconds
+    StepLimit = 2.0         # A measure taking longer than this, in seconds, is stopped
+    Floor = 0.005           # Measures shorter than this, in seconds, are too short to scale
+    Repeat = 3              # Measures shorter than `TimeLimit` are the best of this many
+    Linear = 1.5            # Largest exponent reported as linear
+    Polynomial = 3.5        # Largest exponent reported as polynomial
+
+    def __init__(self, flags=re.M):
+        '''
+            @param flags: int, The `re` flags the rules are compiled with.
+        '''
+        self.__flags = flags
+        self.__reports = dict()     # regex: report, see `AnalyzeRule`
+
+    # Methods
+    def AnalyzeRule(self, regex):
+        '''
+            @param regex: str, The regex of a rule.
+            @return: dict, The report of the worst input: {"input": name, "size": #Characters, "seconds": #Time at the size, "exponent": float, "scaling": linear|polynomial|exponential}.
+                     The exponent is that of the growth of the time with the size between the two largest inputs measured. It is `inf` if the measure was stopped.
+        '''
+        report = self.__reports.get(regex)
+        if report is None:
+            reports = [ self.__Scale(regex, name) for name in sorted(self.Inputs(regex).keys()) ]
+            report = self.__reports[regex] = max(reports, key=lambda r: (r["exponent"], r["seconds"]))
+        return report
+
+    def AnalyzeRules(self, rules):
+        '''
+            @param rules: HighlightRules, The rules to analyze.
+            @return: list( tuple(rule-key, report) ), The report of every rule with a regex, in order. See `AnalyzeRule`.
+        '''
+        return [ (key, self.AnalyzeRule(rules[key].InternalRegexString)) for key in rules.Keys if rules[key].InternalRegexString is not None ]
+
+    def Risky(self, rules):
+        '''
+            @param rules: HighlightRules, The rules to analyze.
+            @return: list(str), The keys of the rules that do not scale linearly. See SyntaxHighlighter.DowngradeRules.
+        '''
+        return [ key for key, report in self.AnalyzeRules(rules) if report["scaling"] != "linear" ]
+
+    @classmethod
+    def Inputs(cls, regex):
+        '''
+            @param regex: str, The regex of a rule.
+            @return: dict(name: function(int)), Builders of the adversarial inputs of a size, from the opening delimiter & the literals of the regex:
+                     `unterminated` an opening never closed, `openings` openings repeated without a close, `repeated` the opening repeated back to back,
+                     `escapes` a run of backslashes after an opening, `lines` an opening followed by short lines & `soup` a random mix of the literals.
+        '''
+        literals = cls.__Literals(sre_parse.parse(regex))
+        opening = ([ run for run in literals if run.strip("\\") ] or [""])[0]     # Runs of backslashes only are escapes before the opening
+        chars = sorted(set("".join(literals) + "x \n\\"))
+
+        def fill(unit, n):
+            return (unit * (n / max(len(unit), 1) + 1))[:n]
+
+        def soup(n):
+            rnd = random.Random(n)
+            return "".join([ rnd.choice(chars) for unused_i in range(n) ])
+        return {
+            "unterminated": lambda n: opening + fill("x", n - len(opening)),
+            "openings": lambda n: fill(opening + "x ", n),
+            "repeated": lambda n: fill(opening or "x", n),
+            "escapes": lambda n: opening + fill("\\", n - len(opening)),
+            "lines": lambda n: opening + fill("x\n", n - len(opening)),
+            "soup": soup,
+        }
+
+    # Helper Methods
+    def __Scale(self, regex, name):
+        '''
+            @return: dict, The report of the rule on an input. See `AnalyzeRule`.
+        '''
+        parent, child = multiprocessing.Pipe(False)
+        worker = multiprocessing.Process(target=self.Measure, args=(regex, self.__flags, name, child))
+        worker.daemon = True
+        worker.start()
+        measures = list()   # tuple(#Size, #Seconds)
+        stopped = None
+        while True:
+            if not parent.poll(self.StepLimit):
+                stopped = self.MinSize if not measures else measures[-1][0] * 2
+                break
+            measure = parent.recv()
+            if measure is None:
+                break
+            measures.append(measure)
+        worker.terminate()
+        worker.join()
+        parent.close()
+
+        if stopped is not None:
+            return {"input": name, "size": stopped, "seconds": self.StepLimit, "exponent": float("inf"), "scaling": "exponential"}
+        size, seconds = measures[-1]
+        exponent = 0.0
+        if len(measures) > 1 and seconds >= self.Floor:
+            (n1, t1), (n2, t2) = measures[-2:]
+            exponent = math.log(max(t2, 1e-9) / max(t1, 1e-9)) / math.log(float(n2) / n1)
+        scaling = "linear" if exponent <= self.Linear else "polynomial" if exponent <= self.Polynomial else "exponential"
+        return {"input": name, "size": size, "seconds": seconds, "exponent": exponent, "scaling": scaling}
+
+    @classmethod
+    def Measure(cls, regex, flags, name, connection):
+        '''
+            @param connection: Connection, Receives tuple(#Size, #Seconds) for every size measured & `None` once done.
+
+            @summary: Times finding all the matches of the regex in the input of every size, doubling the size until it takes longer than `TimeLimit`. Run in a process of its own.
+        '''
+        pattern = re.compile(regex, flags)
+        build = cls.Inputs(regex)[name]
+        size = cls.MinSize
+        while size <= cls.MaxSize:
+            text = build(size)
+            seconds = None
+            for unused_i in range(cls.Repeat):
+                start = time.time()
+                for unused_m in pattern.finditer(text):
+                    pass
+                elapsed = time.time() - start
+                seconds = elapsed if seconds is None else min(seconds, elapsed)
+                if elapsed > cls.TimeLimit:
+                    break
+            connection.send((size, seconds))
+            if seconds > cls.TimeLimit:
+                break
+            size *= 2
+        connection.send(None)
+        connection.close()
+
+    @classmethod
+    def __Literals(cls, items):
+        '''
+            @param items: list( tuple(op, av) ), The parsed regex.
+            @return: list(str), The runs of literal characters of the regex, in order. The opening delimiter is the first, besides the escapes before it.
+        '''
+        runs = list()
+        run = ""
+        for op, av in items:
+            if op == LITERAL:
+                run += chr(av) if av < 256 else ""
+                continue
+            if run:
+                runs.append(run)
+                run = ""
+            if op in (AT, ASSERT, ASSERT_NOT):
+                continue
+            if op == SUBPATTERN:
+                runs.extend(cls.__Literals(av[-1]))
+            elif op in (MAX_REPEAT, MIN_REPEAT):
+                runs.extend(cls.__Literals(av[2]))
+            elif op == BRANCH:
+                for items in av[1]:
+                    runs.extend(cls.__Literals(items))
+        if run:
+            runs.append(run)
+        return runs
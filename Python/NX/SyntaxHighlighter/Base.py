@@ -26,9 +26,22 @@ This file is part of NX - Syntax Highlighter.
 '''
 
 import re
+import os
+import stat
+import time
+import mmap
+import tempfile
+import string
+import threading
+import bisect
+import hashlib
+import sre_parse
+import sre_compile
+from sre_constants import LITERAL, NOT_LITERAL, ANY, IN, RANGE, NEGATE, CATEGORY, SUBPATTERN, BRANCH, MAX_REPEAT, MIN_REPEAT, ASSERT, ASSERT_NOT, GROUPREF, GROUPREF_EXISTS
+from sre_constants import CATEGORY_DIGIT, CATEGORY_NOT_DIGIT, CATEGORY_SPACE, CATEGORY_NOT_SPACE, CATEGORY_WORD, CATEGORY_NOT_WORD, CATEGORY_LINEBREAK, CATEGORY_NOT_LINEBREAK
 from collections import OrderedDict
 from NX.Enum import Color
-from NX.Main import HtmlWriter, FontStyle
+from NX.Main import NXWriter, HtmlWriter, FontStyle, WriterSink, Writers
 from NX.Main import GenericColor, GenericFont
 
 # @note: Modify any generic regular expressions here 
@@ -60,9 +73,40 @@ class HighlightRegex(object):
     @classmethod    
     def LanguageWords(cls, group, words):
         """
+            @param words: str, The words ORed. Eg: "for|while|return"
             @return: Regex for matching keywords, commands, etc. (Eg: for, while, return)
+            @note: Words made of word characters only are matched through a prefix tree (See `WordTree`), whose cost does not grow with the number of words.
         """ 
+        if re.match(r'\w+(?:\|\w+)*$', words):
+            words = cls.WordTree(words.split("|"))
         return r'(?P<' + group + r'>\b(?:' + words + r')\b)'
+    
+    @classmethod
+    def WordTree(cls, words):
+        """
+            @param words: list(str), The words.
+            @return: Regex matching the same words as the words ORed, as a prefix tree. Eg: do|done|for -> (?:do(?:ne)?|for)
+            
+            @note: The regex engine tries the alternatives of an alternation in turn, every word at every position it attempts.
+                   In the tree it only tries the characters that can follow the ones matched, so at most a character of every branch on the way.
+                   Followed by `\b`, it matches exactly what the alternation does, as a word must then end with the run of word characters.
+        """
+        tree = dict()
+        for word in words:
+            node = tree
+            for c in word:
+                node = node.setdefault(c, dict())
+            node[""] = None     # A word ends here
+        
+        def branch(node):
+            alternatives = [ c + branch(node[c]) for c in sorted(node.keys()) if c ]
+            if not alternatives:
+                return ""
+            regex = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+            if node.has_key(""):
+                regex = (regex if len(alternatives) > 1 or len(regex) == 1 else "(?:" + regex + ")") + "?"
+            return regex
+        return branch(tree)
         
     @classmethod    
     def QuotedChar(cls, group, delim):
@@ -87,7 +131,8 @@ class HighlightRegex(object):
                                                                      String"
         """
         delim = cls.Escape(delim) 
-        return r'(?<!\\)(?P<' + group + r'>' + delim + r'(?:[^\\' + cls.RemoveDuplicates(delim) + special + r']|\\[\w\W]|\r\n' + extra + r')*' +  delim + r')'
+        # The line breaks are matched by the character class. An alternative of their own would give an unclosed string 2^lines ways to fail.
+        return r'(?<!\\)(?P<' + group + r'>' + delim + r'(?:[^\\' + cls.RemoveDuplicates(delim) + special + r']|\\[\w\W]' + extra + r')*' +  delim + r')'
         
     @classmethod
     def SingleLineComment(cls, group, delim):
@@ -157,8 +202,12 @@ class HighlightRegex(object):
     + HighlightFont           :    Empty extension of GenericFont.
     + HighlightRule           :    Class to maintain a single highlight rule.
     + EditType                :    Enum to specify the parameter of the HighlightRule object to edit.
+    + PatternCache            :    Bounded LRU cache of compiled regexes shared by all the HighlightRules objects.
+    + RuleMatcher             :    Compiled form of an ORed set of rules. Resolves the rules of a match through a precomputed group table.
     + HighlightRules          :    Class to maintain the various HighlightRule objects & their recursive dependencies on each other.
-    + SyntaxHighlighter       :    Base class to highlight an input text. Currently uses HtmlWriter as the default/only writer.
+    + HighlightResult         :    The tokens of a text. Updated incrementally after an edit by SyntaxHighlighter.AnalyzeEdit.
+    + MatchBudgetError        :    Raised when matching a document takes longer than SyntaxHighlighter.MatchBudget.
+    + SyntaxHighlighter       :    Base class to highlight an input text. Uses HtmlWriter as the default writer, else RtfWriter. See `SetWriter`.
 '''
 
 class HighlightColor(GenericColor):
@@ -166,6 +215,8 @@ class HighlightColor(GenericColor):
         @summary: Highlighter's Color Class.
         @note: No further functionality is provided. This class is extended just to specify the semantics.
     """
+    __slots__ = ()
+    
     def __init__(self, color):
         super(HighlightColor, self).__init__(color)
 
@@ -174,6 +225,8 @@ class HighlightFont(GenericFont):
         @summary: Highlighter's Font Class.
         @note: No further functionality is provided. This class is extended just to specify the semantics.
     """
+    __slots__ = ()
+    
     def __init__(self, name, size, style):
         super(HighlightFont, self).__init__(name, size, style)        
         
@@ -184,6 +237,8 @@ class HighlightRule(object):
     """
         @summary: Provides provision for specifying a single highlight rule.
     """
+    __slots__ = ("__regex", "__color", "__backcolor", "__font", "__renameCount")
+    
     def __init__(self, regex=None, forecolor=None, backcolor=None, font=None):
         """
             @param regex: str, The regex string.
@@ -228,7 +283,6 @@ class HighlightRule(object):
             
             @summary: Returns the modified rule object. The object's regex is renamed base on the #id  
         """
-        self.__renameCount = value
         hr = HighlightRule(self.__regex, self.__color, self.__backcolor, self.__font)
         if   (attribType == EditType.Color): hr.__color = value
         elif (attribType == EditType.BackColor): hr.__backcolor = value
@@ -237,7 +291,7 @@ class HighlightRule(object):
         elif (attribType == EditType.Regex): 
             hr.__regex = value
             if renameIndex is not None:
-                self.RenameRegexGroup(renameIndex)
+                hr.RenameRegexGroup(renameIndex)
         return hr
     
     # @return: The new group name (appended by a unique #id)            
@@ -247,7 +301,7 @@ class HighlightRule(object):
              
             @summary: Substitution Handler: Appends a unique positional #id to the regex group. The value to `self.__renameCount` is incremented to signify the latest #id 
         """           
-        t = "%s_%02d" % (matchObject.group(0), self.__renameCount)            
+        t = "%s_%d" % (matchObject.group(0), self.__renameCount)            
         self.__renameCount = self.__renameCount + 1
         return t
         
@@ -258,25 +312,524 @@ class HighlightRule(object):
             @param value: int, The latest #id. This is specified externally and signifies the starting value to start naming the groups with.
             
             @summary: Generates an internal regex having unique group names. These are of the form:
-                          OriginalName_dd    :where dd is a 2-width unique integer
-                      Original group names can be recovered by slicing '_dd' through group[:-3] 
+                          OriginalName_d    :where d is a unique integer of any width
+                      Original group names can be recovered through HighlightRule.ActualGroupName(group)
         """            
         self.__renameCount = value        
         if self.__regex is not None:
             self.__regex = re.sub(r'\(\?P<([^>]+)', self.reSubHandler, self.__regex)
         return self.__renameCount     
     
+    # @return: int, The #id following the last one used by RenameRegexGroup
+    @property
+    def RenameCount(self): return self.__renameCount
+    
     # @return: The actual regex by removing all the #ids from the groups
     def GetActualRegex(self):                                            
         return re.sub(r'\(\?P<([^>]+)_\d+', r'(?P<\1', self.__regex) if self.__regex is not None else None         
+    
+    # @return: str, The group name as registered, i.e. without the #id appended by RenameRegexGroup
+    @staticmethod
+    def ActualGroupName(group):
+        return re.sub(r'_\d+$', '', group)
         
     def __str__(self):
         return "{%s}  : %s, %s, %s" % (self.RegexString, self.ForeColor, self.BackColor, self.Font)
 
+class PatternCache(object):
+    """
+        @summary: Bounded LRU cache of compiled regexes. Keyed by the regex string & the `re` flags.
+        @note: A single instance is shared by all the HighlightRules objects (See HighlightRules.CompiledPatterns), so identical rule sets compile only once.
+               Unlike the internal cache of the `re` module it is never flushed wholesale & does not compete with other users of `re`.
+               It is safe to share between threads. A regex is compiled outside of the lock, so two threads missing the same key may both compile it.
+    """
+    def __init__(self, size=128):
+        """
+            @param size: int, The maximum number of compiled regexes to hold.
+        """
+        self.__size = size
+        self.__patterns = OrderedDict()     # (regex, flags): compiled regex. Ordered from the least to the most recently used.
+        self.__lock = threading.Lock()      # Guards the patterns, the size & the counters
+        self.Hits = 0
+        self.Misses = 0
+    
+    # @return: int, Maximum number of compiled regexes
+    @property
+    def Size(self): return self.__size
+    @Size.setter
+    def Size(self, value):
+        with self.__lock:
+            self.__size = value
+            while len(self.__patterns) > self.__size:
+                self.__patterns.popitem(last=False)
+    
+    # @return: int, Number of compiled regexes currently held
+    @property
+    def Count(self): return len(self.__patterns)
+    
+    def Get(self, regex, flags):
+        """
+            @param regex: str, The regex string.
+            @param flags: int, The `re` flags.
+            @return: The compiled regex. Compiled only if it is not already present in the cache.
+        """
+        key = (regex, flags)
+        with self.__lock:
+            pattern = self.__patterns.pop(key, None)    # Re-inserted as the most recently used
+            if pattern is not None:
+                self.Hits += 1
+                self.__patterns[key] = pattern
+                return pattern
+        pattern = re.compile(regex, flags)
+        with self.__lock:
+            self.Misses += 1
+            if self.__patterns.pop(key, None) is None:  # Unless compiled meanwhile by another thread
+                while self.__patterns and len(self.__patterns) >= self.__size:
+                    self.__patterns.popitem(last=False)     # Evict the least recently used
+            self.__patterns[key] = pattern
+        return pattern
+    
+    def Clear(self):
+        """
+            @summary: Empties the cache & resets the counters.
+        """
+        with self.__lock:
+            self.__patterns.clear()
+            self.Hits = 0
+            self.Misses = 0
+    
+    def __str__(self):
+        return "%s: %d/%d (Hits: %d, Misses: %d)" % (self.__class__.__name__, self.Count, self.Size, self.Hits, self.Misses)
+
+class RuleMatcher(object):
+    """
+        @summary: The compiled form of an ORed set of rules, i.e. the root group or the dependencies of a group.
+        @note: A table mapping every group index to the named groups of the rule that owns it is built once. 
+               A match resolves its rules via `lastindex`, independent of the total number of groups.
+               Python's `re` supports at most 100 groups per regex, larger sets are split into several regexes which are scanned together. 
+    """
+    MaxGroups = 99      # Leave room for the implicit group 0
+    Window = 65536      # The characters a multi-line rule first reads at a time in `WindowedMatches`
+    
+    def __init__(self, rules, flags, isRule, cache):
+        """
+            @param rules: list(HighlightRule), The rules in the order of their precedence. Rules without a regex are skipped.
+            @param flags: int, The `re` flags to compile with.
+            @param isRule: function(str), Returns True if a group name is a registered rule. Only such groups are reported.
+            @param cache: PatternCache, The cache to compile the regexes through.
+        """
+        self.__patterns = list()    # The compiled regexes
+        self.__tables = list()      # For each regex: list( #Group-Index: tuple(#Rule-Index, tuple( (#Group-Index, Rule-Key), ... )) ) for the rule owning the group 
+        self.__rules = list()       # tuple(regex, compiled regex, tuple( (#Group-Index, Rule-Key), ... )) of every rule by #Rule-Index, the groups as in its own regex
+        self.__flags = flags
+        self.__reach = None         # Computed with the openers on first use. See `Reach` & `Openers`
+        self.__behind = None
+        self.__openers = None
+        self.__extents = None       # #Rule-Index: True|None|tuple(compiled regex, compiled regex), for every multi-line rule. See `ReadsBeyond`
+        regexes = list()
+        table = [()]                # Group 0 is never the `lastindex`
+        for rule in rules:
+            regex = rule.InternalRegexString
+            if regex is None:
+                continue
+            pattern = cache.Get(regex, flags)
+            if regexes and len(table) - 1 + pattern.groups > self.MaxGroups:    # Start another regex
+                self.__Append(regexes, table, flags, cache)
+                regexes = list()
+                table = [()]
+            offset = len(table) - 1
+            names = sorted(pattern.groupindex.items(), key=lambda item: item[1])  # Outer groups before the groups nested in them 
+            groups = tuple([ (offset + i, HighlightRule.ActualGroupName(name)) for name, i in names if isRule(HighlightRule.ActualGroupName(name)) ])
+            table.extend([(len(self.__rules), groups)] * pattern.groups)
+            regexes.append(regex)
+            self.__rules.append((regex, pattern, tuple([ (i - offset, key) for i, key in groups ])))
+        if regexes or not self.__patterns:
+            self.__Append(regexes, table, flags, cache)
+    
+    def __Append(self, regexes, table, flags, cache):
+        self.__patterns.append(cache.Get("|".join(regexes), flags))
+        self.__tables.append(table)
+    
+    # @return: list, The compiled regexes
+    @property
+    def Patterns(self): return self.__patterns
+    
+    # @return: int, The number of line breaks an attempt of any rule can read across, besides the repeats of the multi-line rules (See `Openers`).
+    #          A run of whitespace is counted as a single line break, however many lines it spans. Lookaheads count as read.
+    @property
+    def Reach(self): 
+        self.__Analyze()
+        return self.__reach
+    
+    # @return: int, The number of characters before its position an attempt of any rule can read, through lookbehinds & `\b`.
+    @property
+    def Behind(self):
+        self.__Analyze()
+        return self.__behind
+    
+    # @return: list( tuple(#Rule-Index, compiled regex|None) ), The openers of the multi-line rules, i.e. the rules having an unbounded repeat that can read across lines of text.
+    #          The opener is the part of the regex before such a repeat. An attempt of the rule reads past the repeat only at the positions its opener matches. `None` means at any position.
+    @property
+    def Openers(self):
+        self.__Analyze()
+        return self.__openers
+    
+    # Methods
+    def MatchRule(self, rule, text, pos):
+        """
+            @param rule: int, The #Rule-Index of the rule.
+            @param text: str, The text to match.
+            @param pos: int, The position to match at.
+            @return: tuple(MatchObject, tuple( (#Group-Index, Rule-Key), ... )), The match of the rule alone at the position, as in `Matches`. The MatchObject is `None` if it does not match.
+        """
+        unused_regex, pattern, groups = self.__rules[rule]
+        return pattern.match(text, pos), groups
+    
+    def ReadsBeyond(self, rule, text, start):
+        """
+            @param rule: int, The #Rule-Index of a multi-line rule. See `Openers`.
+            @param text: str, The text matched.
+            @param start: int, The start of a match of the rule.
+            @return: bool, True if matching the rule may have read arbitrarily far beyond the end of the match.
+            
+            @note: A lazy repeat over single characters (Eg: a multi-line comment) stops at the first end found. 
+                   A greedy repeat over items of bounded width reads only till its end if the rest of the regex matched there, i.e. the repeat did not backtrack.
+                   Any other repeat is assumed to read beyond.
+        """
+        self.__Analyze()
+        extent = self.__extents[rule]
+        if extent is True or extent is None:
+            return extent is None
+        repeat, rest = extent
+        m = repeat.match(text, start)
+        return m is None or rest.match(text, m.end()) is None
+    
+    # Generators
+    def Matches(self, text, pos=0, endpos=None):
+        """
+            @param text: str, The text to match.
+            @param pos: int, The position to start matching at. The text before it is still visible to lookbehinds & `^`.
+            @param endpos: int, The position the text is matched as ending at. `None` means its end.
+            
+            @summary: Get a tuple of the form: MatchObject, #Rule-Index, tuple( (#Group-Index, Rule-Key), ... ) for every match, in the same order as `re.finditer` over the ORed regex.
+                      The #Rule-Index is the precedence of the rule that matched, counting only the rules with a regex.
+                      Groups that did not participate in the match are included, check them with MatchObject.start(#Group-Index) >= 0
+        """
+        length = len(text) if endpos is None else endpos
+        if len(self.__patterns) == 1:
+            table = self.__tables[0]
+            for m in self.__patterns[0].finditer(text, pos, length):
+                if m.lastindex is not None:
+                    rule, groups = table[m.lastindex]
+                    yield m, rule, groups
+            return
+        
+        # Several regexes. At every position the earliest match wins & ties go to the earlier regex, as they would in a single alternation.
+        # A match found earlier stays valid as long as it does not start before the current position.
+        pending = [ p.search(text, pos, length) for p in self.__patterns ]
+        while pos <= length:
+            best = None
+            for i in range(len(pending)):
+                m = pending[i]
+                if m is not None and (best is None or m.start() < pending[best].start()):
+                    best = i
+            if best is None:
+                break
+            m = pending[best]
+            pos = m.end() if m.end() > m.start() else m.end() + 1   # Empty matches advance by one, as in `re.finditer`
+            for i in range(len(pending)):
+                if pending[i] is not None and pending[i].start() < pos:
+                    pending[i] = self.__patterns[i].search(text, pos, length) if pos <= length else None
+            if m.lastindex is not None:
+                rule, groups = self.__tables[best][m.lastindex]
+                yield m, rule, groups
+    
+    def WindowedMatches(self, text, pos=0, check=None):
+        """
+            @param text: str, The text to match.
+            @param pos: int, The position to start matching at.
+            @param check: function(#Rule-Index|None, int), Called with the position matched at, after every `Window` a multi-line rule reads, as the #Rule-Index of the rule,
+                          & before every attempt of a multi-line rule, as `None`. It may raise to stop the matching.
+            
+            @summary: The same matches as `Matches`, found such that `check` is called while a multi-line rule reads a long way ahead, Eg: an unclosed comment read till the end of the text.
+                      Only the attempts of the multi-line rules at the positions their openers match read arbitrarily far (See `Openers`). The text before the next such position is matched in a window
+                      ending where no other attempt before it can read. At the position the rules are attempted alone, in the order of their precedence, as the ORed regex does.
+                      A multi-line rule is matched in windows of `Window` characters, doubled each time, until it matches within one. Then it is matched again over the whole text, for the same match.
+            @note: A window read once is read again by the next, so a rule reads about twice as much as it would at once. The time between the calls to `check` grows with the windows.
+        """
+        length = len(text)
+        openers = [ (rule, opener) for rule, opener in self.Openers if opener is not None ]
+        if len(openers) < len(self.Openers):    # A rule reads arbitrarily far at any position
+            for found in self.Matches(text, pos):
+                yield found
+            return
+        multiLine = dict(openers)
+        upcoming = [ [-1, rule, opener] for rule, opener in openers ]   # The next position every opener matches at. `None` if it matches no more
+        while pos <= length:
+            opening = None
+            for item in upcoming:
+                if item[0] is not None and item[0] < pos:
+                    o = item[2].search(text, pos)
+                    item[0] = None if o is None else o.start()
+                if item[0] is not None and (opening is None or item[0] < opening):
+                    opening = item[0]
+            if opening is None:     # No attempt reads far in the rest
+                for found in self.Matches(text, pos):
+                    yield found
+                return
+            
+            for found in self.Matches(text, pos, self.__Fence(text, opening)):
+                m = found[0]
+                if m.start() >= opening:
+                    break
+                yield found
+                pos = m.end() if m.end() > m.start() else m.end() + 1
+            if pos > opening:       # A match read past the opening
+                continue
+            
+            # No match before the opening. Attempt the rules at it.
+            found = None
+            for rule, (unused_regex, pattern, groups) in enumerate(self.__rules):
+                if rule in multiLine and multiLine[rule].match(text, opening) is not None:
+                    if check is not None:
+                        check(None, opening)
+                    m = None
+                    size = self.Window
+                    while m is None:
+                        endpos = min(opening + size, length)
+                        m = pattern.match(text, opening, endpos)
+                        if m is not None and endpos < length:
+                            m = pattern.match(text, opening)
+                        if check is not None:
+                            check(rule, opening)
+                        if endpos == length:
+                            break
+                        size *= 2
+                else:
+                    m = pattern.match(text, opening)
+                if m is not None:
+                    found = (m, rule, groups)
+                    break
+            if found is None:
+                pos = opening + 1
+            else:
+                yield found
+                pos = m.end() if m.end() > m.start() else m.end() + 1
+    
+    # Helper Methods
+    def __Fence(self, text, pos):
+        """
+            @return: int, A position after `pos` that no attempt at or before `pos` can read, other than those of the multi-line rules. The inverse of SyntaxHighlighter.RestartPoint.
+        """
+        length = len(text)
+        for unused_i in range(self.Reach + 2):
+            while pos < length and text[pos].isspace():
+                pos += 1
+            pos = text.find("\n", pos) + 1
+            if pos == 0:
+                return length
+        return pos
+    
+    def __Analyze(self):
+        """
+            @summary: Computes `Reach`, `Behind` & `Openers` from the parsed regexes of the rules. 
+        """
+        if self.__reach is not None:
+            return
+        reach = 0
+        behind = 1      # `\b` reads the preceding character
+        openers = list()
+        extents = dict()
+        for rule, (regex, unused_pattern, unused_groups) in enumerate(self.__rules):
+            tree = sre_parse.parse(regex, self.__flags)
+            flags = tree.pattern.flags
+            lines, unbounded = self.__Measure(tree, flags)
+            reach = max(reach, lines)
+            behind = max(behind, self.__Behind(tree))
+            if unbounded:
+                items, repeat, rest = self.__Opener(tree, flags, False)
+                opener = sre_parse.SubPattern(tree.pattern, items)
+                openers.append((rule, sre_compile.compile(opener, flags) if opener.getwidth()[1] > 0 else None))
+                extents[rule] = None
+                if rest is not None and not self.__Measure(rest, flags)[1] and not self.__Has(rest, (GROUPREF, GROUPREF_EXISTS)):
+                    op, (unused_min, unused_max, body) = repeat
+                    if op == MIN_REPEAT and body.getwidth() == (1, 1):
+                        extents[rule] = True
+                    elif op == MAX_REPEAT and body.getwidth()[1] < sre_parse.MAXREPEAT:
+                        extents[rule] = (sre_compile.compile(sre_parse.SubPattern(tree.pattern, self.__Opener(tree, flags, True)[0]), flags), 
+                                         sre_compile.compile(sre_parse.SubPattern(tree.pattern, rest), flags))
+        self.__reach, self.__behind, self.__openers, self.__extents = reach, behind, openers, extents
+    
+    @classmethod
+    def __Measure(cls, items, flags):
+        """
+            @param items: list( tuple(op, av) ), The parsed regex.
+            @return: tuple(int, bool), The number of line breaks the bounded part of the regex can read (See `Reach`) & whether it has an unbounded repeat that can read across lines of text.
+        """
+        lines = 0
+        unbounded = False
+        for op, av in items:
+            if op in (LITERAL, NOT_LITERAL, ANY, IN, CATEGORY):
+                if cls.__Reads(op, av, "\n", flags):
+                    lines += 1
+            elif op in (MAX_REPEAT, MIN_REPEAT):
+                unused_min, maximum, body = av
+                n, u = cls.__Measure(body, flags)
+                unbounded = unbounded or u
+                if maximum < sre_parse.MAXREPEAT:
+                    lines += n * maximum
+                elif n:
+                    if cls.__ReadsText(body, flags):
+                        unbounded = True
+                    else:   # A run of whitespace
+                        lines += n
+            elif op == SUBPATTERN:
+                n, u = cls.__Measure(av[-1], flags)
+                lines += n
+                unbounded = unbounded or u
+            elif op in (BRANCH, GROUPREF_EXISTS):
+                branches = [ cls.__Measure(b, flags) for b in (av[1] if op == BRANCH else av[1:]) if b is not None ]
+                lines += max([ n for n, u in branches ])
+                unbounded = unbounded or True in [ u for n, u in branches ]
+            elif op in (ASSERT, ASSERT_NOT):
+                if av[0] >= 0:      # Lookahead
+                    n, u = cls.__Measure(av[1], flags)
+                    lines += n
+                    unbounded = unbounded or u
+            elif op == GROUPREF:    # The text of a group may be of any length
+                unbounded = True
+        return lines, unbounded
+    
+    @classmethod
+    def __Opener(cls, items, flags, inclusive):
+        """
+            @param items: list( tuple(op, av) ), The parsed regex of a multi-line rule.
+            @param inclusive: bool, Include the repeat in the opener.
+            @return: tuple(list( tuple(op, av) ), tuple(op, av), list( tuple(op, av) )|None), The parsed regex up to the first unbounded repeat that can read across lines, 
+                     that item & the parsed regex after it. Groups enclosing the repeat are kept up to it. The latter two are `None` if the repeat is nested in another repeat or an alternation. 
+        """
+        opener = list()
+        for i, (op, av) in enumerate(items):
+            if cls.__Measure([(op, av)], flags)[1]:
+                item, rest = None, None
+                if op == SUBPATTERN:
+                    inner, item, rest = cls.__Opener(av[-1], flags, inclusive)
+                    opener.append((op, av[:-1] + (sre_parse.SubPattern(av[-1].pattern, inner),)))
+                elif op in (MAX_REPEAT, MIN_REPEAT) and not cls.__Measure(av[2], flags)[1]:
+                    item, rest = (op, av), list()
+                    if inclusive:
+                        opener.append((op, av))
+                return opener, item, (rest + list(items[i + 1:]) if rest is not None else None)
+            opener.append((op, av))
+        return opener, None, None
+    
+    @classmethod
+    def __Has(cls, items, ops):
+        """
+            @return: bool, True if the parsed regex contains any of the items ops. 
+        """
+        for op, av in items:
+            if op in ops:
+                return True
+            for a in (av if isinstance(av, (tuple, list)) else ()):
+                if isinstance(a, sre_parse.SubPattern) and cls.__Has(a, ops):
+                    return True
+                if isinstance(a, list) and [ b for b in a if isinstance(b, sre_parse.SubPattern) and cls.__Has(b, ops) ]:
+                    return True
+        return False
+    
+    @classmethod
+    def __Behind(cls, items):
+        """
+            @param items: list( tuple(op, av) ), The parsed regex.
+            @return: int, The longest lookbehind in the regex.
+        """
+        behind = 0
+        for op, av in items:
+            if op in (ASSERT, ASSERT_NOT):
+                if av[0] < 0:
+                    behind = max(behind, av[1].getwidth()[1])
+                behind = max(behind, cls.__Behind(av[1]))
+            elif op in (MAX_REPEAT, MIN_REPEAT):
+                behind = max(behind, cls.__Behind(av[2]))
+            elif op == SUBPATTERN:
+                behind = max(behind, cls.__Behind(av[-1]))
+            elif op in (BRANCH, GROUPREF_EXISTS):
+                for b in (av[1] if op == BRANCH else av[1:]):
+                    if b is not None:
+                        behind = max(behind, cls.__Behind(b))
+        return behind
+    
+    @classmethod
+    def __ReadsText(cls, items, flags):
+        """
+            @return: bool, True if the parsed regex can consume a character other than whitespace.
+        """
+        for op, av in items:
+            if op in (LITERAL, NOT_LITERAL, ANY, IN, CATEGORY):
+                for i in range(256):
+                    if chr(i) not in string.whitespace and cls.__Reads(op, av, chr(i), flags):
+                        return True
+            elif op in (MAX_REPEAT, MIN_REPEAT):
+                if av[1] > 0 and cls.__ReadsText(av[2], flags):
+                    return True
+            elif op == SUBPATTERN:
+                if cls.__ReadsText(av[-1], flags):
+                    return True
+            elif op in (BRANCH, GROUPREF_EXISTS):
+                for b in (av[1] if op == BRANCH else av[1:]):
+                    if b is not None and cls.__ReadsText(b, flags):
+                        return True
+            elif op == GROUPREF:
+                return True
+        return False
+    
+    @classmethod
+    def __Reads(cls, op, av, c, flags):
+        """
+            @return: bool, True if the parsed character item (Eg: a literal, `.`, a set) matches the character c.
+        """
+        if op == LITERAL:
+            return av == ord(c)
+        elif op == NOT_LITERAL:
+            return av != ord(c)
+        elif op == ANY:
+            return c != "\n" or bool(flags & re.S)
+        elif op == RANGE:
+            return av[0] <= ord(c) <= av[1]
+        elif op == CATEGORY:
+            return cls.__InCategory(av, c)
+        elif op == IN:
+            negate = av and av[0][0] == NEGATE
+            return negate != (True in [ cls.__Reads(o, a, c, flags) for o, a in av if o != NEGATE ])
+        return True     # Unknown items are assumed to match
+    
+    @staticmethod
+    def __InCategory(category, c):
+        """
+            @return: bool, True if the character c is in the category (Eg: `\s`, `\W`). Unknown categories contain every character.
+        """
+        if category in (CATEGORY_DIGIT, CATEGORY_NOT_DIGIT):
+            member = c in string.digits
+        elif category in (CATEGORY_SPACE, CATEGORY_NOT_SPACE):
+            member = c in string.whitespace
+        elif category in (CATEGORY_WORD, CATEGORY_NOT_WORD):
+            member = c in string.ascii_letters or c in string.digits or c == "_"
+        elif category in (CATEGORY_LINEBREAK, CATEGORY_NOT_LINEBREAK):
+            member = c == "\n"
+        else:
+            return True
+        return member != (category in (CATEGORY_NOT_DIGIT, CATEGORY_NOT_SPACE, CATEGORY_NOT_WORD, CATEGORY_NOT_LINEBREAK))
+
 class HighlightRules(object):
     """
         @summary: Provides provision for specifying a list of rules & their recursive dependencies on other rules.
+        @note: The compiled regexes for the root & for every dependency group are kept with the rules. These are discarded whenever the rules change.
+               Changes made directly to the lists returned by `RecursiveDependencies` are not tracked, call `Invalidate()` after such changes.
     """
+    # The LRU cache shared by all the instances.
+    CompiledPatterns = PatternCache()
+    
     def __init__(self, rules=None, dependencies=None):
         """
             @param rules: dict(str: HighlightRule), A dictionary of `str: HighlightRule` pairs.
@@ -291,12 +844,14 @@ class HighlightRules(object):
             self.__highlightDependencies = dict()
         else:
             self.__highlightDependencies = dependencies            
+        self.__compiled = dict()    # (group, flags, excluded keys): RuleMatcher. Group `None` is the root group.
     
     def __getitem__(self, key):         # [] get
         return self.__highlightRules[key]
     
     def __setitem__(self, key, value):  # [] set
         self.__highlightRules[key] = value
+        self.Invalidate()
         
     # @return: int, Number of rules 
     @property       
@@ -331,6 +886,7 @@ class HighlightRules(object):
         self.__highlightRules[key] = rule
         if dependencies is not None:
             self.__highlightDependencies[key] = dependencies
+        self.Invalidate()
     
     def SetRule(self, key, rule, dependencies):
         """            
@@ -353,6 +909,7 @@ class HighlightRules(object):
             if key in self.__highlightDependencies[k]:
                 self.__highlightDependencies[k].remove(key)                                
         if self.__highlightDependencies.has_key(key): del self.__highlightDependencies[key] # Remove from dict() of dependencies if present
+        self.Invalidate()
     
     def EditRules(self, keys_list, updates_list):     # keys = list(), updates = dict() [ EditType : object ]
         """
@@ -376,10 +933,87 @@ class HighlightRules(object):
                     else:   # Assign new rule & increment the #id counter
                         self.__highlightRules[key] = self.__highlightRules[key].GetModifiedRule(utype, newValue, self.__itemCount)
                         if utype == EditType.Regex:                            
-                            self.__itemCount = self.__highlightRules[key].__renameCount
+                            self.__itemCount = self.__highlightRules[key].RenameCount
                 pass
             index += 1
-        pass
+        self.Invalidate()
+    
+    def Invalidate(self):
+        """
+            @summary: Discards the compiled regexes. They are rebuilt on the next call to `GetMatcher()`.
+        """
+        self.__compiled.clear()
+    
+    def GetSnapshot(self):
+        """
+            @return: tuple, The rules with their internal regexes, colors & fonts, the dependencies & the #id counter, as plain data that can be marshalled. See `FromSnapshot`.
+        """
+        rules = tuple([ (key, rule.InternalRegexString, 
+                         None if rule.ForeColor is None else rule.ForeColor.Color, 
+                         None if rule.BackColor is None else rule.BackColor.Color, 
+                         None if rule.Font is None else (rule.Font.FontName, rule.Font.FontSize, rule.Font.Style)) for key, rule in self.__highlightRules.items() ])
+        dependencies = tuple([ (key, tuple(keys)) for key, keys in sorted(self.__highlightDependencies.items()) ])
+        return (rules, dependencies, self.__itemCount)
+    
+    @classmethod
+    def FromSnapshot(cls, snapshot):
+        """
+            @param snapshot: tuple, The rules as returned by `GetSnapshot`.
+            @return: HighlightRules, The rules. Their regexes are already renamed, so nothing is recomputed.
+        """
+        rules, dependencies, itemCount = snapshot
+        highlightRules = cls(OrderedDict([ (key, HighlightRule(regex, 
+                                                               None if color is None else HighlightColor(color), 
+                                                               None if backcolor is None else HighlightColor(backcolor), 
+                                                               None if font is None else HighlightFont(*font))) for key, regex, color, backcolor, font in rules ]),
+                             dict([ (key, list(keys)) for key, keys in dependencies ]))
+        highlightRules.__itemCount = itemCount
+        return highlightRules
+    
+    def GetFingerprint(self):
+        """
+            @return: str, A hash of the regexes, colors & fonts of the rules, in order, & of their dependencies. Equal for rules that highlight alike.
+            
+            @summary: Computed on every call, as the colors & fonts of a rule can be changed in place.
+        """
+        digest = hashlib.sha1()
+        for key, rule in self.__highlightRules.items():
+            digest.update(repr((key, rule.InternalRegexString, str(rule.ForeColor), str(rule.BackColor), str(rule.Font))))
+        digest.update(repr(sorted(self.__highlightDependencies.items())))
+        return digest.hexdigest()
+    
+    def GetRegexString(self, groups=None):
+        """
+            @param groups: list(str), The groups to get the regex's for. `None` means get the regex string for all groups
+            @return: str, The final regex matcher string.
+            
+            @summary: The function ORs all the regexes for the groups specified in the arg & returns them.
+        """
+        if groups is None:
+            rules = self.__highlightRules.values()
+        else:
+            rules = [self.__highlightRules[s] for s in groups]
+        return "|".join([h.InternalRegexString for h in rules if h.InternalRegexString is not None])
+    
+    def GetMatcher(self, group=None, flags=re.M, exclude=()):
+        """
+            @param group: str, The group whose dependencies are to be matched. `None` means the root group, i.e. all the rules.
+            @param flags: int, The `re` flags to compile with.
+            @param exclude: list(str), The keys of the rules to leave out of the matcher.
+            @return: RuleMatcher, The compiled regexes & group table for the group.
+            
+            @summary: Returns the compiled matcher for the group. It is built once & reused until the rules change.
+        """
+        key = (group, flags, tuple(exclude))
+        matcher = self.__compiled.get(key)
+        if matcher is None:
+            if group is None:
+                rules = [self.__highlightRules[s] for s in self.__highlightRules.keys() if s not in exclude]
+            else:
+                rules = [self.__highlightRules[s] for s in self.__highlightDependencies[group] if s not in exclude]
+            matcher = RuleMatcher(rules, flags, self.__highlightRules.has_key, self.CompiledPatterns)
+            self.__compiled[key] = matcher
+        return matcher
     
     # Generators
     def item_rules(self):
@@ -410,11 +1044,139 @@ class HighlightRules(object):
             ret.append("%-5s -> : [ %s ] [%s]" % (k,self.__highlightRules[k],self.__highlightDependencies[k] if self.__highlightDependencies.has_key(k) else None))  
         return "\n".join(ret)
 
+class HighlightResult(object):
+    """
+        @summary: The tokens of a text, as returned by SyntaxHighlighter.Analyze & SyntaxHighlighter.AnalyzeEdit.
+        @note: The matches of the root rules are kept in segments. A segment is a range of a list of matches, with an offset to add to their positions.
+               An edit re-lexes a region only. The matches before & after it are shared with the previous result, the later ones shifted by the offset of their segments.
+               A result is never modified, so the previous result stays valid after an edit.
+    """
+    MaxSegments = 32    # More segments are merged into one, which costs a copy of all the matches
+    
+    def __init__(self, text, segments, openings, changedRange=None):
+        """
+            @param text: str, The text analyzed.
+            @param segments: list( tuple(list(Match), list(int), offset, begin, end) ), The matches, the end of every match, the offset to add to both & the range of the lists in use.
+                             A Match is tuple(start, end, #Rule-Index, tuple(span, ...)), where a span is tuple(start, end, rule-key, depth) relative to the start of the match.
+            @param openings: list(int), Sorted positions at which an attempt of a multi-line rule may have read beyond the match found there, possibly till the end of the text. 
+                             I.e. its opener matched but the rule did not, or the rule matched but may have read further (Eg: a greedy repeat that backtracked). See RuleMatcher.Openers.
+            @param changedRange: tuple(start, end), The range of the text whose spans differ from the previous result. `None` means all of the text.
+        """
+        segments = [ s for s in segments if s[3] < s[4] ]
+        if len(segments) > self.MaxSegments:
+            matches = [ (start + offset, end + offset, rule, spans) for ms, unused_ends, offset, begin, end in segments for start, end, rule, spans in ms[begin:end] ]
+            segments = [ (matches, [ m[1] for m in matches ], 0, 0, len(matches)) ]
+        self.__text = text
+        self.__segments = segments
+        self.__openings = openings
+        self.__changedRange = changedRange if changedRange is not None else (0, len(text))
+    
+    # Properties
+    # @return: str, The text analyzed
+    @property
+    def Text(self): return self.__text
+    
+    # @return: list(int), Sorted positions of the multi-line rules' attempts that may have read beyond the match found there.
+    @property
+    def Openings(self): return self.__openings
+    
+    # @return: tuple(start, end), The range of the text whose spans differ from the previous result. Repainting it is sufficient.
+    @property
+    def ChangedRange(self): return self.__changedRange
+    
+    # @return: int, The number of matches of the root rules
+    @property
+    def MatchCount(self): return sum([ end - begin for unused_ms, unused_ends, unused_offset, begin, end in self.__segments ])
+    
+    # @return: list, The segments. See `__init__`.
+    @property
+    def Segments(self): return self.__segments
+    
+    # Methods
+    def Locate(self, position):
+        """
+            @param position: int, A position in the text.
+            @return: tuple(#Segment, #Match), The first match ending after the position. (len(Segments), 0) if there is none.
+        """
+        for i, (unused_ms, ends, offset, begin, end) in enumerate(self.__segments):
+            if ends[end - 1] + offset > position:
+                return i, bisect.bisect_right(ends, position - offset, begin, end)
+        return len(self.__segments), 0
+    
+    def MatchFrom(self, position):
+        """
+            @param position: int, A position in the text.
+            @return: tuple(start, end, #Rule-Index, tuple(span, ...)), The first match starting at or after the position. `None` if there is none.
+        """
+        i, j = self.Locate(position - 1)    # Includes an empty match at the position
+        if i == len(self.__segments):
+            return None
+        for match in self.ItemMatches([self.__segments[i][:3] + (j, self.__segments[i][4])] + self.__segments[i + 1:]):
+            if match[0] >= position:
+                return match
+        return None
+    
+    def Split(self, position):
+        """
+            @param position: int, A position in the text.
+            @return: tuple(list, list), The segments of the matches ending at or before the position & of the rest of the matches.
+        """
+        i, j = self.Locate(position)
+        if i == len(self.__segments):
+            return list(self.__segments), list()
+        ms, ends, offset, begin, end = self.__segments[i]
+        head = self.__segments[:i] + ([(ms, ends, offset, begin, j)] if begin < j else [])
+        return head, [(ms, ends, offset, j, end)] + self.__segments[i + 1:]
+    
+    # Generators
+    @staticmethod
+    def ItemMatches(segments):
+        """
+            @param segments: list, Segments of a result.
+            @return: generator, tuple(start, end, #Rule-Index, tuple(span, ...)) for every match of the segments, with the start & end in the text.
+        """
+        for ms, unused_ends, offset, begin, end in segments:
+            for i in xrange(begin, end):
+                start, stop, rule, spans = ms[i]
+                yield start + offset, stop + offset, rule, spans
+    
+    def Spans(self, start=0, end=None):
+        """
+            @param start: int, Start of the range of the text.
+            @param end: int, End of the range of the text. `None` means the end of the text.
+            @return: generator, tuple(start, end, rule-key, depth) for every span of the matches overlapping the range, in the order of SyntaxHighlighter.Tokenize.
+        """
+        if end is None:
+            end = len(self.__text)
+        i, j = self.Locate(start)
+        if i == len(self.__segments):
+            return
+        segments = [self.__segments[i][:3] + (j, self.__segments[i][4])] + self.__segments[i + 1:]
+        for s, unused_stop, unused_rule, spans in self.ItemMatches(segments):
+            if s >= end and s > start:  # An empty match at `start` is still in range 
+                break
+            for span in spans:
+                yield span[0] + s, span[1] + s, span[2], span[3]
+
+class MatchBudgetError(RuntimeError):
+    """
+        @summary: Raised when matching a document takes longer than SyntaxHighlighter.MatchBudget & the highlighter is not set to downgrade.
+    """
+    def __init__(self, position, seconds, rule=None):
+        """
+            @param position: int, The position in the document the matching had reached.
+            @param seconds: float, The time spent matching.
+            @param rule: str, The key of the multi-line rule reading when the budget ran out. `None` if none was.
+        """
+        super(MatchBudgetError, self).__init__("Matching exceeded its budget at position %d after %.3f seconds%s." % (position, seconds, "" if rule is None else " in rule '%s'" % rule))
+        self.Position = position
+        self.Seconds = seconds
+        self.Rule = rule
+
 class SyntaxHighlighter(object):
     """
         @note: Extend this class for all the generic highlighters.        
-        @requires: A Writer object (Currently using HtmlWriter)
-        @attention: Currently only HtmlWriter is supported.
+        @requires: A Writer object (HtmlWriter by default, See `SetWriter`)
         
         @summary: Provides the functionality for Syntax Highlighting.
     """
@@ -452,13 +1214,46 @@ class SyntaxHighlighter(object):
     @property       # Boolean
     def MatchCaseSensitive(self): return self.__matchCaseSensitive
     @MatchCaseSensitive.setter
-    def MatchCaseSensitive(self, value): self.__matchCaseSensitive = value
+    def MatchCaseSensitive(self, value): 
+        self.__matchCaseSensitive = value
+        # Set regex flags. The compiled regexes are looked up by these flags, so a change selects (or builds) the matching set.
+        self._reFlags = re.M if value else re.M | re.I
     
     @property
     def RuleNames(self): return self._highlightRules.Keys
     @property
     def Rules(self): return self._highlightRules
     
+    @property       # Boolean
+    def CssClasses(self): return self._outputWriter.CssClasses
+    @CssClasses.setter
+    def CssClasses(self, value): 
+        self._outputWriter.CssClasses = value     # Write every rule as a CSS class of its key. See `Stylesheet`
+        self._ruleStyles = dict()
+    
+    @property       # str
+    def Stylesheet(self): return self.GetStylesheet()
+    
+    @property       # float
+    def MatchBudget(self): return self.__matchBudget
+    @MatchBudget.setter
+    def MatchBudget(self, value): self.__matchBudget = value      # The seconds the rules may spend matching a document. `None` means unlimited. See `BudgetedMatches`
+    
+    @property       # Boolean
+    def DowngradeOverBudget(self): return self.__downgradeOverBudget
+    @DowngradeOverBudget.setter
+    def DowngradeOverBudget(self, value): self.__downgradeOverBudget = value  # Match the rest of the document without the rule over budget, instead of raising MatchBudgetError
+    
+    @property       # list(str)
+    def DowngradeRules(self): return self.__downgradeRules
+    @DowngradeRules.setter
+    def DowngradeRules(self, value): self.__downgradeRules = value    # The keys of the rules that may be left out, one at a time, when over budget. `None` means the multi-line rules. See Analyzer.RuleAnalyzer.Risky
+    
+    @property       # Cache.RenderCache
+    def RenderCache(self): return self.__renderCache
+    @RenderCache.setter
+    def RenderCache(self, value): self.__renderCache = value  # Returns the output of a text highlighted before from the cache. `None` means no cache. See `GetFingerprint`
+    
     #Init
     def __init__(self, highlightRules, defaultForecolor, defaultBackcolor, defaultFont, keywords, commands, defaultWriter=None):
         """
@@ -468,14 +1263,19 @@ class SyntaxHighlighter(object):
             @param defaultFont: HighlightFont, The default font color to use.
             @param keywords: list(str), The default keyword list to use. If omitted can be added by overriding SetLanguageWords() method.
             @param commands: list(str), The default command list to use. If omitted can be added by overriding SetLanguageWords() method.
-            @param defaultWriter: Writer, The default writer to use for formatting.
-            @attention: Currently only HtmlWriter is supported.
+            @param defaultWriter: Writer, The default writer to use for formatting. Default: HtmlWriter. See `SetWriter`.
             
             @summary: Initialize the SyntaxHighlighter
         """        
         
         # Attributes
         self.MatchCaseSensitive = True  # Set regex matching as case-sensitive.
+        self.MatchBudget = None         # No limit on the time spent matching.
+        self.DowngradeOverBudget = True
+        self.DowngradeRules = None
+        self.RenderCache = None
+        self._overBudget = False        # If the last text matched went over budget. See `BudgetedMatches`
+        self._ruleStyles = dict()       # Key: The #id of the style of the rule in the writer. See `InternRule`
                         
         self.DefaultTextColor = HighlightColor(Color.Black) if defaultForecolor is None else defaultForecolor
         self.DefaultBackColor = HighlightColor(Color.White) if defaultBackcolor is None else defaultBackcolor
@@ -512,10 +1312,27 @@ class SyntaxHighlighter(object):
             @summary: Attaches the highlight rules to the highlighter.
         """
         self._highlightRules = highlightRules
+        self._ruleStyles = dict()
     
     def GetRules(self):     # Gets the highligting rules
         return self._highlightRules
     
+    def SetWriter(self, writer):
+        """
+            @param writer: str|class, The name of the writer (See NX.Main.Writers) or its class. Eg: "rtf"
+            @raise KeyError: If no writer has the name.
+            
+            @summary: Formats the output with a new writer of the class. `CssClasses` is kept, where the writer supports it.
+        """
+        if isinstance(writer, basestring):
+            if not Writers.has_key(writer.lower()):
+                raise KeyError("The writer '%s' is not supported. Choose one of: %s." % (writer, ", ".join(sorted(Writers.keys()))))
+            writer = Writers[writer.lower()]
+        cssClasses = self.CssClasses
+        self._outputWriter = writer(self.DefaultTextColor, self.DefaultBackColor, self.DefaultFont)
+        self._outputWriter.CssClasses = cssClasses
+        self._ruleStyles = dict()
+    
     def Highlight(self, inputText, formatDocument=None):
         '''
             @param inputText: str, The text to highlight
@@ -523,16 +1340,273 @@ class SyntaxHighlighter(object):
             
             @attention: This function is generally used to interact with the user.            
             @summary: The function highlights the input text by the `_highlightRules` & prints the output defined by `_outputWriter`. 
+                      With a `RenderCache` the output of a text highlighted before is returned from the cache.
         '''
+        cache = self.RenderCache
+        if cache is not None:
+            key = cache.Key(self.GetFingerprint(), inputText, formatDocument)
+            output = cache.Get(key)
+            if output is not None:
+                return output.decode("utf-8") if isinstance(inputText, unicode) else output
+        
         # Empty the writer & assign text
         self._outputWriter.Clear()      
         self._outputWriter.Text = inputText
+        self.PrepareWriter()
+        self._overBudget = False
         # Highlight using the rules
         self.RecursiveHighlight(inputText, None, 0)     # (Text to highlight, Initial group, Starting index).
         if formatDocument is None:
-            return self._outputWriter.FormattedText         # Return formatted text.
+            output = self._outputWriter.FormattedText         # Return formatted text.
         else:
-            return self._outputWriter.FormattedHtml(formatDocument + " | NX - Syntax Highlighter","<!--%s-->" % self.VersionInfo)   # Return formatted document
+            output = self._outputWriter.FormattedHtml(formatDocument + " | NX - Syntax Highlighter", self.GetDocumentHeader())   # Return formatted document
+        
+        if cache is not None and not self._overBudget:      # A downgraded output is not cached
+            cache.Put(key, output.encode("utf-8") if isinstance(output, unicode) else output)
+        return output
+    
+    def HighlightStream(self, inputFile, formatDocument=None, chunkSize=65536):
+        '''
+            @param inputFile: file, The file to highlight. Read from its current position till the end.
+            @param formatDocument: str, The title of the document. Same as for `Highlight`.
+            @param chunkSize: int, The number of input characters to format at a time.
+            @return: generator, The formatted text in chunks. Joined together they are identical to the output of `Highlight`.
+            
+            @summary: Highlights arbitrarily large files with bounded memory. 
+                      The rules are matched against a memory map of the file, so a match can extend across any number of chunks (Eg: an open multi-line comment). 
+                      Input that cannot be mapped (Eg: <stdin>) is first spooled to a temporary file in chunks.
+                      The formats are written out & discarded from the writer as soon as no later match can affect them.
+        '''
+        spool = None
+        if not self.IsMappable(inputFile):
+            spool = tempfile.TemporaryFile()
+            for chunk in iter(lambda: inputFile.read(chunkSize), ""):
+                spool.write(chunk)
+            spool.flush()
+            inputFile = spool
+        
+        size = os.fstat(inputFile.fileno()).st_size
+        text = mmap.mmap(inputFile.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else ""  # Empty files cannot be mapped
+        try:
+            for chunk in self.HighlightChunks(text, formatDocument, chunkSize):
+                yield chunk
+        finally:
+            if isinstance(text, mmap.mmap):
+                text.close()
+            if spool is not None:
+                spool.close()
+    
+    def HighlightChunks(self, inputText, formatDocument=None, chunkSize=65536):
+        '''
+            @param inputText: str|mmap, The text to highlight.
+            @param formatDocument: str, The title of the document. Same as for `Highlight`.
+            @param chunkSize: int, The number of input characters to format at a time.
+            @return: generator, The formatted text in chunks. Joined together they are identical to the output of `Highlight`.
+            
+            @summary: Formats the text as it is tokenized, so the first chunk comes before the text is highlighted as a whole. 
+                      With a `RenderCache` the output of a text highlighted before is read from the cache in chunks.
+        '''
+        try:
+            cache = self.RenderCache
+            if cache is None:
+                chunks = self.FormatStream(inputText, formatDocument, chunkSize)
+            else:   # The entries are shared with `Highlight`, as the output is the same
+                key = cache.Key(self.GetFingerprint(), inputText, formatDocument)
+                cached = cache.Open(key)
+                if cached is not None:
+                    with cached:
+                        for chunk in iter(lambda: cached.read(chunkSize), ""):
+                            yield chunk.decode("utf-8") if isinstance(inputText, unicode) else chunk
+                    return
+                encode = isinstance(inputText, unicode)
+                chunks = self.FormatStream(inputText, formatDocument, chunkSize)
+                if encode:
+                    chunks = ( chunk.encode("utf-8") for chunk in chunks )
+                chunks = cache.Store(key, chunks, lambda: not self._overBudget)
+                if encode:
+                    chunks = ( chunk.decode("utf-8") for chunk in chunks )
+            for chunk in chunks:
+                yield chunk
+        finally:
+            self._outputWriter.Clear()
+    
+    def HighlightTo(self, source, sink, formatDocument=None, chunkSize=65536):
+        '''
+            @param source: str|file, The text or the file to highlight. A file is highlighted as by `HighlightStream`.
+            @param sink: WriterSink|file|socket|generator|function, The destination of the formatted text. See NX.Main.WriterSink.
+            @param formatDocument: str, The title of the document. Same as for `Highlight`.
+            @param chunkSize: int, The number of input characters to format at a time.
+            @return: int, The number of characters written.
+            
+            @summary: Writes the formatted text into the sink as it is highlighted. Neither the time to the first chunk nor the memory held grow with the size of the text.
+        '''
+        chunks = self.HighlightStream(source, formatDocument, chunkSize) if hasattr(source, "read") else self.HighlightChunks(source, formatDocument, chunkSize)
+        sink = WriterSink.Wrap(sink, chunkSize)
+        written = sink.Written
+        for chunk in chunks:
+            sink.Write(chunk)
+        sink.Flush()
+        return sink.Written - written
+    
+    def FormatStream(self, text, formatDocument, chunkSize):
+        '''
+            @param text: str|mmap, The text to highlight.
+            @param formatDocument: str, The title of the document. Same as for `Highlight`.
+            @param chunkSize: int, The number of input characters to format at a time.
+            @return: generator, The formatted text in chunks. See `HighlightStream`.
+        '''
+        # Empty the writer & assign text
+        writer = self._outputWriter
+        writer.Clear()
+        writer.Text = text
+        self.PrepareWriter()
+        self._overBudget = False
+        if formatDocument is not None:
+            yield writer.FormattedHtmlHeader(formatDocument + " | NX - Syntax Highlighter", self.GetDocumentHeader())
+        
+        # Spans come in document order. Formats before the start of a span are final, as no later span can begin or end before it. 
+        written = -1    # The initial format is at index -1
+        for start, end, key, unused_depth in self.TokenizeGroup(text, None, 0, 0):
+            while start - written >= chunkSize:
+                yield writer.GetFormattedRange(written, written + chunkSize)
+                written += chunkSize
+                writer.ClearFormats(written)
+            self.HighlightSpan(start, end, key)
+        
+        while written <= len(text):     # The final closing tags (if any) are at index len(text)
+            yield writer.GetFormattedRange(written, min(written + chunkSize, len(text) + 1))
+            written += chunkSize
+            writer.ClearFormats(written)
+        yield writer.GetFormattedEnd()
+        if formatDocument is not None:
+            yield writer.FormattedHtmlFooter()
+    
+    @staticmethod
+    def IsMappable(inputFile):
+        '''
+            @param inputFile: file, The file to check.
+            @return: bool, True if the file is a regular file that can be memory mapped from its current position. 
+        '''
+        try:
+            if not stat.S_ISREG(os.fstat(inputFile.fileno()).st_mode) or inputFile.tell() != 0:
+                return False
+        except (AttributeError, IOError, OSError, ValueError):  # Not a real file (Eg: StringIO) or closed
+            return False
+        return os.linesep == "\n" or "b" in getattr(inputFile, "mode", "")    # Text mode on other platforms translates the line endings
+    
+    def Tokenize(self, inputText):
+        '''
+            @param inputText: str, The text to tokenize.
+            @return: generator, tuple(start, end, rule-key, depth) for every highlighted span.
+            
+            @summary: Lazily yields the spans the highlighter would format, without using the writer. 
+                      Spans come in document order, i.e. by their start with enclosing spans before the spans they contain. 
+                      Spans found through the dependencies of a rule follow their parent with a greater depth. The root rules have depth 0.
+        '''
+        return self.TokenizeGroup(inputText, None, 0, 0)
+    
+    def Analyze(self, inputText):
+        '''
+            @param inputText: str, The text to analyze.
+            @return: HighlightResult, The tokens of the text. Pass it to `AnalyzeEdit` after the text is edited.
+            
+            @summary: Tokenizes the whole text, keeping what is required to update the tokens incrementally. The spans are the same as those of `Tokenize`.
+        '''
+        matcher = self._highlightRules.GetMatcher(None, self._reFlags)
+        matches = [ (m.start(), m.end(), rule, self.MatchSpans(m, groups, -m.start(), 0)) for m, rule, groups in matcher.Matches(inputText) ]
+        return HighlightResult(inputText, [(matches, [ m[1] for m in matches ], 0, 0, len(matches))], self.FindOpenings(matcher, inputText, matches, 0, len(inputText)))
+    
+    def AnalyzeEdit(self, result, offset, removedLength, insertedText):
+        '''
+            @param result: HighlightResult, The result for the text before the edit, from `Analyze` or `AnalyzeEdit`.
+            @param offset: int, Position of the edit in the text.
+            @param removedLength: int, The number of characters removed at the offset.
+            @param insertedText: str, The text inserted at the offset.
+            @return: HighlightResult, The tokens of the edited text, identical to those `Analyze` returns for it. 
+                     Its `ChangedRange` is the range of the edited text whose spans differ from the previous result.
+            
+            @summary: Re-lexes the edited text from the last match before the edit that no rule can have read past the edit from, until the matches are again the same as before the edit.
+                      All the other matches are reused, the ones after the edit shifted by the length of the edit. 
+                      Only the attempts of the multi-line rules at the `Openings` may read arbitrarily far. These are matched again & the text is re-lexed from the first one whose match changes.
+                      Thus an edit that opens a multi-line comment or string re-lexes till the end of the text & one that closes it re-lexes from its start.
+        '''
+        old = result.Text
+        if offset < 0 or removedLength < 0 or offset + removedLength > len(old):
+            raise IndexError("Edit (%d, %d) out of range of the text of length %d" % (offset, removedLength, len(old)))
+        text = old[:offset] + insertedText + old[offset + removedLength:]
+        delta = len(insertedText) - removedLength
+        editEnd = offset + len(insertedText)        # End of the inserted text in the edited text
+        matcher = self._highlightRules.GetMatcher(None, self._reFlags)
+        
+        # Attempts at or after the restart point can read the edit. Before it only those of the multi-line rules at the openings, which are matched again.
+        restart = self.RestartPoint(old, offset, matcher.Reach)
+        if None in [ opener for unused_rule, opener in matcher.Openers ]:
+            restart = 0
+        for p in result.Openings:
+            if p >= restart:
+                break
+            previous = result.MatchFrom(p)
+            if previous is None or previous[1] > restart:   # Re-lexed anyway
+                break
+            for rule, unused_opener in matcher.Openers:
+                if previous[0] == p and rule > previous[2]:     # Not attempted
+                    break
+                m, groups = matcher.MatchRule(rule, text, p)
+                if m is None:
+                    differs = previous[0] == p and rule == previous[2]
+                elif previous[0] != p or rule != previous[2] or m.end() != previous[1]:
+                    differs = True
+                else:   # The text of the match is the same, so are the spans of its dependencies
+                    differs = sorted([ (m.start(i) - p, m.end(i) - p, key) for i, key in groups if m.start(i) >= 0 ]) != sorted([ span[:3] for span in previous[3] if span[3] == 0 ])
+                if differs:
+                    restart = p
+                    break
+            if restart == p:
+                break
+        head, tail = result.Split(restart)
+        pos = 0
+        if head:
+            ms, unused_ends, shift, unused_begin, end = head[-1]
+            pos = ms[end - 1][1] + shift
+            if ms[end - 1][0] + shift == pos:    # Empty matches advance by one
+                pos += 1
+        
+        # Re-lex until a match beyond the edit is the same as before. The rest of the text is lexed the same, as the text an attempt can read is unchanged.
+        before = HighlightResult.ItemMatches(tail)
+        previous = next(before, None)
+        changed = offset
+        candidates = HighlightResult.ItemMatches(result.Split(offset + removedLength)[1])
+        candidate = next(candidates, None)
+        matches = list()
+        resync = None
+        for m, rule, groups in matcher.Matches(text, pos):
+            start, end = m.span()
+            if start >= editEnd + matcher.Behind:
+                while candidate is not None and candidate[0] + delta < start:
+                    candidate = next(candidates, None)
+                if candidate is not None and candidate[0] + delta == start and candidate[1] + delta == end and candidate[2] == rule:
+                    resync = start
+                    break
+            match = (start, end, rule, self.MatchSpans(m, groups, -start, 0))
+            if previous is not None:    # Matches before the edit are often unchanged
+                if start < changed and previous == match:
+                    previous = next(before, None)
+                else:
+                    changed = min(changed, start, previous[0])
+                    previous = None
+            else:   # No match before the edit is left to compare with, so this one is new
+                changed = min(changed, start)
+            matches.append(match)
+        if previous is not None and previous[0] < changed:  # A match before the edit is gone
+            changed = previous[0]
+        
+        segments = head + [(matches, [ m[1] for m in matches ], 0, 0, len(matches))]
+        openings = [ p for p in result.Openings if p < pos ] + self.FindOpenings(matcher, text, matches, pos, len(text) if resync is None else resync)
+        if resync is not None:
+            unused_head, tail = result.Split(resync - delta)
+            segments += [ (ms, ends, shift + delta, begin, end) for ms, ends, shift, begin, end in tail ]
+            openings += [ p + delta for p in result.Openings if p >= resync - delta ]
+        return HighlightResult(text, segments, openings, (min(changed, offset), max(editEnd, len(text) if resync is None else resync)))
     
     # Virtual Methods
     
@@ -541,7 +1615,7 @@ class SyntaxHighlighter(object):
     def SetLanguageWords(self): pass    # Called when setting the default rules for highlighting.
     
     #def OverrideHighlightFormat(self, group, highlightObject): return highlightObject
-    # @note: Attach this function if the user wants to edit simply the color or font of a highlight  
+    # @note: Attach this function if the user wants to edit simply the color or font of a highlight. It is called once per rule for every text, not for every match. See `InternRule`
     OverrideHighlightFormat = None
     
     
@@ -553,43 +1627,273 @@ class SyntaxHighlighter(object):
         @param group: str, The group under which to perform all the highlighting. Required for recursive highlight using dependencies. Root group is always `None`.
         @param index: int, Current index of the highlight engine. All formatting is done relative to this index.  
             
-        @attention: Withing this function [:-3] is used to slice the groups back to their original unmodified form (as they are registered). Internally the groups has an additional "_DD" appended (D is a digit).
+        @attention: Internally the groups have an additional "_D" #id appended. The RuleMatcher of the group maps each match back to the rule keys, as they are registered.
         @summary: Recursively highlights the text in the writer based on the recursive dependencies.        
         ''' 
         
-        # Set regex flags        
-        re_flags = re.M
-        if not self.MatchCaseSensitive:
-            re_flags |= re.I
-        
-        matches = []
-        
+        for start, end, key, unused_depth in self.TokenizeGroup(inputText, group, index, 0):
+            self.HighlightSpan(start, end, key)
+    
+    # Helper Protected Methods        
+    def TokenizeGroup(self, inputText, group, index, depth):
+        '''
+            @param inputText: str, The text to tokenize.
+            @param group: str, The group whose dependencies are to be matched. Root group is always `None`.
+            @param index: int, The offset of inputText in the document. All the spans are relative to the document.
+            @param depth: int, The depth of the spans of this group.
+            @return: generator, tuple(start, end, rule-key, depth) for every span of the group, in document order.
+        '''
         if group is None:   # Root group
-            matches = re.finditer(self.GetRegexStringForGroups(), inputText, re_flags)
+            matcher = self._highlightRules.GetMatcher(None, self._reFlags)
         elif self._highlightRules.RecursiveDependencies.has_key(group):     # Highlight recursively using the dependencies
-            matches = re.finditer(self.GetRegexStringForGroups(self._highlightRules.RecursiveDependencies[group]), inputText, re_flags)        
+            matcher = self._highlightRules.GetMatcher(group, self._reFlags)
+        else:
+            return
         
-        # Highlight each match
-        for m in matches:
+        matches = self.BudgetedMatches(matcher, inputText) if group is None and self.MatchBudget is not None else matcher.Matches(inputText)
+        for m, unused_rule, groups in matches:
+            for span in self.MatchSpans(m, groups, index, depth):
+                yield span
+    
+    def BudgetedMatches(self, matcher, inputText):
+        '''
+            @param matcher: RuleMatcher, The matcher of the root group.
+            @param inputText: str, The text to match.
+            @return: generator, The matches of `matcher.Matches` while the time spent finding them is within `MatchBudget`.
+            @raise MatchBudgetError: If over budget & not `DowngradeOverBudget`.
             
-            # Get the groups which matched successfully in the regex.            
-            groupKeys = list()            
-            m_groups = m.groupdict()                    
-            for key in m_groups:    # Group must be present in the `_highlightRules` for higlighting. Even dependecy-only rules are registered in `_highlightRules`.
-                if m_groups[key] is not None and self._highlightRules.Has_Key(key[:-3]):    # Slice the group because groups have #ids internally. 
-                    groupKeys.append(key)                    
-                
-            # Highlight the groups found
-            for groupKey in groupKeys:                              
-                self._outputWriter.Select(m.start(groupKey) + index, m.end(groupKey) - m.start(groupKey))   # Select in the Writer.                
-                ho = self._highlightRules[groupKey[:-3]]    # Get the rule's highlighting rule.
-                if self.OverrideHighlightFormat is not None:
-                    self.OverrideHighlightFormat(groupKey[:-3], ho)
-                self._outputWriter.SelectionFormat(ho.ForeColor, ho.BackColor, ho.Font)     # Highlight the text in the writer                       
-                if self._highlightRules.RecursiveDependencies.has_key(groupKey[:-3]):       # Check for any groups that can be contained in this group (dependencies)
-                    self.RecursiveHighlight(m.group(groupKey), groupKey[:-3], m.start(groupKey) + index)    # (Text captured by the group, Group's actual name, Current index in text)
+            @summary: The matches are found by RuleMatcher.WindowedMatches, so the budget is checked while a multi-line rule reads a long way ahead, Eg: at an unclosed comment.
+                      The time a multi-line rule spends reading from its openers is charged to it, the rest to none. Once over budget the rule reading, else the one charged the most, is left out 
+                      & the rest of the text is matched without it, with a budget of the same time more. Only the `DowngradeRules` are left out, once none is left the rest is left plain.
+                      Only the time spent in the matcher is counted, not that of the consumer of the matches nor of the dependencies.
+            @note: A window of the text is read in a single search of the regex, which cannot be interrupted. So the budget may be exceeded by about the time spent in the last window.
+                   `Analyze` & `AnalyzeEdit` are not budgeted, so their results stay the same as those of `Tokenize` without a budget.
+        '''
+        allowance = self.MatchBudget
+        excluded = list()
+        downgradable = self.GetDowngradeRules(matcher)
+        charges = dict()            # Key: Seconds. `None` for the time not spent by a multi-line rule
+        clock = [None]
+        def check(rule, position):
+            now = time.time()
+            key = None if rule is None else keys[rule]
+            charges[key] = charges.get(key, 0.0) + now - clock[0]
+            clock[0] = now
+            spent = sum(charges.values())
+            if spent > allowance:
+                raise MatchBudgetError(position, spent, key)
+        
+        keys = self.GetMatcherKeys(excluded)
+        matcher.Openers     # Analyzed before the clock starts
+        matches = matcher.WindowedMatches(inputText, 0, check)
+        while True:
+            found = None
+            try:
+                clock[0] = time.time()
+                found = next(matches, None)
+                if found is None:
+                    return
+                m = found[0]
+                check(None, m.end() if m.end() > m.start() else m.end() + 1)
+            except MatchBudgetError, e:
+                if not self.DowngradeOverBudget:
+                    raise
+                self._overBudget = True
+                candidates = [ key for key in downgradable if key not in excluded ]
+                rule = e.Rule
+                if rule not in candidates:
+                    if not [ key for key in candidates if charges.get(key) ]:
+                        if found is not None:
+                            yield found
+                        return
+                    rule = max(candidates, key=lambda key: charges.get(key, 0.0))
+                excluded.append(rule)
+                allowance += self.MatchBudget
+                keys = self.GetMatcherKeys(excluded)
+                matcher = self._highlightRules.GetMatcher(None, self._reFlags, excluded)
+                matcher.Openers
+                matches = matcher.WindowedMatches(inputText, e.Position, check)
+                if found is None:
+                    continue
+            yield found
+    
+    def GetDowngradeRules(self, matcher):
+        '''
+            @param matcher: RuleMatcher, The matcher of the root group.
+            @return: list(str), The keys of the rules that may be left out when over budget: the `DowngradeRules`, or the multi-line rules of the matcher if they are `None`.
+        '''
+        if self.DowngradeRules is not None:
+            return list(self.DowngradeRules)
+        keys = self.GetMatcherKeys(())
+        return [ keys[rule] for rule, unused_opener in matcher.Openers ]
+    
+    def GetMatcherKeys(self, exclude):
+        '''
+            @param exclude: list(str), The keys of the rules left out of the matcher of the root group.
+            @return: list(str), The keys of the rules of the matcher by #Rule-Index.
+        '''
+        return [ key for key in self._highlightRules.Keys if self._highlightRules[key].InternalRegexString is not None and key not in exclude ]
+    
+    def MatchSpans(self, m, groups, index, depth):
+        '''
+            @param m: MatchObject, A match of a group's matcher.
+            @param groups: tuple( (#Group-Index, Rule-Key), ... ), The groups of the rule that matched. See RuleMatcher.Matches.
+            @param index: int, The offset of the matched text in the document.
+            @param depth: int, The depth of the spans of the match.
+            @return: tuple, tuple(start, end, rule-key, depth) for every span of the match & of its dependencies, in document order.
+        '''
+        spans = list()
+        # Only the groups of the rule that matched are candidates & all of them are registered in `_highlightRules`.
+        for groupIndex, key in groups:
+            start = m.start(groupIndex)
+            if start < 0:   # Group did not participate in the match
+                continue
+            end = m.end(groupIndex)
+            spans.append((start + index, end + index, key, depth))
+            if self._highlightRules.RecursiveDependencies.has_key(key):       # Check for any groups that can be contained in this group (dependencies)
+                spans.extend(self.TokenizeGroup(m.group(groupIndex), key, start + index, depth + 1))    # (Text captured by the group, Group's actual name, Current index in text)
+        if len(spans) > 1:  # Several groups of a rule may overlap or be out of order. Matches themselves never overlap.
+            spans.sort(key=lambda span: (span[0], -span[1], span[3]))
+        return tuple(spans)
+    
+    def FindOpenings(self, matcher, inputText, matches, begin, end):
+        '''
+            @param matcher: RuleMatcher, The matcher of the root group.
+            @param inputText: str, The text.
+            @param matches: list( tuple(start, end, #Rule-Index, ...) ), The matches of the root group in the range, in order.
+            @param begin: int, Start of the range.
+            @param end: int, End of the range.
+            @return: list(int), Sorted positions in the range where the opener of a multi-line rule matched & the attempt of the rule may have read beyond the match found there. 
+                     See HighlightResult.Openings.
+            
+            @note: Attempts are made at the start of every match, up to the rule that matched, & at every position between the matches. 
+        '''
+        openings = list()
+        starts = [ m[0] for m in matches ]
+        for rule, opener in matcher.Openers:
+            if opener is None:      # Handled by `AnalyzeEdit`
+                continue
+            pos = begin
+            while pos < end:
+                o = opener.search(inputText, pos)
+                if o is None or o.start() >= end:
+                    break
+                pos = o.start()
+                i = bisect.bisect_right(starts, pos) - 1
+                if i >= 0 and pos < matches[i][1]:
+                    if pos > starts[i]:     # No attempts inside a match
+                        pos = matches[i][1]
+                        continue
+                    if matches[i][2] > rule or (matches[i][2] == rule and matcher.ReadsBeyond(rule, inputText, pos)):
+                        openings.append(pos)
+                else:
+                    openings.append(pos)
+                pos += 1
+        openings.sort()
+        return openings
+    
+    @staticmethod
+    def RestartPoint(inputText, offset, lines):
+        '''
+            @param inputText: str, The text.
+            @param offset: int, A position in the text.
+            @param lines: int, The number of line breaks an attempt can read across. See RuleMatcher.Reach.
+            @return: int, A position before which no attempt can read the position, other than those of the multi-line rules.
+            
+            @summary: Moves back over whitespace & to the start of the line, once for every line break & twice more for the line of the offset & the characters read beyond a match.  
+        '''
+        pos = offset
+        for unused_i in range(lines + 2):
+            while pos > 0 and inputText[pos - 1].isspace():
+                pos -= 1
+            pos = inputText.rfind("\n", 0, pos) + 1
+        return pos
+    
+    def HighlightSpan(self, start, end, key):
+        '''
+            @param start: int, Start of the span in the document.
+            @param end: int, End of the span in the document.
+            @param key: str, The rule to format the span with.
+            
+            @summary: Formats a span in the writer with the rule's format, interned once per text. See `InternRule`.
+        '''
+        self._outputWriter.Select(start, end - start)   # Select in the Writer.                
+        sid = self._ruleStyles.get(key, False)
+        if sid is False:
+            sid = self.InternRule(key)
+        if sid is not None:
+            self._outputWriter.SelectionStyle(sid)      # Highlight the text in the writer, as the class of the rule
+    
+    def InternRule(self, key):
+        '''
+            @param key: str, The key of the rule.
+            @return: int, The #id of the style of the rule in the writer. `None` if the rule formats nothing.
+            
+            @summary: Resolves the format of the rule, after `OverrideHighlightFormat`, to a style of the writer, as the class of the rule. See NX.Main.GenericWriter.InternClass.
+                      The styles are resolved again for every text, so edits of the rules between texts take effect.
+        '''
+        ho = self._highlightRules[key]    # Get the rule's highlighting rule.
+        if self.OverrideHighlightFormat is not None:
+            self.OverrideHighlightFormat(key, ho)
+        sid = self._ruleStyles[key] = self._outputWriter.InternClass(key, ho.ForeColor, ho.BackColor, ho.Font)
+        return sid
+    
+    def GetClasses(self):
+        '''
+            @return: list( tuple(key, HighlightColor|None, HighlightColor|None, HighlightFont|None) ), The format of every rule, by key, as given to the writer.
+        '''
+        classes = list()
+        for key in sorted(self._highlightRules.Keys):
+            ho = self._highlightRules[key]
+            if self.OverrideHighlightFormat is not None:
+                self.OverrideHighlightFormat(key, ho)
+            classes.append((key, ho.ForeColor, ho.BackColor, ho.Font))
+        return classes
+    
+    def PrepareWriter(self):
+        '''
+            @summary: Gives the formats of the rules to the writer before the text is formatted. See NX.Main.NXWriter.Prepare. Skipped for writers that do not use them.
+                      The styles of the rules are resolved anew. See `InternRule`.
+        '''
+        self._ruleStyles = dict()
+        if type(self._outputWriter).Prepare.im_func is not NXWriter.Prepare.im_func:
+            self._outputWriter.Prepare(self.GetClasses())
+    
+    def GetStylesheet(self):
+        '''
+            @return: str, The CSS rules of the classes written with `CssClasses` set: `.nx` for the default format & `.nx-key` for every rule. 
+            
+            @note: The stylesheet only depends on the rules & the default format, so it is the same for every text highlighted & can be served & cached apart from them.
+        '''
+        return self._outputWriter.GetStylesheet(self.GetClasses())
+    
+    def GetFingerprint(self):
+        '''
+            @return: str, A hash of everything the output depends on besides the text: the highlighter & writer classes, the version, the defaults, the rules (See HighlightRules.GetFingerprint) & the CSS & matching settings.
+            @note: An `OverrideHighlightFormat` is identified by its name only. Change its name when changing what it does, or the cached output is stale.
+        '''
+        override = self.OverrideHighlightFormat
+        digest = hashlib.sha1()
+        digest.update(repr((
+            "%s.%s" % (type(self).__module__, type(self).__name__), 
+            "%s.%s" % (type(self._outputWriter).__module__, type(self._outputWriter).__name__),
+            self._versionMax, self._versionMin,
+            str(self.DefaultTextColor), str(self.DefaultBackColor), str(self.DefaultFont),
+            self.MatchCaseSensitive, self.CssClasses, getattr(self._outputWriter, "ClassPrefix", None),
+            None if override is None else "%s.%s" % (getattr(override, "__module__", None), getattr(override, "__name__", repr(override))),
+            self._highlightRules.GetFingerprint(),
+        )))
+        return digest.hexdigest()
+    
+    def GetDocumentHeader(self):
+        '''
+            @return: str, The header of a formatted document. Includes the stylesheet with `CssClasses` set.
+        '''
+        header = self._outputWriter.FormatComment(self.VersionInfo)
+        if self.CssClasses:
+            header += '<style type="text/css">\n%s</style>' % self.GetStylesheet()
+        return header
     
-    # Helper Protected Methods        
     def GetRegexStringForGroups(self, groups = None):
         """
             @param groups: str, The groups to get the regex's for. `None` means get the regex string for all groups
@@ -597,17 +1901,7 @@ class SyntaxHighlighter(object):
             
             @summary: The function ORs all the regexes for the groups specified in the arg & returns them.
         """
-        regexStr = ""          
-        if groups is None:
-            #for t in self._highlightRules.Keys: print t
-            for h in self._highlightRules.Rules:                
-                if h.InternalRegexString is not None:
-                    regexStr += h.InternalRegexString + "|"                    
-        else:            
-            for s in groups:
-                if self._highlightRules[s].InternalRegexString is not None:
-                    regexStr += self._highlightRules[s].InternalRegexString + "|"            
-        return regexStr.rstrip("|")
+        return self._highlightRules.GetRegexString(groups)
                                         
     def __str__(self):
         return str(self._highlightRules)
\ No newline at end of file
@@ -0,0 +1,581 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module highlights batches of documents & trees of files across a pool of processes.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import array
+import bisect
+import errno
+import glob
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import stat
+import tempfile
+from NX.SyntaxHighlighter.Registry import Highlighters
+
+'''
+    Batch
+
+    Classes included:
+    + BuildManifest    :    Records the hash of every input & the fingerprint of its highlighter, so that unchanged files are not highlighted again.
+    + PartTokens       :    The matches of the root rules over a part of a text & their spans, kept in arrays that pass cheaply between processes.
+'''
+
+# @note: The highlighters of the process, by tuple(name, cssClasses, writer). Built once & reused for every document of a batch.
+_highlighters = dict()
+# @note: The fingerprints of the highlighters of the process, by tuple(name, cssClasses, writer). See SyntaxHighlighter.GetFingerprint
+_fingerprints = dict()
+# @note: The text highlighted in parts by `HighlightParallel`, given to its workers as they start. See `ShareText`
+_shared = None
+# @note: A blank line followed by a line that starts with no indent, where `SplitPoints` prefers to split a text
+_quietLine = re.compile(r"\n[ \t\r\f\v]*\n(?=\S)")
+# @note: The umask of the process, read once. See `FileMode`
+_umask = None
+
+def GetHighlighter(name, cssClasses=False, writer="html"):
+    '''
+        @param name: str, The name of the highlighter. A name or alias registered in `Registry.Highlighters`.
+        @param cssClasses: bool, If the highlighter writes CSS classes. See `SyntaxHighlighter.CssClasses`.
+        @param writer: str, The name of the writer. See `SyntaxHighlighter.SetWriter`.
+        @return: SyntaxHighlighter, The highlighter of the process for the name. Its rules are compiled when it is built.
+    '''
+    key = (name, cssClasses, writer)
+    sh = _highlighters.get(key)
+    if sh is None:
+        sh = Highlighters.GetClass(name)()
+        if writer != "html":
+            sh.SetWriter(writer)
+        sh.CssClasses = cssClasses
+        sh.Highlight("")    # Compiles the rules before the first document
+        _highlighters[key] = sh
+        _fingerprints[key] = sh.GetFingerprint()
+    return sh
+
+def HighlightDocument(task):
+    '''
+        @param task: tuple(#Index, text, name, cssClasses, formatDocument), A document to highlight.
+        @return: tuple(#Index, str), The index & the formatted text of the document.
+    '''
+    index, text, name, cssClasses, formatDocument = task
+    return index, GetHighlighter(name, cssClasses).Highlight(text, formatDocument)
+
+def HighlightMany(documents, name, workers=None, ordered=True, chunkSize=16, cssClasses=False, formatDocument=None):
+    '''
+        @param documents: iterable(str), The texts to highlight. Read as the workers need them.
+        @param name: str, The name of the highlighter. A name or alias registered in `Registry.Highlighters`.
+        @param workers: int, The number of processes. Default: the number of CPUs. With 1 the documents are highlighted in this process.
+        @param ordered: bool, If the results are given in the order of the documents. Otherwise they are given as they complete.
+        @param chunkSize: int, The number of documents sent to a worker at a time.
+        @param cssClasses: bool, If the highlighter writes CSS classes. See `SyntaxHighlighter.CssClasses`.
+        @param formatDocument: str, The title of the documents. Same as for `SyntaxHighlighter.Highlight`.
+        @return: generator, tuple(#Index, str) with the index & the formatted text of every document.
+
+        @summary: Highlights the documents across a pool of processes, each keeping a highlighter of the language built once.
+                  The documents are sent & the results returned in chunks, so the cost of passing them between the processes is shared by the chunk.
+        @attention: Exceptions raised while highlighting a document are raised here & stop the batch.
+    '''
+    Highlighters.GetClass(name)    # A worker that fails to start is started again, so the name is checked first
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    tasks = itertools.izip(itertools.count(), documents, itertools.repeat(name), itertools.repeat(cssClasses), itertools.repeat(formatDocument))
+    if workers <= 1:
+        for task in tasks:
+            yield HighlightDocument(task)
+        return
+
+    pool = multiprocessing.Pool(workers, GetHighlighter, (name, cssClasses))     # Every worker builds the highlighter when it starts
+    try:
+        results = pool.imap(HighlightDocument, tasks, chunkSize) if ordered else pool.imap_unordered(HighlightDocument, tasks, chunkSize)
+        for result in results:
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()    # Stops the workers if the batch is abandoned or failed
+        pool.join()
+
+class BuildManifest(object):
+    '''
+        @summary: Records, for every output of a tree, the hash of its input & the fingerprint of its highlighter (See SyntaxHighlighter.GetFingerprint).
+                  An output is current while both are unchanged & it exists. Kept as JSON, written to a temporary file & renamed into place.
+        @note: The entries of files not in a run are kept, so that runs over parts of a tree share the manifest.
+    '''
+    Version = 1     # Manifests of another version are discarded
+
+    def __init__(self, path):
+        '''
+            @param path: str, The manifest file. Read if it exists.
+        '''
+        self.__path = path
+        self.__entries = dict()     # Output path: {"hash": str, "fingerprint": str}
+        try:
+            with open(path, "rb") as f:
+                data = json.load(f)
+            if data.get("version") == self.Version:
+                self.__entries = data["files"]
+        except IOError, err:
+            if err.errno != errno.ENOENT:
+                raise
+        except (ValueError, KeyError, AttributeError):   # Corrupt, every output is highlighted again
+            pass
+
+    # Properties
+    @property       # str
+    def Path(self): return self.__path
+
+    # Methods
+    def Get(self, output):
+        '''
+            @return: tuple(str, str), The hash & the fingerprint recorded for the output. tuple(None, None) if none is recorded.
+        '''
+        entry = self.__entries.get(self.__Key(output), {})
+        return entry.get("hash"), entry.get("fingerprint")
+
+    def Update(self, output, digest, fingerprint):
+        '''
+            @summary: Records that the output was written from an input of the hash by a highlighter of the fingerprint.
+        '''
+        self.__entries[self.__Key(output)] = {"hash": digest, "fingerprint": fingerprint}
+
+    def Save(self):
+        directory = os.path.dirname(os.path.abspath(self.__path))
+        fd, temp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                json.dump({"version": self.Version, "files": self.__entries}, f, indent=1, sort_keys=True)
+            os.chmod(temp, FileMode(self.__path))
+            os.rename(temp, self.__path)
+        except:
+            os.remove(temp)
+            raise
+
+    @staticmethod
+    def Hash(inputFile, chunkSize=65536):
+        '''
+            @param inputFile: file, The input, read from its current position till the end.
+            @return: str, The SHA-1 of the input.
+        '''
+        digest = hashlib.sha1()
+        for chunk in iter(lambda: inputFile.read(chunkSize), ""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    # Helper Methods
+    def __Key(self, output):
+        return os.path.relpath(output, os.path.dirname(os.path.abspath(self.__path))).replace(os.sep, "/")
+
+def FileMode(path):
+    '''
+        @param path: str, A file about to be written.
+        @return: int, The permissions of the file if it exists, else those `open` would create it with, under the umask.
+        
+        @summary: A temporary file is created readable by its owner only, it is given these before being renamed into place.
+    '''
+    global _umask
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError, err:
+        if err.errno != errno.ENOENT:
+            raise
+    if _umask is None:
+        _umask = os.umask(0)
+        os.umask(_umask)
+    return 0666 & ~_umask
+
+def CollectFiles(inputs, outputDir, suffix=".html", allFiles=False):
+    '''
+        @param inputs: list(str), Files, directories & glob patterns. Directories are walked recursively, skipping hidden entries & the output directory.
+        @param outputDir: str, The directory the output tree is mirrored into.
+        @param suffix: str, Appended to the name of every output.
+        @param allFiles: bool, If every file of a directory is highlighted. Otherwise only those of the extensions registered in `Registry.Highlighters`.
+        @return: list(tuple(str, str)), The input & output file of every file, without duplicates, in the order found.
+
+        @summary: Mirrors the inputs into the output tree by their paths relative to the current directory. 
+                  Inputs outside of it are mirrored by their names, along with their paths within a directory given.
+    '''
+    files = list()
+    seen = set()
+    excluded = os.path.realpath(outputDir)
+    def add(path, relative):
+        path = os.path.normpath(path)
+        if path not in seen:
+            seen.add(path)
+            files.append((path, os.path.join(outputDir, relative + suffix)))
+    for pattern in inputs:
+        for path in (sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]):
+            relative = os.path.relpath(path)
+            if relative.startswith(os.pardir):
+                relative = os.path.basename(os.path.normpath(path))
+            if not os.path.isdir(path):
+                add(path, relative)
+                continue
+            for folder, folders, names in os.walk(path):
+                folders[:] = sorted([ f for f in folders if not f.startswith(".") and os.path.realpath(os.path.join(folder, f)) != excluded ])
+                for name in sorted(names):
+                    if not name.startswith(".") and (allFiles or Highlighters.ForFile(name)):
+                        filename = os.path.join(folder, name)
+                        add(filename, os.path.normpath(os.path.join(relative, os.path.relpath(filename, path))))
+    return files
+
+def HighlightFile(task):
+    '''
+        @param task: tuple(#Index, inputPath, outputPath, name, cssClasses, writer, digest, fingerprint), A file to highlight, with the hash & fingerprint its output was last written with.
+        @return: tuple(#Index, digest, fingerprint, bool), The index, the hash of the input, the fingerprint of the highlighter & True if the output was written. 
+                 False if it is current, as the input & highlighter are unchanged.
+
+        @summary: Highlights the input as a stream into the output, which is written to a temporary file & renamed into place, with the permissions of `FileMode`. The input is titled by its path.
+    '''
+    index, inputPath, outputPath, name, cssClasses, writer, lastDigest, lastFingerprint = task
+    sh = GetHighlighter(name, cssClasses, writer)
+    fingerprint = _fingerprints[(name, cssClasses, writer)]
+    with open(inputPath, "rb") as inputFile:
+        digest = BuildManifest.Hash(inputFile)
+        if digest == lastDigest and fingerprint == lastFingerprint and os.path.exists(outputPath):
+            return index, digest, fingerprint, False
+        inputFile.seek(0)
+        directory = os.path.dirname(outputPath) or "."
+        try:
+            os.makedirs(directory)
+        except OSError, err:
+            if err.errno != errno.EEXIST:
+                raise
+        fd, temp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                sh.HighlightTo(inputFile, f, inputPath)
+            os.chmod(temp, FileMode(outputPath))
+            os.rename(temp, outputPath)
+        except:
+            os.remove(temp)
+            raise
+    return index, digest, fingerprint, True
+
+def HighlightFiles(files, workers=None, cssClasses=False, manifest=None, name=None, force=False, writer="html"):
+    '''
+        @param files: list(tuple(str, str)), The input & output file of every file. See `CollectFiles`.
+        @param workers: int, The number of processes. Default: the number of CPUs. With 1 the files are highlighted in this process.
+        @param cssClasses: bool, If the highlighters write CSS classes. See `SyntaxHighlighter.CssClasses`.
+        @param manifest: BuildManifest, The outputs last written. Current outputs are skipped & the others recorded. `None` means every file is highlighted.
+        @param name: str, The highlighter of every file. `None` means by the extension of each file, else the basic highlighter.
+        @param force: bool, If every file is highlighted, even if its output is current. The manifest is still updated.
+        @param writer: str, The name of the writer. See `SyntaxHighlighter.SetWriter`.
+        @return: generator, tuple(inputPath, outputPath, bool) for every file, as it completes, with True if it was highlighted, False if skipped as current.
+
+        @summary: Highlights the files across a pool of processes, largest first, so that one large file does not finish last. 
+                  Each process builds the highlighter of a language once, on its first file of the language. The input is hashed by the process highlighting it.
+        @attention: Exceptions raised while highlighting a file are raised here & stop the run. The outputs completed are recorded in the manifest, which is saved by the caller.
+    '''
+    tasks = list()
+    for index, (inputPath, outputPath) in enumerate(files):
+        language = name or Highlighters.ForFile(inputPath) or "basic"
+        digest, fingerprint = manifest.Get(outputPath) if manifest is not None and not force else (None, None)
+        tasks.append((index, inputPath, outputPath, language, cssClasses, writer, digest, fingerprint))
+    for language in set([ task[3] for task in tasks ]):
+        Highlighters.GetClass(language)     # Checked before any file is written
+    tasks.sort(key=lambda task: -os.path.getsize(task[1]))
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    def record(result):
+        index, digest, fingerprint, written = result
+        inputPath, outputPath = files[index]
+        if manifest is not None:
+            manifest.Update(outputPath, digest, fingerprint)
+        return inputPath, outputPath, written
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield record(HighlightFile(task))
+        return
+
+    pool = multiprocessing.Pool(min(workers, len(tasks)))
+    try:
+        for result in pool.imap_unordered(HighlightFile, tasks):
+            yield record(result)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+class PartTokens(object):
+    '''
+        @summary: The matches of the root rules over a part of a text & the spans of every match, in document order. 
+                  A match is kept by its start & the position matching resumes at after it: its end, or the position after an empty match.
+                  Matching resumed at a position finds the same matches whichever position it was resumed from before, so two lexings of a text agree from the first position they both resume at.
+        @note: The spans are kept in arrays, their rules by the #index of their keys in `RuleKeys`, so that the parts pass cheaply between the processes.
+    '''
+    def __init__(self):
+        self.__starts = array.array("l")        # The start of every match
+        self.__resumes = array.array("l")       # The position matching resumes at after every match
+        self.__offsets = array.array("l", [0])  # The #index of the first span of every match, & the number of spans last
+        self.__spanStarts = array.array("l")
+        self.__spanEnds = array.array("l")
+        self.__spanKeys = array.array("l")
+        self.__firsts = list()                  # tuple(#Span-Index, #Key-Index) of the first span of every rule, in order
+        self.__seen = set()                     # The #key-indices of the rules with spans
+
+    # Properties
+    
+    # @return: int, The position matching resumes at after the last match. `None` if there are none.
+    @property
+    def Resume(self): return self.__resumes[-1] if self.__resumes else None
+
+    # @return: list(int), The #key-indices of the rules with spans, in the order of their first span. The order the rules are interned in by SyntaxHighlighter.HighlightSpan.
+    @property
+    def Order(self): return [ key for unused_i, key in self.__firsts ]
+
+    # Methods
+    def Lex(self, sh, text, begin, end, synced=None):
+        '''
+            @param sh: SyntaxHighlighter, The highlighter.
+            @param text: str|mmap, The whole text.
+            @param begin: int, The position to match from.
+            @param end: int, The position to stop at. The matches starting before it are added.
+            @param synced: PartTokens, The matches of the part found from another position. Matching stops once it resumes in a gap of these.
+            @return: int, The #index of the match of `synced` that matching finds next, once it resumes in a gap of them. `None` if it does not.
+        '''
+        if synced is not None:
+            found = synced.Find(begin)
+            if found is not None:
+                return found
+        keys = dict([ (key, i) for i, key in enumerate(RuleKeys(sh)) ])
+        seen = self.__seen
+        spanStarts, spanEnds, spanKeys = self.__spanStarts, self.__spanEnds, self.__spanKeys
+        for m, unused_rule, groups in sh.Rules.GetMatcher(None, sh._reFlags).Matches(text, begin):
+            start, stop = m.span()
+            if start >= end:
+                break
+            for spanStart, spanEnd, key, unused_depth in sh.MatchSpans(m, groups, 0, 0):
+                key = keys[key]
+                if key not in seen:
+                    seen.add(key)
+                    self.__firsts.append((len(spanStarts), key))
+                spanStarts.append(spanStart)
+                spanEnds.append(spanEnd)
+                spanKeys.append(key)
+            resume = stop if stop > start else stop + 1     # Empty matches advance by one
+            self.__starts.append(start)
+            self.__resumes.append(resume)
+            self.__offsets.append(len(spanStarts))
+            if synced is not None:
+                found = synced.Find(resume)
+                if found is not None:
+                    return found
+        return None
+
+    def Find(self, pos):
+        '''
+            @param pos: int, A position matching resumes at, at or after the position these matches were found from.
+            @return: int, The #index of the match that matching from the position finds first. `None` if the position is inside a match, so it may find others.
+        '''
+        i = bisect.bisect_left(self.__starts, pos)
+        return i if i == 0 or self.__resumes[i - 1] <= pos else None
+
+    def Extend(self, tokens, first):
+        '''
+            @param tokens: PartTokens, The matches of a later part.
+            @param first: int, The #index of the first of its matches to add.
+        '''
+        offsets = tokens.__offsets
+        shift = len(self.__spanStarts) - offsets[first]
+        # The first spans of the rules in the matches added. Those of the rules first found before them are searched for
+        firsts = [ (i, key) for i, key in tokens.__firsts if i >= offsets[first] and key not in self.__seen ]
+        missing = set([ key for i, key in tokens.__firsts if i < offsets[first] and key not in self.__seen ])
+        i = offsets[first]
+        while missing and i < len(tokens.__spanKeys):
+            if tokens.__spanKeys[i] in missing:
+                missing.discard(tokens.__spanKeys[i])
+                firsts.append((i, tokens.__spanKeys[i]))
+            i += 1
+        for i, key in sorted(firsts):
+            self.__seen.add(key)
+            self.__firsts.append((i + shift, key))
+        self.__starts.extend(tokens.__starts[first:])
+        self.__resumes.extend(tokens.__resumes[first:])
+        self.__offsets.extend([ offset + shift for offset in offsets[first + 1:] ])
+        self.__spanStarts.extend(tokens.__spanStarts[offsets[first]:])
+        self.__spanEnds.extend(tokens.__spanEnds[offsets[first]:])
+        self.__spanKeys.extend(tokens.__spanKeys[offsets[first]:])
+
+    def Spans(self, begin, end):
+        '''
+            @return: tuple(str, str, str), The starts, ends & #key-indices of the spans of the matches overlapping [begin, end), in document order. 
+                     The arrays are given as their bytes, as they pass between the processes. See `__getstate__`.
+        '''
+        first = self.__offsets[bisect.bisect_right(self.__resumes, begin)]
+        last = self.__offsets[bisect.bisect_left(self.__starts, end)]
+        return self.__spanStarts[first:last].tostring(), self.__spanEnds[first:last].tostring(), self.__spanKeys[first:last].tostring()
+    
+    # Helper Methods
+    def __getstate__(self):     # The arrays are pickled as lists of numbers otherwise
+        return dict([ (name, value.tostring() if isinstance(value, array.array) else value) for name, value in self.__dict__.items() ])
+    
+    def __setstate__(self, state):
+        self.__dict__.update([ (name, array.array("l", value) if isinstance(value, str) else value) for name, value in state.items() ])
+
+def ShareText(text, name, cssClasses=False, writer="html"):
+    '''
+        @param text: str|mmap, The text highlighted in parts. Inherited by the workers as they are forked, not copied to them.
+        @summary: Starts a worker of `HighlightParallel`. The other arguments are those of `GetHighlighter`.
+    '''
+    global _shared
+    _shared = text
+    GetHighlighter(name, cssClasses, writer)
+
+def RuleKeys(sh):
+    '''
+        @return: list(str), The keys of the rules of the highlighter, sorted. The spans of PartTokens refer to the rules by their #index in these.
+    '''
+    return sorted(sh.Rules.Keys)
+
+def SplitPoints(text, size, window=65536):
+    '''
+        @param text: str|mmap, The text.
+        @param size: int, The number of characters of a part.
+        @param window: int, The number of characters after every multiple of the size searched for a quiet line.
+        @return: list(int), The starts of the parts, from 0, & the length of the text last.
+
+        @summary: A cheap pre-scan for the positions to split the text at, so that a multi-line comment or string is rarely split. 
+                  A part starts at the first quiet line after a multiple of the size, a line with no indent after a blank line (Eg: a top-level definition), else at the first line.
+        @note: A part that starts inside a multi-line construct is still highlighted right. See `HighlightParallel`.
+    '''
+    points = [0]
+    target = size
+    while target < len(text):
+        quiet = _quietLine.search(text, target, target + window)
+        pos = quiet.end() if quiet is not None else text.find("\n", target) + 1
+        if pos <= 0:
+            break
+        if points[-1] < pos < len(text):
+            points.append(pos)
+        target = max(pos, target + size)
+    points.append(len(text))
+    return points
+
+def LexPart(task):
+    '''
+        @param task: tuple(#Index, begin, end, name, cssClasses, writer), A part of the shared text. See `ShareText`.
+        @return: tuple(#Index, PartTokens), The matches starting in [begin, end), matching from `begin` as if no match of the text before it reads past it.
+    '''
+    index, begin, end, name, cssClasses, writer = task
+    tokens = PartTokens()
+    tokens.Lex(GetHighlighter(name, cssClasses, writer), _shared, begin, end)
+    return index, tokens
+
+def FormatPart(task):
+    '''
+        @param task: tuple(#Index, begin, end, warm, spans, order, name, cssClasses, writer, formatDocument), A range of the shared text. 
+                     `spans` are the spans overlapping [warm, end), as given by `PartTokens.Spans`. -1 & the length of the text + 1 are the first & the last boundary.
+                     `order` are the rules of the whole text, as given by `PartTokens.Order`. These are interned first, as in the whole text (Eg: for the CSS class shared by rules formatted alike).
+        @return: tuple(#Index, str), The formatted text of the range, as in the output of `SyntaxHighlighter.Highlight`. The first range includes the header & the last one the end.
+
+        @summary: The range is formatted after the runs from `warm`, discarded. A run with text other than whitespace is written alike whatever comes before it, 
+                  so formatting from the last one before the range leaves the writer as it is in the whole text at the start of the range. See NX.Main.RunCoalescer.
+    '''
+    index, begin, end, warm, spans, order, name, cssClasses, writerName, formatDocument = task
+    starts, ends, keys = [ array.array("l", data) for data in spans ]
+    sh = GetHighlighter(name, cssClasses, writerName)
+    rules = RuleKeys(sh)
+    writer = sh._outputWriter
+    writer.Clear()
+    writer.Text = _shared
+    sh.PrepareWriter()
+    for key in order:
+        sh.InternRule(rules[key])
+    for spanStart, spanEnd, key in itertools.izip(starts, ends, keys):
+        sh.HighlightSpan(spanStart, spanEnd, rules[key])
+    output = list()
+    if formatDocument is not None:     # Added after the spans, as by `Highlight`
+        header = writer.FormattedHtmlHeader(formatDocument + " | NX - Syntax Highlighter", sh.GetDocumentHeader())
+        if begin < 0:
+            output.append(header)
+    if begin >= 0:
+        writer.GetFormattedRange(-1, 0)
+        writer.GetFormattedRange(warm, begin)
+    output.append(writer.GetFormattedRange(begin, end))
+    if end > len(_shared):
+        output.append(writer.GetFormattedEnd())
+        if formatDocument is not None:
+            output.append(writer.FormattedHtmlFooter())
+    writer.Clear()
+    writer.Text = None      # Drops the spans
+    return index, "".join(output)
+
+def HighlightParallel(text, name, workers=None, cssClasses=False, formatDocument=None, writer="html", chunkSize=4194304):
+    '''
+        @param text: str|mmap, The text to highlight.
+        @param name: str, The name of the highlighter. A name or alias registered in `Registry.Highlighters`.
+        @param workers: int, The number of processes. Default: the number of CPUs. With 1 the text is highlighted in this process.
+        @param cssClasses: bool, If the highlighter writes CSS classes. See `SyntaxHighlighter.CssClasses`.
+        @param formatDocument: str, The title of the document. Same as for `SyntaxHighlighter.Highlight`.
+        @param writer: str, The name of the writer. See `SyntaxHighlighter.SetWriter`.
+        @param chunkSize: int, The largest number of characters of a part. Smaller texts are split in a part per worker.
+        @return: generator, The formatted text in parts. Joined together they are identical to the output of `SyntaxHighlighter.Highlight`.
+
+        @summary: Highlights a large text across a pool of processes. The text is split at the `SplitPoints` & every part is lexed by a worker, as if it started the text.
+                  The parts are joined in order: a part whose first match resumes where the matches before it do is taken whole. 
+                  Otherwise a match before it reads past its start (Eg: a comment left open), so it is lexed again here from the end of that match, till matching resumes in a gap of its matches.
+                  The workers then format a range of the text each, from the spans of the whole text overlapping it. 
+        @attention: The text is shared with the workers as they are forked. Where processes are not forked it is copied to every worker.
+        @note: The matches are not budgeted (See SyntaxHighlighter.MatchBudget).
+    '''
+    Highlighters.GetClass(name)    # A worker that fails to start is started again, so the name is checked first
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    points = SplitPoints(text, max(65536, min(chunkSize, len(text) // max(workers, 1) + 1)))
+    if workers <= 1 or len(points) <= 2:
+        yield GetHighlighter(name, cssClasses, writer).Highlight(text, formatDocument)
+        return
+
+    sh = GetHighlighter(name, cssClasses, writer)
+    pool = multiprocessing.Pool(min(workers, len(points) - 1), ShareText, (text, name, cssClasses, writer))
+    try:
+        tokens = PartTokens()
+        parts = pool.imap(LexPart, [ (i, points[i], points[i + 1], name, cssClasses, writer) for i in range(len(points) - 1) ])
+        for i, part in parts:
+            resume = tokens.Resume or 0
+            # Lexed again here from where the matches before it resume, unless that is before the part
+            first = tokens.Lex(sh, text, resume, points[i + 1], part) if resume > points[i] else 0
+            if first is not None:
+                tokens.Extend(part, first)
+
+        order = tokens.Order
+        def tasks():    # Built as the workers take them, so the spans are copied for a few ranges at a time
+            for i in range(len(points) - 1):
+                begin = points[i] if i > 0 else -1
+                end = points[i + 1] if i < len(points) - 2 else len(text) + 1
+                warm = max(begin, 0)
+                while warm > 0 and text[warm - 1].isspace():
+                    warm -= 1
+                warm = max(warm - 1, 0)     # The last character other than whitespace before the range
+                yield i, begin, end, warm, tokens.Spans(warm, end), order, name, cssClasses, writer, formatDocument
+        for unused_i, output in pool.imap(FormatPart, tasks()):
+            yield output
+        pool.close()
+    finally:
+        pool.terminate()    # Stops the workers if the highlighting is abandoned or failed
+        pool.join()
@@ -0,0 +1,234 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module keeps the formatted output of the highlighters on disk, addressed by a hash of the highlighter & of the text, so that the same text is not highlighted twice.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import errno
+import hashlib
+import os
+import tempfile
+import threading
+
+'''
+    Cache
+
+    Classes included:
+    + RenderCache    :    On-disk cache of formatted output, keyed by the fingerprint of the highlighter & the hash of the text. Evicts the least recently used entries.
+'''
+
+class RenderCache(object):
+    '''
+        @summary: Keeps the formatted output in a directory, one file per key, evicting the least recently used entries once they take more than `MaxBytes`.
+                  An entry is written to a temporary file & renamed into place, so several processes may share the directory & a reader never sees a partial entry.
+        @note: Reading an entry updates its modification time, which orders the eviction. An entry removed while it is read stays readable till it is closed.
+               The statistics are those of this instance, not of the directory. An instance may be shared between threads.
+    '''
+    TempPrefix = ".tmp-"    # Prefix of the entries being written
+
+    def __init__(self, directory, maxBytes=256 * 1024 * 1024):
+        '''
+            @param directory: str, The directory of the cache. Created if it does not exist.
+            @param maxBytes: int, The size the entries are evicted down to, in bytes. `None` means they are never evicted.
+        '''
+        self.__directory = directory
+        self.__maxBytes = maxBytes
+        self.__size = None      # The size of the entries, as last scanned & since written by this instance
+        self.__hits = 0
+        self.__misses = 0
+        self.__stores = 0
+        self.__evictions = 0
+        self.__lock = threading.Lock()      # Guards the statistics & the size
+        try:
+            os.makedirs(directory)
+        except OSError, err:
+            if err.errno != errno.EEXIST:
+                raise
+
+    # Properties
+    @property       # str
+    def Directory(self): return self.__directory
+
+    @property       # int
+    def MaxBytes(self): return self.__maxBytes
+    @MaxBytes.setter
+    def MaxBytes(self, value): self.__maxBytes = value
+
+    @property       # int
+    def Hits(self): return self.__hits
+
+    @property       # int
+    def Misses(self): return self.__misses
+
+    @property       # int, The entries written by this instance
+    def Stores(self): return self.__stores
+
+    @property       # int, The entries removed by this instance
+    def Evictions(self): return self.__evictions
+
+    # @return: dict, The statistics of this instance & the size of the entries in bytes, as last known.
+    @property
+    def Stats(self):
+        with self.__lock:
+            return {"hits": self.__hits, "misses": self.__misses, "stores": self.__stores, "evictions": self.__evictions, "bytes": self.__size}
+
+    # Methods
+    @staticmethod
+    def Key(fingerprint, text, *args):
+        '''
+            @param fingerprint: str, The fingerprint of the highlighter. See SyntaxHighlighter.GetFingerprint.
+            @param text: str|unicode|buffer, The text highlighted. Unicode is hashed as UTF-8.
+            @param args: Anything else the output depends on, hashed by its `repr`. Eg: the title of the document.
+            @return: str, The key of the output.
+        '''
+        digest = hashlib.sha1()
+        digest.update(fingerprint)
+        digest.update(repr(args))
+        digest.update("u" if isinstance(text, unicode) else "s")
+        digest.update(text.encode("utf-8") if isinstance(text, unicode) else text)
+        return digest.hexdigest()
+
+    def Open(self, key):
+        '''
+            @param key: str, The key of the entry. See `Key`.
+            @return: file, The entry opened for reading in binary mode. `None` if it is not cached.
+        '''
+        path = self.__Path(key)
+        try:
+            f = open(path, "rb")
+        except IOError:
+            with self.__lock:
+                self.__misses += 1
+            return None
+        try:
+            os.utime(path, None)    # Most recently used
+        except OSError:             # Evicted meanwhile, still readable
+            pass
+        with self.__lock:
+            self.__hits += 1
+        return f
+
+    def Get(self, key):
+        '''
+            @param key: str, The key of the entry. See `Key`.
+            @return: str, The cached output. `None` if it is not cached.
+        '''
+        f = self.Open(key)
+        if f is None:
+            return None
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def Put(self, key, output):
+        '''
+            @param key: str, The key of the entry. See `Key`.
+            @param output: str, The output to cache.
+        '''
+        for unused_chunk in self.Store(key, [output]):
+            pass
+
+    def Store(self, key, chunks, valid=None):
+        '''
+            @param key: str, The key of the entry. See `Key`.
+            @param chunks: iterable(str), The output to cache, in chunks.
+            @param valid: function(), Returns False if the output must not be cached after all. Checked once all the chunks are written.
+            @return: generator, The chunks, as they are written to the entry.
+
+            @summary: Caches the output while it is consumed. The entry is only added if all the chunks are consumed & valid, otherwise it is discarded.
+        '''
+        fd, temp = tempfile.mkstemp(prefix=self.TempPrefix, dir=self.__directory)
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            if valid is None or valid():
+                path = self.__Path(key)
+                try:
+                    os.mkdir(os.path.dirname(path))
+                except OSError, err:
+                    if err.errno != errno.EEXIST:
+                        raise
+                os.rename(temp, path)   # Atomic. Replaces an entry stored meanwhile by another process, which is the same output
+                temp = None
+                with self.__lock:
+                    self.__stores += 1
+                    if self.__size is not None:
+                        self.__size += size
+                    evict = self.__maxBytes is not None and (self.__size is None or self.__size > self.__maxBytes)
+                if evict:
+                    self.Evict()
+        finally:
+            if temp is not None:
+                os.remove(temp)
+
+    def Evict(self):
+        '''
+            @summary: Removes the least recently used entries till they take no more than `MaxBytes`.
+        '''
+        self.__Evict(self.__maxBytes)
+
+    def Clear(self):
+        '''
+            @summary: Removes all the entries.
+        '''
+        self.__Evict(0)
+
+    # Helper Methods
+    def __Evict(self, maxBytes):
+        entries = list()    # tuple(mtime, size, path)
+        for name in os.listdir(self.__directory):
+            folder = os.path.join(self.__directory, name)
+            if name.startswith(self.TempPrefix) or not os.path.isdir(folder):
+                continue
+            for entry in os.listdir(folder):
+                path = os.path.join(folder, entry)
+                try:
+                    st = os.stat(path)
+                except OSError:     # Removed meanwhile
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        size = sum([ entrySize for unused_mtime, entrySize, unused_path in entries ])
+        evictions = 0
+        if maxBytes is not None:
+            entries.sort()
+            for unused_mtime, entrySize, path in entries:
+                if size <= maxBytes:
+                    break
+                try:
+                    os.remove(path)
+                    evictions += 1
+                except OSError:     # Removed by another process or thread
+                    pass
+                size -= entrySize
+        with self.__lock:
+            self.__size = size
+            self.__evictions += evictions
+
+    def __Path(self, key):
+        return os.path.join(self.__directory, key[:2], key)
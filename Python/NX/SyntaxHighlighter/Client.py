@@ -0,0 +1,136 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module talks to a running highlight daemon (See Server.HighlightDaemon) over its local socket. It imports no highlighter.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import errno
+import json
+import os
+import socket
+
+'''
+    Client
+
+    Classes included:
+    + DaemonError      :    Raised when the daemon refuses or fails a request.
+    + DaemonBusy       :    Raised when the queue of the daemon is full.
+    + HighlightClient  :    Sends the texts to highlight to the daemon.
+'''
+
+# @note: The socket of the daemon, unless given. See Server.HighlightDaemon
+DefaultSocket = os.environ.get("NX_DAEMON_SOCKET") or os.path.join(os.path.expanduser("~"), ".cache", "nx-syntaxhighlighter", "daemon.sock")
+
+class DaemonError(Exception):
+    '''
+        @summary: Raised when the daemon fails a request. The message is that of the daemon.
+    '''
+    pass
+
+class DaemonBusy(DaemonError):
+    '''
+        @summary: Raised when the queue of the daemon is full. The request can be retried later or highlighted locally.
+    '''
+    pass
+
+class HighlightClient(object):
+    '''
+        @summary: Sends the texts to highlight to the daemon over its Unix socket, one request per connection.
+                  A request is a line of JSON, {"highlighter": name, "title": str|null, "cssClasses": bool, "length": #Bytes}, followed by the text.
+                  The response is a line of JSON, {"status": "ok"|"busy"|"error", "length": #Bytes, "message": str}, followed by the output.
+    '''
+    def __init__(self, path=None, timeout=30.0):
+        '''
+            @param path: str, The socket of the daemon. Default: `DefaultSocket`.
+            @param timeout: float, The seconds to wait on the daemon.
+        '''
+        self.__path = path or DefaultSocket
+        self.__timeout = timeout
+
+    # Properties
+    @property       # str
+    def Path(self): return self.__path
+
+    # Methods
+    def IsRunning(self):
+        '''
+            @return: bool, True if a daemon accepts connections on the socket.
+        '''
+        if not os.path.exists(self.__path):
+            return False
+        try:
+            self.__Connect().close()
+            return True
+        except socket.error:
+            return False
+
+    def Highlight(self, text, highlighter, formatDocument=None, cssClasses=False):
+        '''
+            @param text: str, The text to highlight.
+            @param highlighter: str, The name or alias of the highlighter, as registered in the daemon.
+            @param formatDocument: str, The title of the document. Same as for SyntaxHighlighter.Highlight.
+            @param cssClasses: bool, If the rules are written as CSS classes. See SyntaxHighlighter.CssClasses.
+            @return: str, The formatted text.
+            @raise socket.error: If the daemon is not running.
+            @raise DaemonBusy: If the queue of the daemon is full, or it accepts no more connections.
+            @raise DaemonError: If the daemon failed the request. Eg: for an unknown highlighter.
+        '''
+        if isinstance(text, unicode):
+            text = text.encode("utf-8")
+        try:
+            connection = self.__Connect()
+        except socket.error, err:
+            if err.errno == errno.EAGAIN:   # The backlog of the socket is full
+                raise DaemonBusy("The daemon accepts no more connections.")
+            raise
+        try:
+            header = {"highlighter": highlighter, "title": formatDocument, "cssClasses": cssClasses, "length": len(text)}
+            try:
+                connection.sendall(json.dumps(header) + "\n" + text)
+            except socket.error, err:
+                if err.errno not in (errno.EPIPE, errno.ECONNRESET):
+                    raise
+                # @note: A busy daemon replies & closes without reading the request. The reply is read below.
+            reader = connection.makefile("rb")
+            response = json.loads(reader.readline() or "{}")
+            output = reader.read(response.get("length", 0))
+            reader.close()
+        finally:
+            connection.close()
+        if response.get("status") == "busy":
+            raise DaemonBusy(response.get("message", "The daemon is busy."))
+        if response.get("status") != "ok":
+            raise DaemonError(response.get("message", "The daemon closed the connection."))
+        return output
+
+    # Helper Methods
+    def __Connect(self):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self.__timeout)
+        try:
+            connection.connect(self.__path)
+        except socket.error:
+            connection.close()
+            raise
+        return connection
@@ -0,0 +1,294 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module reads the languages defined as data (JSON) & builds their highlighters. The rules built are kept as snapshots, so a highlighter is built from its definition only once.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import errno
+import hashlib
+import json
+import marshal
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from NX.Enum import Color
+from NX.Main import FontStyle
+from NX.SyntaxHighlighter import Base
+from NX.SyntaxHighlighter.Base import SyntaxHighlighter, HighlightRules, HighlightRule, HighlightRegex, HighlightColor, HighlightFont
+
+'''
+    Definition
+
+    Classes included:
+    + LanguageDefinition        :    A language defined as data. Builds the rules of its highlighter, through a snapshot of them.
+    + DefinitionHighlighter     :    Highlighter of a LanguageDefinition. Extend it & set `Definition`, or see `FromDefinition`.
+'''
+
+class LanguageDefinition(object):
+    '''
+        @summary: A language defined as data, Eg: Highlighters/Languages/cpp.json
+                      {
+                          "name": "cpp",
+                          "font": ["Consolas", 12, "Regular"],
+                          "words": {"Keywords": "if|else|while"},
+                          "rules": [
+                              {"key": "dquote", "regex": {"builder": "QuotedString", "args": ["dquote", "\\""]}, "color": "E60000"},
+                              {"key": "keyword", "regex": {"builder": "LanguageWords", "args": ["keyword", {"words": "Keywords"}]}, "color": "Purple", "font": "Bold"},
+                              {"key": "option", "regex": "(?P<option>\\\\s+--?\\\\w+)", "backcolor": "PapayaWhip", "dependencies": ["keyword"]}
+                          ]
+                      }
+                  `font` is the default font of the highlighter & is optional. The `words` are set as attributes of the highlighter.
+                  The rules are added in order. A `regex` is either a regex or the call of a HighlightRegex method, whose args may refer to the words.
+                  Colors are the names of NX.Enum.Color or hex strings. A `font` is a FontStyle, Eg: "Bold|Italic", of the default font, or [name, size, style].
+                  A rule can have only `dependencies`, for the groups of other rules. A `comment` is ignored.
+        @note: The rules built are kept as snapshots, in this process & in `SnapshotDirectory`. A snapshot is built again when the definition, the words,
+               the default font, the version or Base.py change. Snapshots that cannot be written are only kept in this process.
+    '''
+    Directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Highlighters", "Languages")     # The definitions of the in-built highlighters
+    SnapshotDirectory = os.environ.get("NX_SNAPSHOTS") or os.path.join(os.path.expanduser("~"), ".cache", "nx-syntaxhighlighter")   # `None` means the snapshots are not written
+    SnapshotVersion = 1
+    RuleFields = ("key", "comment", "regex", "color", "backcolor", "font", "dependencies")
+
+    __definitions = dict()      # Path: LanguageDefinition
+    __snapshots = dict()        # Key: snapshot. See `GetRules`
+
+    def __init__(self, data, source="<definition>"):
+        '''
+            @param data: dict, The definition. See the class.
+            @param source: str, Where the definition was read from. Used in the errors.
+            @raise ValueError: If the definition is not valid.
+        '''
+        data = self.__Str(data)
+        self.__source = source
+        if not isinstance(data, dict) or not isinstance(data.get("name"), str) or not isinstance(data.get("rules"), list):
+            raise ValueError("%s: A definition needs a `name` & a list of `rules`." % source)
+        self.__name = data["name"]
+        self.__words = OrderedDict(data.get("words", ()))
+        self.__font = data.get("font")
+        if self.__font is not None:
+            self.__font = (self.__font[0], self.__font[1], self.Style(self.__font[2]))
+        self.__rules = data["rules"]
+        for rule in self.__rules:
+            self.__Check(rule)
+        self.__digest = hashlib.sha1(json.dumps(data, sort_keys=True)).hexdigest()
+
+    # Properties
+    @property       # str
+    def Name(self): return self.__name
+
+    @property       # OrderedDict(name: str), The words of the language, Eg: keywords
+    def Words(self): return self.__words
+
+    @property       # tuple(name, size, FontStyle), The default font. `None` means that of the SyntaxHighlighter
+    def Font(self): return self.__font
+
+    @property       # str, A hash of the definition
+    def Digest(self): return self.__digest
+
+    # Methods
+    @classmethod
+    def Load(cls, definition):
+        '''
+            @param definition: str, The path of a definition, or the name of an in-built one in `Directory`.
+            @return: LanguageDefinition, The definition. Read once per path.
+            @raise IOError: If there is no such definition.
+            @raise ValueError: If the definition is not valid.
+        '''
+        path = definition if os.path.isfile(definition) else os.path.join(cls.Directory, definition + ".json")
+        loaded = cls.__definitions.get(path)
+        if loaded is None:
+            with open(path, "rb") as f:
+                loaded = cls.__definitions[path] = cls(json.load(f, object_pairs_hook=OrderedDict), path)
+        return loaded
+
+    def GetRules(self, words, defaultFont):
+        '''
+            @param words: dict(name: str), The words the rules refer to, as set in the highlighter.
+            @param defaultFont: HighlightFont, The default font of the highlighter.
+            @return: HighlightRules, New rules built from the snapshot of the definition for the words & the font.
+        '''
+        key = hashlib.sha1(repr((self.SnapshotVersion, SyntaxHighlighter._versionMax, SyntaxHighlighter._versionMin, self.__BaseStamp(),
+                                 self.__digest, sorted(words.items()), (defaultFont.FontName, defaultFont.FontSize, defaultFont.Style)))).hexdigest()
+        snapshot = self.__snapshots.get(key)
+        if snapshot is None:
+            snapshot = self.__ReadSnapshot(key)
+            if snapshot is None:
+                snapshot = self.BuildRules(words, defaultFont).GetSnapshot()
+                self.__WriteSnapshot(key, snapshot)
+            self.__snapshots[key] = snapshot
+        return HighlightRules.FromSnapshot(snapshot)
+
+    def BuildRules(self, words, defaultFont):
+        '''
+            @param words: dict(name: str), The words the rules refer to, as set in the highlighter.
+            @param defaultFont: HighlightFont, The default font of the highlighter.
+            @return: HighlightRules, The rules built from the definition, without a snapshot.
+        '''
+        rules = HighlightRules(None, None)
+        for rule in self.__rules:
+            regex = rule.get("regex")
+            if isinstance(regex, dict):
+                args = [ words[arg["words"]] if isinstance(arg, dict) else arg for arg in regex.get("args", ()) ]
+                regex = getattr(HighlightRegex, regex["builder"])(*args)
+            font = rule.get("font")
+            if isinstance(font, list):
+                font = HighlightFont(font[0], font[1], self.Style(font[2]))
+            elif font is not None:
+                font = HighlightFont(defaultFont.FontName, defaultFont.FontSize, self.Style(font))
+            highlightRule = None
+            if regex is not None or rule.get("color") or rule.get("backcolor") or font is not None:
+                highlightRule = HighlightRule(regex, self.Color(rule.get("color")), self.Color(rule.get("backcolor")), font)
+            rules.AddRule(rule["key"], highlightRule, rule.get("dependencies"))
+        return rules
+
+    @staticmethod
+    def Color(value):
+        '''
+            @param value: str, The name of a color in NX.Enum.Color, or a hex string.
+            @return: HighlightColor, The color. `None` for `None`.
+            @raise ValueError: If it is neither.
+        '''
+        if value is None:
+            return None
+        if re.match(r'^[0-9A-Fa-f]{6}$', value) is None:
+            if not isinstance(getattr(Color, value, None), str) or value.startswith("_"):
+                raise ValueError("Unknown color '%s'." % value)
+            value = getattr(Color, value)
+        return HighlightColor(value)
+
+    @staticmethod
+    def Style(value):
+        '''
+            @param value: str|int, The FontStyle flags, by their names ORed, Eg: "Bold|Italic".
+            @return: int, The FontStyle.
+            @raise ValueError: If a name is not a FontStyle.
+        '''
+        if isinstance(value, (int, long)):
+            return value
+        style = FontStyle.Empty
+        for name in value.split("|"):
+            if not isinstance(getattr(FontStyle, name.strip(), None), int):
+                raise ValueError("Unknown font style '%s'." % name)
+            style |= getattr(FontStyle, name.strip())
+        return style
+
+    # Helper Methods
+    def __Check(self, rule):
+        '''
+            @raise ValueError: If the rule is not valid. The regexes & the colors are checked when the rules are built.
+        '''
+        if not isinstance(rule, dict) or not isinstance(rule.get("key"), str):
+            raise ValueError("%s: A rule needs a `key`." % self.__source)
+        unknown = [ field for field in rule.keys() if field not in self.RuleFields ]
+        if unknown:
+            raise ValueError("%s: Unknown fields %s in the rule '%s'." % (self.__source, ", ".join(unknown), rule["key"]))
+        regex = rule.get("regex")
+        if isinstance(regex, dict):
+            builder = regex.get("builder")
+            if not isinstance(builder, str) or builder.startswith("_") or not callable(getattr(HighlightRegex, builder, None)):
+                raise ValueError("%s: Unknown builder '%s' in the rule '%s'." % (self.__source, builder, rule["key"]))
+            for arg in regex.get("args", ()):
+                if isinstance(arg, dict) and not self.__words.has_key(arg.get("words")):
+                    raise ValueError("%s: Unknown words %s in the rule '%s'." % (self.__source, arg.get("words"), rule["key"]))
+
+    @classmethod
+    def __Str(cls, value):
+        '''
+            @return: The value with the unicode strings read from JSON as str, so the regexes & the output are str as with the rules built in code.
+        '''
+        if isinstance(value, unicode):
+            return value.encode("utf-8")
+        if isinstance(value, list):
+            return [ cls.__Str(item) for item in value ]
+        if isinstance(value, dict):
+            return OrderedDict([ (cls.__Str(k), cls.__Str(v)) for k, v in value.items() ])
+        return value
+
+    @staticmethod
+    def __BaseStamp():
+        '''
+            @return: tuple, The modification time & size of Base.py, which has the HighlightRegex builders.
+        '''
+        try:
+            st = os.stat(os.path.splitext(Base.__file__)[0] + ".py")
+            return (st.st_mtime, st.st_size)
+        except OSError:     # Only compiled
+            return None
+
+    def __ReadSnapshot(self, key):
+        if self.SnapshotDirectory is None:
+            return None
+        try:
+            with open(os.path.join(self.SnapshotDirectory, key + ".snapshot"), "rb") as f:
+                return marshal.load(f)
+        except (IOError, EOFError, ValueError, TypeError):  # Not written yet or unreadable
+            return None
+
+    def __WriteSnapshot(self, key, snapshot):
+        if self.SnapshotDirectory is None:
+            return
+        try:
+            try:
+                os.makedirs(self.SnapshotDirectory)
+            except OSError, err:
+                if err.errno != errno.EEXIST:
+                    raise
+            fd, temp = tempfile.mkstemp(prefix=".tmp-", dir=self.SnapshotDirectory)
+            with os.fdopen(fd, "wb") as f:
+                marshal.dump(snapshot, f)
+            os.rename(temp, os.path.join(self.SnapshotDirectory, key + ".snapshot"))    # Atomic, for the processes building it at once
+        except (IOError, OSError):  # Kept in this process only
+            pass
+
+class DefinitionHighlighter(SyntaxHighlighter):
+    '''
+        @summary: Highlighter of a LanguageDefinition. Its words are set as attributes & can be replaced through `keywords` & `commands`, as with the other highlighters.
+    '''
+    Definition = None   # str, The path of the definition, or the name of an in-built one. See LanguageDefinition.Load
+
+    # Init
+    def __init__(self, highlightRules=None, defaultForeground=None, defaultBackground=None, defaultFont=None, keywords=None, commands=None, defaultWriter=None):
+        self._definition = LanguageDefinition.Load(self.Definition)
+        if defaultFont is None and self._definition.Font is not None:
+            defaultFont = HighlightFont(*self._definition.Font)
+        super(DefinitionHighlighter, self).__init__(highlightRules, defaultForeground, defaultBackground, defaultFont, keywords, commands, defaultWriter)
+
+    # Methods
+    @classmethod
+    def FromDefinition(cls, definition):
+        '''
+            @param definition: str, The path of a definition, or the name of an in-built one.
+            @return: class, A highlighter class of the definition.
+        '''
+        name = LanguageDefinition.Load(definition).Name
+        return type(re.sub(r'\W', '', name.title()) + "Highlighter", (cls,), {"Definition": definition})
+
+    # Overridden Methods
+    def SetLanguageWords(self):
+        for name, words in self._definition.Words.items():
+            setattr(self, name, words)
+
+    def SetDefaultRules(self):
+        self._highlightRules = self._definition.GetRules(dict([ (name, getattr(self, name)) for name in self._definition.Words.keys() ]), self.DefaultFont)
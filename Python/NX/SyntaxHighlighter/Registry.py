@@ -0,0 +1,157 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module maps the names, aliases & file extensions of the highlighters to their classes. A class is imported only when it is looked up.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import os
+
+'''
+    Registry
+
+    Classes included:
+    + HighlighterRegistry    :    Maps the names, aliases & file extensions to the import paths of the highlighters.
+'''
+
+class HighlighterRegistry(object):
+    '''
+        @summary: Maps the names, aliases & file extensions of the highlighters to their import paths, "package.module:Class".
+        @note: Third-party highlighters register through the entry points of `EntryPointGroup`, Eg: in setup.py
+                   entry_points={"nx.highlighters": ["rust = nx_rust:RustHighlighter", ".rs = nx_rust:RustHighlighter"]}
+               An entry point named with a leading dot maps a file extension. The entry points are only read when a name or extension is not registered.
+    '''
+    EntryPointGroup = "nx.highlighters"
+
+    def __init__(self):
+        self.__paths = dict()           # Name: import path
+        self.__aliases = dict()         # Name or alias: name
+        self.__extensions = dict()      # Extension: name
+        self.__classes = dict()         # Name: class, once imported
+        self.__entryPoints = False      # If the entry points have been read
+
+    # Properties
+    # @return: list(str), The names of the registered highlighters, without the aliases.
+    @property
+    def Names(self): return sorted(self.__paths.keys())
+
+    # Methods
+    def Register(self, name, path, aliases=(), extensions=()):
+        '''
+            @param name: str, The name of the highlighter.
+            @param path: str|class, The import path of the class, "package.module:Class", the path of a language definition, "path/language.json", or the class itself.
+            @param aliases: list(str), Other names of the highlighter.
+            @param extensions: list(str), The file extensions of the language, with the leading dot. Eg: ".py"
+
+            @summary: Registers the highlighter, replacing any registered with the same name, alias or extension.
+        '''
+        name = name.lower()
+        if isinstance(path, basestring):
+            self.__paths[name] = path
+            self.__classes.pop(name, None)
+        else:
+            self.__paths[name] = "%s:%s" % (path.__module__, path.__name__)
+            self.__classes[name] = path
+        for alias in (name,) + tuple(aliases):
+            self.__aliases[alias.lower()] = name
+        for extension in extensions:
+            self.__extensions[extension.lower()] = name
+
+    def Resolve(self, name):
+        '''
+            @param name: str, A name or alias of a highlighter.
+            @return: str, The name of the highlighter. `None` if it is not registered.
+        '''
+        name = name.lower()
+        if not self.__aliases.has_key(name) and self.ReadEntryPoints():
+            return self.Resolve(name)
+        return self.__aliases.get(name)
+
+    def ForFile(self, filename):
+        '''
+            @param filename: str, A file name or path.
+            @return: str, The name of the highlighter of the file's extension. `None` if it is not registered.
+        '''
+        extension = os.path.splitext(filename)[1].lower()
+        if not extension:
+            return None
+        if not self.__extensions.has_key(extension) and self.ReadEntryPoints():
+            return self.ForFile(filename)
+        return self.__extensions.get(extension)
+
+    def GetClass(self, name):
+        '''
+            @param name: str, A name or alias of a highlighter.
+            @return: class, The highlighter's class. Its module is imported on the first lookup.
+            @raise KeyError: If the highlighter is not registered.
+        '''
+        resolved = self.Resolve(name)
+        if resolved is None:
+            raise KeyError("The highlighter '%s' is not supported/cannot be found." % name)
+        cls = self.__classes.get(resolved)
+        if cls is None:
+            path = self.__paths[resolved]
+            if path.endswith(".json"):  # See Definition.LanguageDefinition
+                from NX.SyntaxHighlighter.Definition import DefinitionHighlighter
+                cls = DefinitionHighlighter.FromDefinition(path)
+            else:
+                module, unused_sep, attribute = path.partition(":")
+                cls = __import__(module, fromlist=[attribute])
+                for part in attribute.split("."):
+                    cls = getattr(cls, part)
+            self.__classes[resolved] = cls
+        return cls
+
+    def ReadEntryPoints(self):
+        '''
+            @return: bool, True if the entry points were read by this call. They are read once.
+
+            @summary: Registers the highlighters of the entry points of `EntryPointGroup`. The classes are not imported.
+            @note: Requires setuptools (pkg_resources). Without it there are no entry points.
+        '''
+        if self.__entryPoints:
+            return False
+        self.__entryPoints = True
+        try:
+            import pkg_resources
+        except ImportError:
+            return False
+        entryPoints = sorted(pkg_resources.iter_entry_points(self.EntryPointGroup), key=lambda ep: ep.name.startswith("."))  # Names before extensions
+        for ep in entryPoints:
+            path = "%s:%s" % (ep.module_name, ".".join(ep.attrs))
+            if not ep.name.startswith("."):
+                if not self.__paths.has_key(ep.name.lower()):   # Registered highlighters take precedence
+                    self.Register(ep.name, path)
+            elif not self.__extensions.has_key(ep.name.lower()):
+                names = [ name for name in sorted(self.__paths.keys()) if self.__paths[name] == path ]
+                self.Register(names[0] if names else path, path, (), (ep.name,))   # Named by its path if no entry point names it
+        return True
+
+# @note: The registry of the in-built highlighters.
+# @attention: Register custom highlighters here or through the entry points. See HighlighterRegistry.
+Highlighters = HighlighterRegistry()
+Highlighters.Register("basic", "NX.SyntaxHighlighter.Highlighters.Internal:BasicHighlighter")
+Highlighters.Register("bash", "NX.SyntaxHighlighter.Highlighters.Internal:BashHighlighter", ("sh", "shell"), (".sh", ".bash"))
+Highlighters.Register("cpp", "NX.SyntaxHighlighter.Highlighters.Internal:CppHighlighter", ("c", "c++", "cxx"), (".c", ".h", ".cpp", ".cc", ".cxx", ".hpp", ".hh", ".hxx"))
+Highlighters.Register("csharp", "NX.SyntaxHighlighter.Highlighters.Internal:CSharpHighlighter", ("cs", "c#"), (".cs",))
+Highlighters.Register("python", "NX.SyntaxHighlighter.Highlighters.Internal:PythonHighlighter", ("py",), (".py", ".pyw"))
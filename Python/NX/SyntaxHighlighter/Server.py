@@ -0,0 +1,337 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module keeps warm highlighters in a long-running daemon, serving requests over a Unix socket & over HTTP on localhost.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import BaseHTTPServer
+import errno
+import json
+import os
+import Queue
+import socket
+import SocketServer
+import threading
+import urlparse
+from NX.SyntaxHighlighter.Client import DefaultSocket
+from NX.SyntaxHighlighter.Registry import Highlighters
+
+'''
+    Server
+
+    Classes included:
+    + RequestTooLarge    :    Raised for a request whose text is longer than the daemon accepts.
+    + HighlightDaemon    :    Owns the bounded queue & the pool of workers, each keeping its own warm highlighters.
+    + PoolMixIn          :    Hands the connections of a SocketServer to the workers of a HighlightDaemon, refusing them when its queue is full.
+    + SocketHandler      :    Serves a request of the Unix socket protocol. See Client.HighlightClient.
+    + HttpHandler        :    Serves `POST /highlight` & `GET /status` over HTTP.
+'''
+
+class RequestTooLarge(ValueError):
+    '''
+        @summary: Raised for a request whose text is longer than `HighlightDaemon.MaxLength`.
+    '''
+
+class HighlightDaemon(object):
+    '''
+        @summary: Serves the highlight requests of the Unix socket & of HTTP from one pool of worker threads.
+                  A connection waits in a queue of `queueSize` for a free worker. Once the queue is full the connections are refused at once, as `busy` or HTTP 503.
+                  Every worker keeps the highlighters it has built, so a request only pays for highlighting its text.
+        @note: The workers are threads, so the daemon highlights on one core. Run a daemon per core behind separate sockets to use more.
+    '''
+    def __init__(self, socketPath=None, port=None, workers=4, queueSize=64, timeout=30.0, renderCache=None, maxLength=64 * 1024 * 1024):
+        '''
+            @param socketPath: str, The Unix socket to listen on. Default: Client.DefaultSocket. `False` means none.
+            @param port: int, The port to listen on over HTTP, on localhost only. `None` means none.
+            @param workers: int, The number of requests served at once.
+            @param queueSize: int, The number of connections that may wait for a worker.
+            @param timeout: float, The seconds a worker waits on a client.
+            @param renderCache: Cache.RenderCache, The cache the highlighters share. `None` means no cache.
+            @param maxLength: int, The longest text of a request, in bytes. Longer requests are refused before their text is read.
+        '''
+        self.__socketPath = DefaultSocket if socketPath is None else socketPath
+        self.__port = port
+        self.__workers = workers
+        self.__queue = Queue.Queue(queueSize)
+        self.__timeout = timeout
+        self.__renderCache = renderCache
+        self.__maxLength = maxLength
+        self.__servers = list()
+        self.__threads = list()
+        self.__local = threading.local()    # The highlighters of a worker
+        self.__lock = threading.Lock()
+        self.__stats = {"served": 0, "busy": 0, "errors": 0}
+
+    # Properties
+    @property       # int
+    def Timeout(self): return self.__timeout
+
+    @property       # int
+    def MaxLength(self): return self.__maxLength
+
+    # @return: dict, The number of requests served, refused as busy & failed, & the connections waiting.
+    @property
+    def Stats(self):
+        with self.__lock:
+            stats = dict(self.__stats)
+        stats["queued"] = self.__queue.qsize()
+        return stats
+
+    # @return: list(str), The addresses listened on.
+    @property
+    def Addresses(self): return [ server.server_address if isinstance(server.server_address, str) else "http://%s:%d" % server.server_address for server in self.__servers ]
+
+    # Methods
+    def Start(self):
+        '''
+            @summary: Binds the socket & the port & starts the workers & the listeners. Returns at once. See `Stop`.
+            @raise socket.error: If another daemon is listening on the socket, or the port is taken.
+        '''
+        if self.__socketPath:
+            self.__servers.append(PoolUnixServer(self, self.__socketPath, SocketHandler))
+        if self.__port is not None:
+            self.__servers.append(PoolHttpServer(self, ("127.0.0.1", self.__port), HttpHandler))
+        for unused_i in range(self.__workers):
+            self.__Spawn(self.Work)
+        for server in self.__servers:
+            self.__Spawn(server.serve_forever)
+
+    def Stop(self):
+        '''
+            @summary: Stops listening, lets the workers finish the connections queued & removes the socket.
+        '''
+        for server in self.__servers:
+            server.shutdown()
+            server.server_close()
+        for unused_i in range(self.__workers):
+            self.__queue.put(None)  # Queued after the connections, so these are served first
+        for thread in self.__threads:
+            thread.join()
+        if self.__socketPath and os.path.exists(self.__socketPath):
+            os.remove(self.__socketPath)
+        self.__servers = list()
+        self.__threads = list()
+
+    def Enqueue(self, server, request, address):
+        '''
+            @return: bool, True if the connection was queued for a worker. False if the queue is full.
+        '''
+        try:
+            self.__queue.put_nowait((server, request, address))
+            return True
+        except Queue.Full:
+            self.Count("busy")
+            return False
+
+    def Work(self):
+        '''
+            @summary: The loop of a worker. Serves the queued connections till `Stop`.
+        '''
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                return
+            server, request, address = item
+            try:
+                request.settimeout(self.__timeout)
+                server.finish_request(request, address)
+            except Exception:   # A failed request does not stop the worker
+                self.Count("errors")
+            finally:
+                server.shutdown_request(request)
+
+    def Highlight(self, text, name, formatDocument=None, cssClasses=False):
+        '''
+            @param text: str, The text to highlight.
+            @param name: str, The name or alias of the highlighter. See Registry.Highlighters.
+            @param formatDocument: str, The title of the document. Same as for SyntaxHighlighter.Highlight.
+            @param cssClasses: bool, If the rules are written as CSS classes.
+            @return: str, The formatted text.
+            @raise KeyError: If the highlighter is not registered.
+
+            @summary: Highlights with the highlighter of the calling worker. See `GetHighlighter`.
+        '''
+        output = self.GetHighlighter(name, cssClasses).Highlight(text, formatDocument)
+        self.Count("served")
+        return output
+
+    def HighlightTo(self, text, name, sink, formatDocument=None, cssClasses=False):
+        '''
+            @param sink: NX.Main.WriterSink|file|socket, The destination of the formatted text. The other arguments are those of `Highlight`.
+            @return: int, The number of characters written.
+            @raise KeyError: If the highlighter is not registered. Raised before anything is written.
+        '''
+        written = self.GetHighlighter(name, cssClasses).HighlightTo(text, sink, formatDocument)
+        self.Count("served")
+        return written
+
+    def CheckLength(self, length):
+        '''
+            @param length: The length of the text of a request, as sent by the client.
+            @return: int, The length.
+            @raise ValueError: If it is not an integer of 0 or more.
+            @raise RequestTooLarge: If it is more than `MaxLength`.
+        '''
+        if not isinstance(length, (int, long)) or isinstance(length, bool) or length < 0:
+            raise ValueError("Invalid length: %r" % (length,))
+        if length > self.__maxLength:
+            raise RequestTooLarge("The text is longer than %d bytes." % self.__maxLength)
+        return length
+
+    def GetHighlighter(self, name, cssClasses=False):
+        '''
+            @return: SyntaxHighlighter, The highlighter of the calling worker, built on its first use. The arguments are those of `Highlight`.
+            @raise KeyError: If the highlighter is not registered.
+        '''
+        highlighters = getattr(self.__local, "highlighters", None)
+        if highlighters is None:
+            highlighters = self.__local.highlighters = dict()
+        key = (Highlighters.Resolve(name), cssClasses)
+        sh = highlighters.get(key)
+        if sh is None:
+            sh = Highlighters.GetClass(name)()
+            sh.CssClasses = cssClasses
+            sh.RenderCache = self.__renderCache
+            highlighters[key] = sh
+        return sh
+
+    def Count(self, stat):
+        with self.__lock:
+            self.__stats[stat] += 1
+
+    # Helper Methods
+    def __Spawn(self, target):
+        thread = threading.Thread(target=target)
+        thread.daemon = True
+        thread.start()
+        self.__threads.append(thread)
+
+class PoolMixIn:
+    '''
+        @summary: Hands the connections accepted by a SocketServer to the workers of its daemon. Refuses them through `Refuse` when the queue is full.
+    '''
+    request_queue_size = 128    # Connections not yet accepted. Accepting is quick, the queue of the daemon bounds the rest
+    def process_request(self, request, client_address):
+        if not self.daemon.Enqueue(self, request, client_address):
+            try:
+                request.settimeout(1.0)
+                self.Refuse(request)
+            except socket.error:
+                pass
+            self.shutdown_request(request)
+
+class PoolUnixServer(PoolMixIn, SocketServer.UnixStreamServer):
+    '''
+        @summary: The Unix socket of a daemon. A stale socket, left by a daemon that died, is replaced.
+    '''
+    def __init__(self, daemon, path, handler):
+        self.daemon = daemon
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise socket.error(errno.EADDRINUSE, "A daemon is already listening on %s" % path)
+            except socket.error, err:
+                if err.errno == errno.EADDRINUSE:
+                    raise
+                os.remove(path)
+            finally:
+                probe.close()
+        elif not os.path.isdir(os.path.dirname(path) or "."):
+            os.makedirs(os.path.dirname(path))
+        SocketServer.UnixStreamServer.__init__(self, path, handler)
+        os.chmod(path, 0600)    # The owner's only
+
+    def Refuse(self, request):
+        request.sendall(json.dumps({"status": "busy", "message": "The queue of the daemon is full."}) + "\n")
+
+class PoolHttpServer(PoolMixIn, BaseHTTPServer.HTTPServer):
+    '''
+        @summary: The HTTP port of a daemon, on localhost.
+    '''
+    def __init__(self, daemon, address, handler):
+        self.daemon = daemon
+        BaseHTTPServer.HTTPServer.__init__(self, address, handler)
+
+    def Refuse(self, request):
+        request.sendall("HTTP/1.0 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+
+class SocketHandler(SocketServer.StreamRequestHandler):
+    '''
+        @summary: Serves a request of the Unix socket protocol. See Client.HighlightClient.
+    '''
+    def handle(self):
+        try:
+            header = json.loads(self.rfile.readline())
+            text = self.rfile.read(self.server.daemon.CheckLength(header["length"]))   # Checked before reading, the client waits for the response
+            output = self.server.daemon.Highlight(text, header["highlighter"], header.get("title"), header.get("cssClasses", False))
+            response = {"status": "ok", "length": len(output)}
+        except (ValueError, KeyError, TypeError), err:
+            self.server.daemon.Count("errors")
+            output = ""
+            response = {"status": "error", "message": err.args[0] if err.args else str(err)}
+        self.wfile.write(json.dumps(response) + "\n" + output)
+
+class HttpHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    '''
+        @summary: Serves `POST /highlight?type=name&title=str&css=1` with the text as the body & `GET /status` with the statistics, as JSON.
+                  The output of `/highlight` is streamed as it is highlighted.
+    '''
+    def do_POST(self):
+        url = urlparse.urlparse(self.path)
+        query = dict(urlparse.parse_qsl(url.query))
+        if url.path != "/highlight":
+            return self.Respond(404, "text/plain", "Not found.")
+        name, cssClasses = query.get("type", "basic"), query.get("css", "0") not in ("", "0")
+        try:
+            length = self.headers.getheader("content-length") or "0"
+            text = self.rfile.read(self.server.daemon.CheckLength(int(length) if length.strip().isdigit() else length))
+            self.server.daemon.GetHighlighter(name, cssClasses)
+        except RequestTooLarge, err:
+            self.server.daemon.Count("errors")
+            return self.Respond(413, "text/plain", err.args[0])
+        except (ValueError, KeyError), err:
+            self.server.daemon.Count("errors")
+            return self.Respond(400, "text/plain", err.args[0] if err.args else str(err))
+        # @note: The output is streamed as it is highlighted, so its length is not known. The end of the response is the end of the connection.
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.server.daemon.HighlightTo(text, name, self.wfile, query.get("title"), cssClasses)
+
+    def do_GET(self):
+        if urlparse.urlparse(self.path).path != "/status":
+            return self.Respond(404, "text/plain", "Not found.")
+        self.Respond(200, "application/json", json.dumps(self.server.daemon.Stats))
+
+    def Respond(self, code, contentType, body):
+        self.send_response(code)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):   # Requests are not logged
+        pass
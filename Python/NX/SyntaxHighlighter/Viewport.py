@@ -0,0 +1,217 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: This Module renders ranges of lines of a large text on demand, for viewers that show a few lines of it at a time.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import array
+from collections import OrderedDict
+
+'''
+    Viewport
+
+    Classes included:
+    + DocumentView    :    Renders any range of lines of a text, lexing only from the nearest checkpoint. Keeps the rendered lines in an LRU cache.
+'''
+
+class DocumentView(object):
+    '''
+        @summary: Renders the lines of a text on demand, each formatted alone as `SyntaxHighlighter.Highlight` formats a text, without its line break.
+                  The starts of the lines & a checkpoint every `CheckpointLines` lines are found as far into the text as the lines rendered so far, & kept.
+                  A checkpoint is the position the root rules resume matching at for its line: the start of the first match not ending before the line.
+                  Matching from there finds the same matches as matching the whole text does, so a line in a multi-line comment or string is formatted as it would be in the whole text.
+                  Rendering a range lexes from the checkpoint before it, at most `CheckpointLines` lines more than the range. Thus the first lines render in a time independent of the size of the text,
+                  & a range far into the text is slow once, while the checkpoints up to it are found.
+        @note: The checkpoints & the rendered lines are discarded when the fingerprint of the highlighter changes, Eg: once its rules are edited. See SyntaxHighlighter.GetFingerprint.
+               The matches are not budgeted (See SyntaxHighlighter.MatchBudget), so a line is always formatted as in the whole text.
+        @attention: The view uses the writer of the highlighter, as `Highlight` does.
+    '''
+    CheckpointLines = 256
+
+    def __init__(self, highlighter, text, cacheLines=4096):
+        '''
+            @param highlighter: SyntaxHighlighter, The highlighter to render with.
+            @param text: str|unicode|mmap, The text. It must not change while viewed.
+            @param cacheLines: int, The number of rendered lines kept.
+        '''
+        self.__highlighter = highlighter
+        self.__text = text
+        self.__cacheLines = cacheLines
+        self.__lines = OrderedDict()            # #Line: The rendered line. Ordered from the least to the most recently used
+        self.__starts = array.array("l", [0])   # The start of every line found
+        self.__complete = False                 # If all the lines are found
+        self.__lineCount = None
+        self.__fingerprint = None
+        self.Reset()
+        self.Hits = 0
+        self.Misses = 0
+
+    # Properties
+    @property       # SyntaxHighlighter
+    def Highlighter(self): return self.__highlighter
+
+    @property       # str
+    def Text(self): return self.__text
+
+    # @return: int, The number of lines of the text. A text ending with a line break ends with an empty line.
+    @property
+    def LineCount(self):
+        if self.__lineCount is None:
+            self.__lineCount = self.__text.count("\n") + 1
+        return self.__lineCount
+
+    # @return: int, The number of checkpoints found
+    @property
+    def Checkpoints(self): return len(self.__checkpoints)
+
+    # Methods
+    def Reset(self):
+        '''
+            @summary: Discards the checkpoints & the rendered lines. Done by itself when the fingerprint of the highlighter changes.
+        '''
+        self.__lines.clear()
+        self.__checkpoints = array.array("l", [0])   # The position matching resumes at, for every `CheckpointLines` lines
+        self.__matches = None       # The matches of the root rules, resumed at the last checkpoint
+        self.__pending = None       # The match read last from `__matches` & not yet passed by a checkpoint
+        self.__fingerprint = self.__highlighter.GetFingerprint()
+
+    def LineRange(self, line):
+        '''
+            @param line: int, The #line, from 0.
+            @return: tuple(start, end), The range of the line in the text, without its line break.
+            @raise IndexError: If the text has fewer lines.
+        '''
+        start = self.__LineStart(line)
+        if start is None:
+            raise IndexError("Line %d out of range of the %d lines" % (line, self.LineCount))
+        end = self.__LineStart(line + 1)
+        return start, len(self.__text) if end is None else end - 1
+
+    def RenderLines(self, first, last):
+        '''
+            @param first: int, The first #line, from 0.
+            @param last: int, The #line to stop at. Clipped to the lines of the text.
+            @return: list(str), The formatted lines.
+            @raise IndexError: If `first` is out of range.
+        '''
+        if self.__highlighter.GetFingerprint() != self.__fingerprint:
+            self.Reset()
+        rendered = list()
+        missing = list()
+        line = first
+        while line < last and self.__LineStart(line) is not None:
+            output = self.__lines.pop(line, None)
+            if output is None:
+                missing.append(line)
+                self.Misses += 1
+            else:
+                self.__lines[line] = output     # The most recently used
+                self.Hits += 1
+            rendered.append(output)
+            line += 1
+        if line == first and first != last:
+            raise IndexError("Line %d out of range of the %d lines" % (first, self.LineCount))
+        if missing:
+            outputs = self.__Render(missing[0], missing[-1] + 1, set(missing))
+            for i in range(len(rendered)):
+                if rendered[i] is None:
+                    rendered[i] = outputs[first + i]
+                    self.__lines[first + i] = rendered[i]
+            while len(self.__lines) > self.__cacheLines:
+                self.__lines.popitem(last=False)    # Evict the least recently used
+        return rendered
+
+    # Helper Methods
+    def __LineStart(self, line):
+        '''
+            @return: int, The start of the line. `None` if the text has fewer lines.
+        '''
+        starts = self.__starts
+        while len(starts) <= line and not self.__complete:
+            pos = self.__text.find("\n", starts[-1])
+            if pos < 0:
+                self.__complete = True
+            else:
+                starts.append(pos + 1)
+        return starts[line] if line < len(starts) else None
+
+    def __Checkpoint(self, line):
+        '''
+            @return: int, The position matching resumes at for the nearest checkpoint at or before the line. Finds the checkpoints up to it first.
+        '''
+        k = line // self.CheckpointLines
+        while len(self.__checkpoints) <= k:
+            self.__Advance()
+        return self.__checkpoints[k]
+
+    def __Advance(self):
+        '''
+            @summary: Reads the matches up to the line of the next checkpoint & adds it.
+        '''
+        sh = self.__highlighter
+        if self.__matches is None:
+            self.__matches = sh.Rules.GetMatcher(None, sh._reFlags).Matches(self.__text, self.__checkpoints[-1])
+        start = self.__LineStart(len(self.__checkpoints) * self.CheckpointLines)
+        m = self.__pending
+        while m is None or m.end() <= start:    # A match ending before the line is passed
+            found = next(self.__matches, None)
+            m = found[0] if found is not None else None
+            if m is None:
+                break
+        self.__pending = m
+        self.__checkpoints.append(len(self.__text) if m is None else m.start())
+
+    def __Render(self, first, last, lines):
+        '''
+            @param lines: set(int), The #lines in [first, last) to format.
+            @return: dict, #Line: The formatted line.
+        '''
+        sh = self.__highlighter
+        begin = self.__LineStart(first)
+        end = self.LineRange(last - 1)[1]
+        spans = list()      # tuple(start, end, rule-key, depth), in document order
+        for m, unused_rule, groups in sh.Rules.GetMatcher(None, sh._reFlags).Matches(self.__text, self.__Checkpoint(first)):
+            if m.start() >= end:
+                break
+            if m.end() > begin:
+                spans.extend(sh.MatchSpans(m, groups, 0, 0))
+        writer = sh._outputWriter
+        outputs = dict()
+        i = 0
+        for line in range(first, last):
+            start, stop = self.LineRange(line)
+            while i < len(spans) and spans[i][1] <= start:     # The spans are by their start, those after it are checked below
+                i += 1
+            if line not in lines:
+                continue
+            writer.Clear()
+            writer.Text = self.__text[start:stop]
+            sh.PrepareWriter()
+            for s, e, key, unused_depth in spans[i:]:
+                if s >= stop:
+                    break
+                if e > start:
+                    sh.HighlightSpan(max(s, start) - start, min(e, stop) - start, key)
+            outputs[line] = writer.FormattedText
+        return outputs
@@ -0,0 +1,851 @@
+'''
+Created on Oct 17, 2026
+@author: Nisheeth Barthwal
+@contact: nbaztec@gmail.com
+@copyright: Nisheeth Barthwal, 2011
+@summary: Benchmarks for the highlighter. This module is not required for the library to work.
+
+@license:
+NX - Syntax Highlighter, an open source library for syntax highlighting in RTF and HTML
+    Copyright (C) 2011 Nisheeth Barthwal
+
+This file is part of NX - Syntax Highlighter.
+
+    NX - Syntax Highlighter is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    NX - Syntax Highlighter is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with NX - Syntax Highlighter.  If not, see <http://www.gnu.org/licenses/>.
+'''
+
+import getopt
+import random
+import sys
+import timeit
+
+# @note: Variables for script.
+benchmarks = None       # Benchmarks to run. Default: All
+repeat = 3              # Number of runs. The best is reported.
+sizes = [1024, 65536, 1048576]  # Sizes of the texts of the suite, in bytes.
+reportFile = None       # File to write the report of the suite to, as JSON.
+baselineFile = None     # Report to compare the suite against.
+threshold = 0.2         # Relative change of a measure of the suite that is a regression.
+
+def usage():
+    """
+        @summary: Prints the usage details for the program.
+    """
+    hlp = """Usage Options:
+          -b | --benchmark       : DEFAULT: all, Benchmark to run (%s). Can be repeated.
+          -r | --repeat          : DEFAULT: 3, Number of runs. The best run is reported.
+          -s | --sizes           : DEFAULT: 1K,64K,1M, Comma separated sizes of the texts of the suite. Eg: 1K,1M,50M
+          -j | --json            : File to write the report of the suite to.
+          -c | --compare         : Report of the suite to compare against. Regressions exit with the status 1.
+          -t | --threshold       : DEFAULT: 0.2, Relative increase of a measure of the suite that is reported as a regression.
+          """ % ", ".join(sorted(BENCHMARKS.keys()))
+    print hlp
+
+def getArgs():
+    """
+        @summary: Initializes the arguments for the program.
+    """
+    global benchmarks, repeat, sizes, reportFile, baselineFile, threshold
+    try:
+        opts, unused_args = getopt.getopt(sys.argv[1:], "b:r:s:j:c:t:h", ["benchmark=", "repeat=", "sizes=", "json=", "compare=", "threshold=", "help"])
+        for o,v in opts:
+            if o in ['-b', '--benchmark']:
+                if v not in BENCHMARKS:
+                    raise getopt.GetoptError("Unknown benchmark '%s'" % v)
+                benchmarks = (benchmarks or []) + [v]
+            elif o in ['-r', '--repeat']:
+                repeat = int(v)
+            elif o in ['-s', '--sizes']:
+                sizes = [ parseSize(size) for size in v.split(",") ]
+            elif o in ['-j', '--json']:
+                reportFile = v
+            elif o in ['-c', '--compare']:
+                baselineFile = v
+            elif o in ['-t', '--threshold']:
+                threshold = float(v)
+            elif o in ['-h', '--help']:
+                usage()
+                sys.exit(0)
+    except getopt.GetoptError, err:
+        print str(err)
+        usage()
+        sys.exit(2)
+
+def best(func):
+    """
+        @return: float, The best time in seconds among `repeat` runs of func.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+def benchDispatch():
+    """
+        @summary: Per-match cost of resolving the rules of a match, for an increasing number of rules.
+                  Every token of the text matches the first rule. `scan` is the cost of only iterating the matches, 
+                  which grows with the number of alternatives the regex engine tries. The dispatch columns are timed on the collected matches.
+                  `legacy` scans the groupdict of every match, as the engine did. It is limited to 100 groups by `re`.
+    """
+    from NX.SyntaxHighlighter.Base import HighlightRules, HighlightRule
+
+    text = "t0;" * 100000
+    matches = len(text) / 3
+    print "%-8s %8s %10s %16s %16s %16s" % ("rules", "regexes", "matches", "scan us/match", "table us/match", "legacy us/match")
+    for count in (10, 50, 95, 500, 2000):
+        rules = HighlightRules()
+        for i in range(count):
+            rules.AddRule("t%d" % i, HighlightRule(r'(?P<t%d>t%d;)' % (i, i)), None)
+        matcher = rules.GetMatcher()
+
+        def scan():
+            for unused_m, unused_rule, unused_groups in matcher.Matches(text):
+                pass
+        found = list(matcher.Matches(text))    # The dispatch is timed on the same match objects
+
+        def table():
+            for m, unused_rule, groups in found:
+                for groupIndex, unused_key in groups:
+                    m.start(groupIndex)
+
+        def legacy():
+            for m, unused_rule, unused_groups in found:
+                m_groups = m.groupdict()
+                for key in m_groups:
+                    if m_groups[key] is not None and rules.Has_Key(key[:key.rindex('_')]):
+                        m.start(key)
+
+        l = "%.3f" % (best(legacy) * 1e6 / matches) if len(matcher.Patterns) == 1 else "-"
+        print "%-8d %8d %10d %16.3f %16.3f %16s" % (count, len(matcher.Patterns), matches, best(scan) * 1e6 / matches, best(table) * 1e6 / matches, l)
+
+def benchWords():
+    """
+        @summary: Per-word cost of matching a word-list rule (See HighlightRegex.LanguageWords), for an increasing number of words.
+                  A tenth of the words of the text are in the list. `legacy` matches the words ORed in a plain alternation.
+    """
+    import re
+    from NX.SyntaxHighlighter.Base import HighlightRegex
+    
+    rnd = random.Random(0)
+    print "%-8s %10s %12s %14s" % ("words", "matches", "us/word", "legacy us/word")
+    for count in (10, 100, 1000, 10000):
+        words = sorted(set([ "".join([ rnd.choice("abcdefghijklmnopqrstuvwxyz_") for unused_j in range(rnd.randint(3, 10)) ]) for unused_i in range(count) ]))
+        others = [ w + "0" for w in words ]
+        text = " ".join([ rnd.choice(words) if rnd.random() < 0.1 else rnd.choice(others) for unused_i in range(100000) ])
+        tree = re.compile(HighlightRegex.LanguageWords("word", "|".join(words)), re.M)
+        legacy = re.compile(r'(?P<word>\b(?:' + "|".join(words) + r')\b)', re.M)
+        matches = len(tree.findall(text))
+        print "%-8d %10d %12.3f %14.3f" % (len(words), matches, best(lambda: tree.findall(text)) * 1e6 / 100000, best(lambda: legacy.findall(text)) * 1e6 / 100000)
+
+def benchEdit():
+    """
+        @summary: Cost of updating the tokens after an edit in the middle of a large text, against tokenizing all of it again.
+                  `undo` reverts the edit, i.e. closes the comment or string that the edit opened.
+    """
+    from NX.SyntaxHighlighter.Highlighters.Internal import CppHighlighter, PythonHighlighter
+    
+    sources = {
+        "cpp": (CppHighlighter, "/* Comment */\nint main(int argc, char **argv) {\n    printf(\"%d\\n\", argc); // Line\n    return 0;\n}\n"),
+        "python": (PythonHighlighter, 'def f(x):\n    """Doc"""\n    return x + 1  # Comment\n'),
+    }
+    print "%-8s %-8s %10s %12s %12s %12s %10s" % ("language", "edit", "chars", "analyze ms", "edit ms", "undo ms", "changed")
+    for language in sorted(sources.keys()):
+        cls, source = sources[language]
+        h = cls()
+        text = source * (1000000 / len(source))
+        result = h.Analyze(text)
+        analyze = best(lambda: h.Analyze(text))
+        for name, inserted in (("char", "x"), ("comment", "/*" if language == "cpp" else '"""')):
+            edited = h.AnalyzeEdit(result, len(text) / 2, 0, inserted)
+            edit = best(lambda: h.AnalyzeEdit(result, len(text) / 2, 0, inserted))
+            undo = best(lambda: h.AnalyzeEdit(edited, len(text) / 2, len(inserted), ""))
+            start, end = edited.ChangedRange
+            print "%-8s %-8s %10d %12.1f %12.1f %12.1f %9.1f%%" % (language, name, len(text), analyze * 1e3, edit * 1e3, undo * 1e3, 100.0 * (end - start) / len(text))
+
+def benchEditCheck():
+    """
+        @summary: Checks `AnalyzeEdit` against `Analyze` on random edits of the corpus of every highlighter, each edit applied to the result of the previous one.
+                  The spans must be those of `Analyze` & every character whose spans differ from those before the edit must lie in the `ChangedRange`,
+                  so repainting only the range is enough.
+                  The edits insert pieces of the fragments & the comment delimiters of the language. Failures exit with the status 1.
+    """
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    rnd = random.Random(0)
+    failures = list()
+    print "%-8s %8s %10s %10s" % ("language", "edits", "wrong", "outside")
+    for language in Highlighters.Names:
+        h = Highlighters.GetClass(language)()
+        pieces = FRAGMENTS[language] + [ delimiter for delimiter in COMMENTS[language] if delimiter is not None ] + ["", "\n", " "]
+        result = h.Analyze(corpus(language, "code", 600))
+        wrong = outside = 0
+        for unused_i in range(500):
+            old = result.Text
+            offset = rnd.randint(0, len(old))
+            removed = rnd.randint(0, min(6, len(old) - offset))
+            piece = rnd.choice(pieces)
+            start = rnd.randint(0, len(piece))
+            inserted = piece[start:start + rnd.randint(0, 8)]
+            edited = h.AnalyzeEdit(result, offset, removed, inserted)
+            edit = (offset, removed, inserted)
+            if list(edited.Spans()) != list(h.Analyze(edited.Text).Spans()):
+                wrong += 1
+                failures.append("%s %r: spans differ from Analyze" % (language, edit))
+            # The spans covering every character, in the coordinates of the edited text. The removed characters are left out
+            delta = len(inserted) - removed
+            before, after = dict(), dict()
+            for s, e, key, depth in result.Spans():
+                for p in range(s, e):
+                    if p < offset or p >= offset + removed:
+                        before.setdefault(p if p < offset else p + delta, set()).add((key, depth))
+            for s, e, key, depth in edited.Spans():
+                for p in range(s, e):
+                    after.setdefault(p, set()).add((key, depth))
+            low, high = edited.ChangedRange
+            for p in range(len(edited.Text)):
+                if (p < offset or p >= offset + len(inserted)) and before.get(p) != after.get(p) and not low <= p < high:
+                    outside += 1
+                    failures.append("%s %r: the spans of %d differ outside of %r" % (language, edit, p, (low, high)))
+                    break
+            result = edited
+        print "%-8s %8d %10d %10d" % (language, 500, wrong, outside)
+    for failure in failures[:20]:
+        print "    " + failure
+    if failures:
+        sys.exit(1)
+
+def benchRender():
+    """
+        @summary: Cost of writing out the HTML of a formatted text, per MB of input. The text has a span every 256 characters.
+    """
+    from NX.Main import HtmlWriter, GenericColor, GenericFont, FontStyle
+    
+    line = "if (a < b && c > d)\t{ return x; } // Comment\r\n"
+    colors = [ GenericColor(c) for c in ("0000FF", "008000", "A31515") ]
+    print "%-8s %10s %12s %12s" % ("MB", "spans", "render s", "s/MB")
+    for size in (1, 50):
+        w = HtmlWriter(GenericColor("000000"), GenericColor("FFFFFF"), GenericFont("Lucida Console", 12, FontStyle.Regular))
+        w.Text = line * (size * 1024 * 1024 / len(line))
+        spans = range(0, len(w.Text) - 16, 256)
+        for i in spans:
+            w.Select(i, 16)
+            w.SelectionFormat(colors[i % 3], None, None)
+        render = best(w.GetFormattedText)
+        print "%-8d %10d %12.3f %12.3f" % (size, len(spans), render, render / size)
+
+def benchClasses():
+    """
+        @summary: Size & cost of the HTML of a highlighted text of 1 MB, with inline styles & with CSS classes. The stylesheet is not included.
+    """
+    from NX.SyntaxHighlighter.Highlighters.Internal import CppHighlighter, PythonHighlighter
+    
+    sources = {
+        "cpp": (CppHighlighter, "/* Comment */\nint main(int argc, char **argv) {\n    printf(\"%d\\n\", argc); // Line\n    return 0;\n}\n"),
+        "python": (PythonHighlighter, 'def f(x):\n    """Doc"""\n    return x + 1  # Comment\n'),
+    }
+    print "%-8s %-8s %12s %12s" % ("language", "mode", "output MB", "highlight s")
+    for language in sorted(sources.keys()):
+        cls, source = sources[language]
+        text = source * (1024 * 1024 / len(source))
+        for mode in ("inline", "classes"):
+            h = cls()
+            h.CssClasses = mode == "classes"
+            size = len(h.Highlight(text))
+            print "%-8s %-8s %12.2f %12.3f" % (language, mode, size / 1048576.0, best(lambda: h.Highlight(text)))
+
+def benchBatch():
+    """
+        @summary: Throughput of highlighting a batch of small documents with `HighlightMany`, for an increasing number of workers.
+    """
+    import multiprocessing
+    from NX.SyntaxHighlighter.Batch import HighlightMany
+    
+    source = "/* Comment */\nint main(int argc, char **argv) {\n    printf(\"%d\\n\", argc); // Line\n    return 0;\n}\n"
+    documents = [ source * (i % 50 + 1) for i in range(2000) ]
+    print "%-8s %10s %12s %10s" % ("workers", "documents", "docs/s", "speedup")
+    single = None
+    for workers in sorted(set([1, 2, multiprocessing.cpu_count()])):
+        rate = len(documents) / best(lambda: list(HighlightMany(documents, "cpp", workers)))
+        single = single or rate
+        print "%-8d %10d %12.1f %9.2fx" % (workers, len(documents), rate, rate / single)
+
+def benchParallel():
+    """
+        @summary: Time to highlight a single large text with `HighlightParallel`, split in parts across an increasing number of workers, against `Highlight` in one process.
+                  The output is checked to be identical.
+    """
+    import multiprocessing
+    from NX.SyntaxHighlighter.Batch import HighlightParallel
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    print "%-8s %-8s %8s %10s %10s %6s" % ("language", "MB", "workers", "seconds", "speedup", "same")
+    for language in ("cpp", "python"):
+        text = corpus(language, "code", 8 * 1048576)
+        h = Highlighters.GetClass(language)()
+        start = timeit.default_timer()
+        output = h.Highlight(text)
+        single = timeit.default_timer() - start
+        print "%-8s %-8d %8s %10.2f %9.2fx %6s" % (language, 8, "-", single, 1.0, "-")
+        for workers in sorted(set([2, multiprocessing.cpu_count()])):
+            start = timeit.default_timer()
+            same = "".join(HighlightParallel(text, language, workers)) == output
+            seconds = timeit.default_timer() - start
+            print "%-8s %-8d %8d %10.2f %9.2fx %6s" % (language, 8, workers, seconds, single / seconds, same)
+
+# @note: Code fragments of the corpus of every highlighter. See `corpus`.
+FRAGMENTS = {
+    "basic": [
+        'if x\n    echo "value: $x" # Check\nelse\n    exit 1\n',
+        "while true\n    echo 'c'\n",
+        'for i in 1 2 3\n    echo "Item"\n',
+    ],
+    "bash": [
+        '#!/bin/bash\n# Comment\nNAME="${HOME}/file"\n',
+        'if [ -f "$NAME" ]; then\n    ls --all -l $NAME | grep "x"\nfi\n',
+        'for i in $(seq 1 10); do\n    echo `date` $((i + 1))\ndone\n',
+        "case $1 in\n    start) echo 'Starting';;\nesac\n",
+    ],
+    "cpp": [
+        '#include <stdio.h>\n/* Block\n   comment */\n',
+        'int main(int argc, char **argv) {\n    printf("%d\\n", argc); // Line\n    return 0;\n}\n',
+        "struct Point { double x, y; };\nchar c = 'a';\n",
+        'for (unsigned int i = 0; i < 10; i++) {\n    if (i % 2) continue; else break;\n}\n',
+    ],
+    "csharp": [
+        '#region Main\nusing System;\n/* Block\n   comment */\n',
+        'public class Program {\n    static void Main(string[] args) {\n        Console.WriteLine("Hello"); // Line\n    }\n}\n',
+        "private List<int> items = new List<int>();\nchar c = 'a';\n",
+        '#endregion\nforeach (var i in items) { if (i > 0) break; }\n',
+    ],
+    "python": [
+        'import os\n# Comment\ndef f(x, y=None):\n    """Doc\n    string"""\n    return x + 1\n',
+        "class A(object):\n    def __init__(self):\n        self.s = 'text %d' % 1\n",
+        'for i in range(10):\n    if i in (1, 2) and not False:\n        print "Value", i\n',
+        "x = '''Multi\nline'''\nwhile True: pass\n",
+    ],
+}
+
+# @note: Delimiters of the comments of every highlighter: (Opening, Closing). A closing of None is the end of the line.
+COMMENTS = {
+    "basic": ("#", None),
+    "bash": ("#", None),
+    "cpp": ("/*", "*/"),
+    "csharp": ("/*", "*/"),
+    "python": ('"""', '"""'),
+}
+
+CORPORA = ("code", "unterminated", "comment", "longline")
+
+def corpus(language, kind, size):
+    """
+        @param language: str, The name of the highlighter.
+        @param kind: str, The kind of the text (code, unterminated, comment, longline). See `CORPORA`.
+        @param size: int, The size of the text in bytes.
+        @return: str, A deterministic text of the size. 
+                 `code` picks fragments of the language at random. The others are adversarial: 
+                 `unterminated` opens a string on every line that is never closed, `comment` is a single comment & `longline` is the code on a single line.
+    """
+    rnd = random.Random(size)
+    fragments = FRAGMENTS[language]
+    if kind == "code" or kind == "longline":
+        parts = list()
+        length = 0
+        while length < size:
+            parts.append(rnd.choice(fragments))
+            length += len(parts[-1])
+        text = "".join(parts)
+        if kind == "longline":
+            text = text.replace("\n", " ")
+    elif kind == "unterminated":
+        line = 'x = "never \\" closed if while for %d\n'
+        text = "".join([ line % rnd.randint(0, 9999) for unused_i in range(size / len(line) + 1) ])
+    elif kind == "comment":
+        opening, closing = COMMENTS[language]
+        filler = "if while for return \" ' text\n" if closing is not None else "if while for return \" ' text "
+        body = size - len(opening) - len(closing or "")
+        return opening + (filler * (body / len(filler) + 1))[:body] + (closing or "")
+    else:
+        raise ValueError("Unknown corpus '%s'" % kind)
+    return text[:size]
+
+def parseSize(value):
+    """
+        @param value: str, A size in bytes, with an optional K or M suffix. Eg: 64K
+        @return: int, The size in bytes.
+    """
+    units = {"K": 1024, "M": 1024 * 1024}
+    if value[-1:].upper() in units:
+        return int(value[:-1]) * units[value[-1:].upper()]
+    return int(value)
+
+def suiteCase(case):
+    """
+        @param case: tuple(language, kind, size, repeat), The case to run.
+        @return: dict, The measures of the case: the best times in seconds of constructing the highlighter (`construct`), 
+                 matching the rules into the writer (`match`) & rendering the output (`render`), the output bytes (`output`)
+                 & the growth of the peak memory of the process in KB (`memory`). 
+        @attention: Run in a process of its own, so the peak memory is that of the case alone.
+    """
+    import re
+    import resource
+    from NX.SyntaxHighlighter.Base import HighlightRules
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    language, kind, size, runs = case
+    start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cls = Highlighters.GetClass(language)
+    text = corpus(language, kind, size)
+    
+    def construct():
+        HighlightRules.CompiledPatterns.Clear()     # Cold, as in a new process
+        re.purge()
+        sh = cls()
+        for group in [None] + sh.Rules.RecursiveDependencies.keys():
+            sh.Rules.GetMatcher(group, sh._reFlags)
+        return sh
+    sh = construct()
+    writer = sh._outputWriter
+    
+    def match():
+        writer.Clear()
+        writer.Text = text
+        sh.RecursiveHighlight(text, None, 0)
+    
+    result = dict()
+    result["construct"] = min(timeit.repeat(construct, number=1, repeat=runs))
+    result["match"] = min(timeit.repeat(match, number=1, repeat=runs))
+    result["render"] = min(timeit.repeat(writer.GetFormattedText, number=1, repeat=runs))
+    result["output"] = len(writer.GetFormattedText())
+    result["memory"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start
+    return result
+
+def compareReports(report, baseline):
+    """
+        @param report: dict, The report of the suite.
+        @param baseline: dict, A report saved before.
+        @return: list(str), The regressions: measures of the cases in both reports that are worse than the baseline by more than `threshold`.
+                 Times under `SUITE_FLOORS` are not compared, being too short to time reliably.
+    """
+    regressions = list()
+    for name in sorted(report["cases"].keys()):
+        if name not in baseline["cases"]:
+            continue
+        new, old = report["cases"][name], baseline["cases"][name]
+        for measure in SUITE_MEASURES:
+            if measure not in old:
+                continue
+            if new[measure] - old[measure] > max(old[measure] * threshold, SUITE_FLOORS.get(measure, 0)):
+                regressions.append("%s %s: %s -> %s (%+.0f%%)" % (name, measure, old[measure], new[measure], 100.0 * (new[measure] - old[measure]) / max(old[measure], 1e-9)))
+    return regressions
+
+# @note: The measures of a case of the suite & the smallest change of each that can be a regression.
+SUITE_MEASURES = ("construct", "match", "render", "memory", "output")
+SUITE_FLOORS = {"construct": 0.005, "match": 0.005, "render": 0.005, "memory": 1024}
+
+def benchSuite():
+    """
+        @summary: Times constructing the highlighter, matching the rules & rendering the output separately for every built-in highlighter, 
+                  on the corpora of `corpus` for every size in `sizes`. Also records the peak memory & the output bytes.
+                  The report is written to `report` as JSON & compared against `baseline`, if given. Regressions exit with the status 1.
+    """
+    import json
+    import multiprocessing
+    import platform
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    cases = [ (language, kind, size) for language in Highlighters.Names for kind in CORPORA for size in sizes ]
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)     # A process for every case
+    results = dict()
+    print "%-8s %-13s %10s %12s %10s %10s %12s %12s" % ("language", "corpus", "bytes", "construct s", "match s", "render s", "memory KB", "output")
+    try:
+        for (language, kind, size), result in zip(cases, pool.imap(suiteCase, [ case + (repeat,) for case in cases ])):
+            name = "%s/%s/%d" % (language, kind, size)
+            results[name] = result
+            print "%-8s %-13s %10d %12.4f %10.4f %10.4f %12d %12d" % (language, kind, size, result["construct"], result["match"], result["render"], result["memory"], result["output"])
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+    
+    report = {"python": sys.version.split()[0], "platform": platform.platform(), "repeat": repeat, "cases": results}
+    if reportFile is not None:
+        with open(reportFile, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    if baselineFile is not None:
+        with open(baselineFile, "r") as f:
+            regressions = compareReports(report, json.load(f))
+        print
+        print "%d regressions against %s" % (len(regressions), baselineFile)
+        for regression in regressions:
+            print "    " + regression
+        if regressions:
+            sys.exit(1)
+
+def benchStartup():
+    """
+        @summary: Cold start of `init.py` in a new interpreter, against the interpreter alone (`python`) & the registry alone (`-h`), 
+                  & the cost of a registry lookup as the number of registered languages grows. Only the highlighter selected is imported.
+    """
+    import os
+    import subprocess
+    import tempfile
+    from NX.SyntaxHighlighter.Registry import Highlighters, HighlighterRegistry
+    
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "init.py")
+    source = tempfile.NamedTemporaryFile(suffix=".txt")
+    source.write("int x = 0; // Line\n")
+    source.flush()
+    devnull = open(os.devnull, "w")
+    
+    def run(args):
+        return lambda: subprocess.call([sys.executable] + args, stdout=devnull, stderr=devnull, cwd=os.path.dirname(script))
+    print "%-20s %12s" % ("command", "startup ms")
+    print "%-20s %12.1f" % ("python", best(run(["-c", "pass"])) * 1e3)
+    print "%-20s %12.1f" % ("init.py -h", best(run([script, "-h"])) * 1e3)
+    for name in Highlighters.Names:
+        print "%-20s %12.1f" % ("init.py -t " + name, best(run([script, "-t", name, "-i", source.name, "-o", os.devnull])) * 1e3)
+    devnull.close()
+    source.close()
+    
+    print
+    print "%-10s %16s" % ("languages", "lookup us")
+    for count in (5, 100, 10000):
+        registry = HighlighterRegistry()
+        for i in range(count):
+            registry.Register("language%d" % i, "package.module%d:Highlighter" % i, ("alias%d" % i,), (".ext%d" % i,))
+        names = [ "alias%d" % i for i in range(0, count, max(count / 100, 1)) ]
+        def lookup():
+            for name in names:
+                registry.Resolve(name)
+        print "%-10d %16.3f" % (count, best(lookup) * 1e6 / len(names))
+
+def benchBacktrack():
+    """
+        @summary: How the cost of matching every rule of the in-built highlighters scales on adversarial inputs (See Analyzer.RuleAnalyzer), 
+                  & the cost of highlighting unclosed multi-line comments with & without a match budget (See SyntaxHighlighter.MatchBudget).
+    """
+    from NX.SyntaxHighlighter.Analyzer import RuleAnalyzer
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    analyzer = RuleAnalyzer()
+    print "%-10s %-14s %-13s %8s %10s %9s %-12s" % ("language", "rule", "input", "size", "ms", "exponent", "scaling")
+    for name in Highlighters.Names:
+        for key, report in analyzer.AnalyzeRules(Highlighters.GetClass(name)().Rules):
+            print "%-10s %-14s %-13s %8d %10.2f %9.2f %-12s" % (name, key, report["input"], report["size"], report["seconds"] * 1e3, report["exponent"], report["scaling"])
+    
+    print
+    print "%-8s %-8s %10s %12s %12s" % ("input", "openings", "chars", "none ms", "budget ms")
+    h = Highlighters.GetClass("cpp")()
+    for label, line in (("keyword", "/*x int\n"), ("plain", "/* unclosed\n")):   # A match on every line, or none between the openings
+        for count in (1000, 2000, 4000):
+            text = "/*" + "x" * 10 + "\n" + line * count
+            h.MatchBudget = None
+            unbudgeted = best(lambda: h.Highlight(text))
+            h.MatchBudget = 0.05
+            print "%-8s %-8d %10d %12.1f %12.1f" % (label, count, len(text), unbudgeted * 1e3, best(lambda: h.Highlight(text)) * 1e3)
+
+def benchCache():
+    """
+        @summary: Cost of highlighting a large text against returning it from the render cache (See Cache.RenderCache), for `Highlight` & `HighlightStream`.
+    """
+    import shutil
+    import tempfile
+    from NX.SyntaxHighlighter.Cache import RenderCache
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    directory = tempfile.mkdtemp()
+    source = tempfile.NamedTemporaryFile()
+    try:
+        print "%-8s %10s %12s %12s %12s" % ("language", "chars", "engine ms", "hit ms", "stream hit ms")
+        for name in ("cpp", "python"):
+            h = Highlighters.GetClass(name)()
+            text = corpus(name, "code", 1048576)
+            source.seek(0)
+            source.truncate()
+            source.write(text)
+            source.flush()
+            engine = best(lambda: h.Highlight(text))
+            h.RenderCache = RenderCache(directory)
+            h.Highlight(text)
+            def stream():
+                for unused_chunk in h.HighlightStream(open(source.name, "rb")):
+                    pass
+            stream()
+            print "%-8s %10d %12.1f %12.1f %12.1f" % (name, len(text), engine * 1e3, best(lambda: h.Highlight(text)) * 1e3, best(stream) * 1e3)
+    finally:
+        source.close()
+        shutil.rmtree(directory)
+
+def benchDaemon():
+    """
+        @summary: Requests per second of small documents through the daemon (See Server.HighlightDaemon) for an increasing number of concurrent clients, 
+                  against a cold `init.py`, & the requests refused as busy with a queue of one.
+    """
+    import os
+    import tempfile
+    import threading
+    from NX.SyntaxHighlighter.Client import HighlightClient, DaemonBusy
+    from NX.SyntaxHighlighter.Server import HighlightDaemon
+    
+    path = os.path.join(tempfile.mkdtemp(), "daemon.sock")
+    source = "int main(int argc, char **argv) {\n    printf(\"%d\\n\", argc); // Line\n    return 0;\n}\n" * 20
+    requests = 400
+    
+    def run(clients):
+        refused = [0]
+        def client():
+            c = HighlightClient(path)
+            for unused_i in range(requests / clients):
+                try:
+                    c.Highlight(source, "cpp")
+                except DaemonBusy:
+                    refused[0] += 1
+        threads = [ threading.Thread(target=client) for unused_i in range(clients) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return refused[0]
+    
+    daemon = HighlightDaemon(path, workers=4)
+    daemon.Start()
+    try:
+        run(4)      # Warm the highlighters of every worker
+        print "%-8s %10s %12s %10s" % ("clients", "requests", "requests/s", "busy")
+        for clients in (1, 4, 16):
+            refused = run(clients)
+            print "%-8d %10d %12.1f %10d" % (clients, requests, requests / best(lambda: run(clients)), refused)
+    finally:
+        daemon.Stop()
+    
+    daemon = HighlightDaemon(path, workers=1, queueSize=1)
+    daemon.Start()
+    try:
+        print "%-8s %10d %12s %10d" % ("queue=1", requests, "-", run(16))
+    finally:
+        daemon.Stop()
+        os.rmdir(os.path.dirname(path))
+
+def benchTree():
+    """
+        @summary: Highlighting a tree of files into an output tree with `HighlightFiles`, for an increasing number of processes, 
+                  against re-running it with the manifest (See Batch.BuildManifest) when no file has changed.
+    """
+    import multiprocessing
+    import os
+    import shutil
+    import tempfile
+    from NX.SyntaxHighlighter.Batch import BuildManifest, CollectFiles, HighlightFiles
+    
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "src")
+        for i in range(200):
+            folder = os.path.join(source, "module%d" % (i % 10))
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            for name, extension in (("cpp", ".cpp"), ("python", ".py")):
+                with open(os.path.join(folder, "file%d%s" % (i, extension)), "w") as f:
+                    f.write(corpus(name, "code", 1024 * (i % 8 + 1)))
+        print "%-8s %8s %12s %12s" % ("workers", "files", "full ms", "unchanged ms")
+        for workers in sorted(set([1, 2, multiprocessing.cpu_count()])):
+            output = os.path.join(directory, "out%d" % workers)
+            files = CollectFiles([source], output)
+            def run():
+                manifest = BuildManifest(os.path.join(output, ".nx-manifest.json"))
+                for unused_result in HighlightFiles(files, workers, manifest=manifest):
+                    pass
+                manifest.Save()
+            def full():
+                shutil.rmtree(output, True)
+                os.makedirs(output)
+                run()
+            print "%-8d %8d %12.1f %12.1f" % (workers, len(files), best(full) * 1e3, best(run) * 1e3)
+    finally:
+        shutil.rmtree(directory)
+
+def benchSink():
+    """
+        @summary: Time to the first chunk, total time & peak memory of highlighting a file as a string with `Highlight` & written into a sink with `HighlightTo`, 
+                  as the file grows. The memory is the growth of the peak resident size of a process doing only that, in MB.
+    """
+    import multiprocessing
+    import os
+    import resource
+    import tempfile
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    def measure(func, results):
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        first = [None]
+        start = timeit.default_timer()
+        def sink(chunk):
+            if first[0] is None:
+                first[0] = timeit.default_timer() - start
+        func(sink)
+        total = timeit.default_timer() - start
+        results.put((first[0], total, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024.0))
+    def run(func):
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(target=measure, args=(func, results))
+        process.start()
+        result = results.get()
+        process.join()
+        return result
+    
+    h = Highlighters.GetClass("cpp")()
+    source = tempfile.NamedTemporaryFile()
+    try:
+        print "%-8s %-12s %10s %10s %10s" % ("MB", "method", "first ms", "total ms", "peak MB")
+        for size in (1, 4, 16):
+            source.seek(0)
+            source.truncate()
+            source.write(corpus("cpp", "code", size * 1048576))
+            source.flush()
+            def whole(sink):
+                with open(source.name, "rb") as f:
+                    sink(h.Highlight(f.read()))
+            def stream(sink):
+                with open(source.name, "rb") as f:
+                    h.HighlightTo(f, sink)
+            for method, func in (("Highlight", whole), ("HighlightTo", stream)):
+                first, total, peak = run(func)
+                print "%-8d %-12s %10.1f %10.1f %10.1f" % (size, method, first * 1e3, total * 1e3, peak)
+    finally:
+        source.close()
+
+def benchRtf():
+    """
+        @summary: Cost of formatting a growing text as RTF (See NX.Main.RtfWriter) against HTML, per MB of input, & the size of the output. 
+                  Constant costs per MB mean the writers are linear in the text.
+    """
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    print "%-8s %-6s %12s %12s %12s" % ("MB", "writer", "ms", "ms/MB", "output MB")
+    h = Highlighters.GetClass("cpp")()
+    for size in (0.25, 1, 4):
+        text = corpus("cpp", "code", int(size * 1048576))
+        for writer in ("html", "rtf"):
+            h.SetWriter(writer)
+            seconds = best(lambda: h.Highlight(text))
+            print "%-8.2f %-6s %12.1f %12.1f %12.2f" % (size, writer, seconds * 1e3, seconds * 1e3 / size, len(h.Highlight(text)) / 1048576.0)
+
+def benchSpans():
+    """
+        @summary: Memory of the formatted spans of a growing text, before it is written: the growth of the peak resident size of a process doing only that, 
+                  in MB & in bytes per span (See NX.Main.SpanStore). Constant bytes per span mean the spans are the only cost that grows with the text.
+    """
+    import gc
+    import multiprocessing
+    import resource
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    def measure(language, text, results):
+        sh = Highlighters.GetClass(language)()
+        writer = sh._outputWriter
+        gc.collect()
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        writer.Text = text
+        sh.PrepareWriter()
+        sh.RecursiveHighlight(text, None, 0)
+        results.put((writer._spans.Count, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * 1024.0))
+    
+    print "%-8s %-8s %10s %10s %12s" % ("language", "MB", "spans", "peak MB", "bytes/span")
+    for language in ("cpp", "python"):
+        for size in (4, 16):
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(target=measure, args=(language, corpus(language, "code", size * 1048576), results))
+            process.start()
+            spans, peak = results.get()
+            process.join()
+            print "%-8s %-8d %10d %10.1f %12.1f" % (language, size, spans, peak / 1048576, peak / max(spans, 1))
+
+def benchQueries():
+    """
+        @summary: Cost of the queries of the format of a highlighted text: the first, which indexes the runs (See NX.Main.SpanStore.Index), one at a random position 
+                  & the formats of a screen of runs (See NX.Main.GenericWriter.StylesInRange), as the text grows. Constant costs mean the queries are logarithmic.
+    """
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    
+    print "%-8s %-6s %10s %12s %12s" % ("MB", "writer", "index ms", "StyleAt us", "screen us")
+    random.seed(1)
+    for size in (0.25, 1, 4):
+        text = corpus("cpp", "code", int(size * 1048576))
+        positions = [ random.randint(0, len(text) - 1) for unused_i in range(1000) ]
+        for name in ("html", "rtf"):
+            h = Highlighters.GetClass("cpp")()
+            h.SetWriter(name)
+            h.Highlight(text)
+            writer = h._outputWriter
+            start = timeit.default_timer()
+            writer.StyleAt(0)
+            index = timeit.default_timer() - start
+            at = best(lambda: [ writer.StyleAt(p) for p in positions ]) / len(positions)
+            screen = best(lambda: [ writer.StylesInRange(p, p + 4000) for p in positions[:100] ]) / 100
+            print "%-8.2f %-6s %10.1f %12.1f %12.1f" % (size, name, index * 1e3, at * 1e6, screen * 1e6)
+
+def benchViewport():
+    """
+        @summary: Time to the first screen of a DocumentView (See NX.SyntaxHighlighter.Viewport), against highlighting the whole text, as the text grows.
+                  Then a jump to the end, which finds the checkpoints up to it, & a screen near it once they are found.
+    """
+    from NX.SyntaxHighlighter.Registry import Highlighters
+    from NX.SyntaxHighlighter.Viewport import DocumentView
+    
+    print "%-8s %12s %12s %12s %12s" % ("MB", "whole s", "first ms", "jump ms", "near ms")
+    for size in (0.25, 1, 4):
+        text = corpus("cpp", "code", int(size * 1048576))
+        h = Highlighters.GetClass("cpp")()
+        start = timeit.default_timer()
+        h.Highlight(text)
+        whole = timeit.default_timer() - start
+        view = DocumentView(h, text)
+        start = timeit.default_timer()
+        view.RenderLines(0, 50)
+        first = timeit.default_timer() - start
+        last = view.LineCount
+        start = timeit.default_timer()
+        view.RenderLines(last - 50, last)
+        jump = timeit.default_timer() - start
+        start = timeit.default_timer()
+        view.RenderLines(last - 1000, last - 950)
+        near = timeit.default_timer() - start
+        print "%-8.2f %12.2f %12.1f %12.1f %12.1f" % (size, whole, first * 1e3, jump * 1e3, near * 1e3)
+
+# Name: function
+BENCHMARKS = {
+    "backtrack": benchBacktrack,
+    "batch": benchBatch,
+    "cache": benchCache,
+    "classes": benchClasses,
+    "daemon": benchDaemon,
+    "dispatch": benchDispatch,
+    "edit": benchEdit,
+    "editcheck": benchEditCheck,
+    "parallel": benchParallel,
+    "queries": benchQueries,
+    "render": benchRender,
+    "rtf": benchRtf,
+    "sink": benchSink,
+    "spans": benchSpans,
+    "startup": benchStartup,
+    "words": benchWords,
+    "suite": benchSuite,
+    "tree": benchTree,
+    "viewport": benchViewport,
+}
+
+if __name__ == "__main__":
+    getArgs()
+    for name in benchmarks or sorted(BENCHMARKS.keys()):
+        print "== %s ==" % name
+        BENCHMARKS[name]()
+        print
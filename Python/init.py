@@ -26,24 +26,65 @@ This file is part of NX - Syntax Highlighter.
 '''
 
 import getopt
+import glob
+import mmap
+import multiprocessing
+import os
+import signal
 import sys
+from NX.SyntaxHighlighter.Registry import Highlighters    # Imports no highlighter
+from NX.Main import Writers
 
 # @note: Variables for script.    
 ifile = "-"             # Input file.  Default: <stdin>
+inputs = []             # Input files, directories & globs, highlighted into the output directory. Default: None, `ifile` is highlighted
 ofile = "-";            # Output file. Default: <stdout>
-highlighter = "basic"   # Highlighter. Default: BasicHighlighter
-writer = "html"         # Writer.      Default: HtmlWriter
+highlighter = None      # Highlighter. Default: By the extension of the input file, else BasicHighlighter
+writer = "html"         # Writer.      Default: HtmlWriter, else RtfWriter
+cssClasses = False      # Write the rules as CSS classes instead of inline styles.
+stylesheet = False      # Write only the stylesheet of the CSS classes.
+cacheDir = None         # Directory of the render cache. Default: No cache
+cacheSize = 256         # Size of the render cache, in MB.
+cacheStats = False      # Print the statistics of the render cache to <stderr>.
+serve = False           # Run as the highlight daemon instead.
+socketPath = None       # Unix socket of the daemon. Default: $NX_DAEMON_SOCKET, else ~/.cache/nx-syntaxhighlighter/daemon.sock
+port = None             # Localhost port of the daemon over HTTP. Default: None
+workers = 4             # Requests the daemon serves at once.
+queueSize = 64          # Requests that may wait for a worker of the daemon.
+useDaemon = True        # Highlight through the daemon when it is running.
+daemonLimit = 16 * 1024 * 1024  # Larger files are streamed locally, not sent to the daemon.
+jobs = None             # Processes highlighting the inputs. Default: The number of CPUs
+partsLimit = 16 * 1024 * 1024   # A single input at least as large is highlighted in parts across `jobs` processes.
+manifestFile = None     # Manifest of the outputs of the inputs. Default: .nx-manifest.json in the output directory
+force = False           # Highlight the inputs even if their outputs are current.
 
 def usage():
     """
         @summary: Prints the usage details for the program.
     """
-    hlp = """Usage Options:
-          -i | --input-file      : Input file.
-          -o | --output-file     : Output file.
-          -t | --highlight-type  : DEFAULT: basic, Type of highlighter (basic, bash, cpp, python, csharp, sql, java, etc.).
-          -w | --writer          : DEFAULT: html , Output writer (Currently only html)
-          """
+    hlp = """Usage: init.py [options] [file | directory | glob ...]
+       Several inputs, a directory or a glob are highlighted into the output directory, mirroring their paths. Unchanged files are skipped.
+       Only the files of directories with a registered extension are highlighted, unless -t is given.
+Usage Options:
+          -i | --input-file      : Input file. Repeat for several inputs.
+          -o | --output-file     : Output file. The output directory for several inputs, or if it is a directory.
+          -t | --highlight-type  : DEFAULT: by the file extension, else basic. Name or alias of the highlighter (%s).
+          -w | --writer          : DEFAULT: html , Output writer (html, rtf)
+          -c | --css-classes     : Write the rules as CSS classes instead of inline styles. The stylesheet is included in documents only.
+          -s | --stylesheet      : Write only the stylesheet of the CSS classes of the highlighter. No input is read.
+          -k | --cache           : Directory of the render cache. A file highlighted before is written from the cache.
+               --cache-size      : DEFAULT: 256, Size of the render cache in MB. The least recently used entries are evicted.
+               --cache-stats     : Print the hits & misses of the render cache to <stderr>.
+               --serve           : Run as the daemon, keeping the highlighters warm. Input files are highlighted through it while it runs.
+               --socket          : DEFAULT: $NX_DAEMON_SOCKET, else ~/.cache/nx-syntaxhighlighter/daemon.sock, Unix socket of the daemon.
+               --port            : DEFAULT: none, Port of the daemon over HTTP, on localhost.
+               --workers         : DEFAULT: 4, Requests the daemon serves at once.
+               --queue           : DEFAULT: 64, Requests that may wait for the daemon. Further requests are refused as busy.
+               --no-daemon       : Highlight locally even if the daemon is running.
+          -j | --jobs            : DEFAULT: the number of CPUs, Processes highlighting several inputs, or the parts of a single input of 16 MB or more.
+               --manifest        : DEFAULT: .nx-manifest.json in the output directory, Hashes of the inputs last highlighted.
+               --force           : Highlight every input, even if its output is current.
+          """ % ", ".join(Highlighters.Names)
     print hlp
 
     
@@ -51,60 +92,217 @@ def getArgs():
     """
         @summary: Initializes the arguments for the program. 
     """
-    global ifile, ofile, highlighter, writer
+    global ifile, inputs, ofile, highlighter, writer, cssClasses, stylesheet, cacheDir, cacheSize, cacheStats, serve, socketPath, port, workers, queueSize, useDaemon, jobs, manifestFile, force
     try:
-        opts, unused_args = getopt.getopt(sys.argv[1:], "i:o:t:w:h", ["input-file=", "output-file=", "highlight-type=", "writer=", "--help"])        
+        opts, args = getopt.getopt(sys.argv[1:], "i:o:t:w:csk:j:h", ["input-file=", "output-file=", "highlight-type=", "writer=", "css-classes", "stylesheet", "cache=", "cache-size=", "cache-stats", "serve", "socket=", "port=", "workers=", "queue=", "no-daemon", "jobs=", "manifest=", "force", "--help"])        
         for o,v in opts:                                    
             if o in ['-i', '--input-file']: 
                 ifile = v
+                inputs.append(v)
             elif o in ['-o', '--output-file']: 
                 ofile = v
             elif o in ['-t', '--highlight-type']: 
                 highlighter = v
+            elif o in ['-c', '--css-classes']: 
+                cssClasses = True
+            elif o in ['-s', '--stylesheet']: 
+                stylesheet = True
+            elif o in ['-k', '--cache']: 
+                cacheDir = v
+            elif o in ['--cache-size']: 
+                cacheSize = int(v)
+            elif o in ['--cache-stats']: 
+                cacheStats = True
+            elif o in ['--serve']: 
+                serve = True
+            elif o in ['--socket']: 
+                socketPath = v
+            elif o in ['--port']: 
+                port = int(v)
+            elif o in ['--workers']: 
+                workers = int(v)
+            elif o in ['--queue']: 
+                queueSize = int(v)
+            elif o in ['--no-daemon']: 
+                useDaemon = False
+            elif o in ['-j', '--jobs']: 
+                jobs = int(v)
+            elif o in ['--manifest']: 
+                manifestFile = v
+            elif o in ['--force']: 
+                force = True
             elif o in ['-h', '--help']:
                 usage()
                 sys.exit(0)
-            # @attention: Only HtmlWriter is supported as of version 1.x  
-            #elif o in ['-w', '--writer']: 
-            #    writer = v                        
-    except getopt.GetoptError, err:        
+            elif o in ['-w', '--writer']: 
+                writer = v.lower()
+    except (getopt.GetoptError, ValueError), err:        
         print str(err)
         usage()
         sys.exit(2)
+    if not Writers.has_key(writer):
+        print "The writer '%s' is not supported." % writer
+        usage()
+        sys.exit(2)
+    inputs.extend(args)
+    if len(inputs) == 1 and not os.path.isdir(inputs[0]) and not glob.has_magic(inputs[0]) and not os.path.isdir(ofile):
+        ifile = inputs[0]
+        inputs = []     # A single file is highlighted as before
+    elif inputs and ofile == "-":
+        print "An output directory (-o) is required for several inputs."
+        usage()
+        sys.exit(2)
+
+def runTree():
+    """
+        @summary: Highlights the inputs into the output directory across processes, skipping the inputs whose outputs are current.
+    """
+    from NX.SyntaxHighlighter.Batch import BuildManifest, CollectFiles, HighlightFiles
+    files = CollectFiles(inputs, ofile, "." + writer, highlighter is not None)
+    if not os.path.isdir(ofile):
+        os.makedirs(ofile)
+    manifest = BuildManifest(manifestFile or os.path.join(ofile, ".nx-manifest.json"))
+    counts = [0, 0]     # Skipped, highlighted
+    try:
+        for unused_input, unused_output, written in HighlightFiles(files, jobs, cssClasses, manifest, highlighter, force, writer):
+            counts[written] += 1
+    except KeyError, err:
+        print err.args[0]
+        sys.exit(1)
+    finally:
+        manifest.Save()     # Records the outputs written, even by a run that failed
+    sys.stderr.write("%d highlighted, %d unchanged\n" % (counts[1], counts[0]))
+
+def runDaemon():
+    """
+        @summary: Serves highlight requests till interrupted or terminated.
+    """
+    from NX.SyntaxHighlighter.Server import HighlightDaemon
+    renderCache = None
+    if cacheDir is not None:
+        from NX.SyntaxHighlighter.Cache import RenderCache
+        renderCache = RenderCache(cacheDir, cacheSize * 1024 * 1024)
+    daemon = HighlightDaemon(socketPath, port, workers, queueSize, renderCache=renderCache)
+    try:
+        daemon.Start()
+    except (OSError, IOError), err:     # socket.error included
+        print str(err)
+        sys.exit(1)
+    sys.stderr.write("Serving on %s\n" % ", ".join(daemon.Addresses))
+    def stop(unused_signum, unused_frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while True:
+            signal.pause()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.Stop()
+
+def highlightByDaemon(name):
+    """
+        @param name: str, The highlighter.
+        @return: str, The input file highlighted by the daemon, as HTML. `None` if it is not running, busy or failed, so that the file is highlighted locally.
+    """
+    if not useDaemon or writer != "html" or ifile == "-" or cacheDir is not None or not os.path.isfile(ifile) or os.path.getsize(ifile) > daemonLimit:
+        return None
+    from NX.SyntaxHighlighter.Client import HighlightClient, DaemonError
+    import socket
+    try:
+        with open(ifile, "r") as f:
+            return HighlightClient(socketPath).Highlight(f.read(), name, ifile, cssClasses)
+    except (socket.error, DaemonError):
+        return None
+
+def highlightInParts(name):
+    """
+        @param name: str, The highlighter.
+        @return: bool, True if the input file was highlighted in parts across the processes into the output. False if it is small or cached, so that it is streamed.
+    """
+    if ifile == "-" or cacheDir is not None or (jobs or multiprocessing.cpu_count()) <= 1 or not os.path.isfile(ifile) or os.path.getsize(ifile) < partsLimit:
+        return False
+    from NX.SyntaxHighlighter.Batch import HighlightParallel
+    from NX.Main import WriterSink
+    with open(ifile, "rb") as inFile:
+        text = mmap.mmap(inFile.fileno(), 0, access=mmap.ACCESS_READ)
+        outFile = sys.stdout if ofile == "-" else open(ofile, "w")
+        try:
+            with WriterSink(outFile) as sink:
+                for chunk in HighlightParallel(text, name, jobs, cssClasses, ifile, writer):
+                    sink.Write(chunk)
+        finally:
+            text.close()
+            if outFile is not sys.stdout:
+                outFile.close()
+    if ofile == "-":
+        print
+    return True
 
 if __name__ == "__main__":
     getArgs()        
-    import NX.SyntaxHighlighter.Highlighters.Internal as internal   # Import the internal in-built highlighters 
-    if highlighter == "basic":
-        sh = internal.BasicHighlighter()
-    elif highlighter == "bash":
-        sh = internal.BashHighlighter()
-    elif highlighter == "cpp":
-        sh = internal.CppHighlighter()
-    elif highlighter == "csharp":
-        sh = internal.CSharpHighlighter()
-    elif highlighter == "python":
-        sh = internal.PythonHighlighter()    
-    # @attention: Insert custom highlighters here. 
-    # Example:
-    # elif highlighter == "my_highlighter":
-    #     sh = MyHighlighter()
-    else:
-        print "The highlighter '%s' is not supported/cannot be found." % highlighter
+    if serve:
+        runDaemon()
+        sys.exit(0)
+    if inputs:
+        runTree()
+        sys.exit(0)
+    # @attention: Register custom highlighters in `Highlighters` or through its entry points. Only the selected highlighter is imported.
+    if highlighter is None:
+        highlighter = (Highlighters.ForFile(ifile) if ifile != "-" else None) or "basic"
+    if not stylesheet:
+        # @note: The daemon keeps the highlighters warm, so nothing is imported or built here.
+        output = highlightByDaemon(highlighter)
+        if output is not None:
+            if ofile == "-":
+                sys.stdout.write(output)
+                print
+            else:
+                with open(ofile, "w") as f:
+                    f.write(output)
+            sys.exit(0)
+    try:
+        sh = Highlighters.GetClass(highlighter)()
+    except KeyError, err:
+        print err.args[0]
         sys.exit(1)
+    if writer != "html":
+        sh.SetWriter(writer)
+    sh.CssClasses = cssClasses
+    if cacheDir is not None:
+        from NX.SyntaxHighlighter.Cache import RenderCache
+        sh.RenderCache = RenderCache(cacheDir, cacheSize * 1024 * 1024)
     
+    if stylesheet:
+        if ofile == "-":
+            sys.stdout.write(sh.Stylesheet)
+        else:
+            with open(ofile, "w") as f:
+                f.write(sh.Stylesheet)
+        sys.exit(0)
+    
+    if highlightInParts(highlighter):
+        sys.exit(0)
+    # @note: The input is highlighted as a stream into the output. Output is written in chunks & never held in memory as a whole.
     if ifile == "-":        
         print "Enter text:"
-        data = "".join(sys.stdin.readlines())
+        inFile = sys.stdin
     else:
-        with open(ifile, "r") as inFile:
-            data = inFile.read()      
+        inFile = open(ifile, "r")
     
-    if ofile == "-":
-        print sh.Highlight(data,ifile if ifile != "-" else None)
-    else:  
-        with open(ofile, "w") as f:    
-            f.write(sh.Highlight(data, ifile if ifile != "-" else None))     
+    try:
+        if ofile == "-":
+            sh.HighlightTo(inFile, sys.stdout, ifile if ifile != "-" else None)
+            print
+        else:  
+            with open(ofile, "w") as f:    
+                sh.HighlightTo(inFile, f, ifile if ifile != "-" else None)
+    finally:
+        if inFile is not sys.stdin:
+            inFile.close()
+        if cacheStats and sh.RenderCache is not None:
+            sys.stderr.write("Cache: %(hits)d hits, %(misses)d misses, %(stores)d stored, %(evictions)d evicted\n" % sh.RenderCache.Stats)
     
         
         